@@ -1,7 +1,17 @@
-def generate_interface_map(routers, links):
+from backend.ipam import (
+    DEFAULT_P2P_POOL,
+    DEFAULT_P2P_PREFIXLEN,
+    allocate_p2p_blocks,
+)
+
+
+def generate_interface_map(routers, links, pool=DEFAULT_P2P_POOL,
+                           prefixlen=DEFAULT_P2P_PREFIXLEN):
     """
     Generate interface-to-IP assignments for all routers.
 
+    Each link gets the next point-to-point block carved from `pool`.
+
     Inputs:
         routers: ["r1", "r2", "r3"]
         links: [
@@ -11,12 +21,12 @@ def generate_interface_map(routers, links):
 
     Returns:
         {
-            "r1": {"Ethernet1": "10.0.1.1/30"},
+            "r1": {"Ethernet1": "10.0.0.1/30"},
             "r2": {
-                "Ethernet1": "10.0.1.2/30",
-                "Ethernet2": "10.0.2.1/30"
+                "Ethernet1": "10.0.0.2/30",
+                "Ethernet2": "10.0.0.5/30"
             },
-            "r3": {"Ethernet1": "10.0.2.2/30"}
+            "r3": {"Ethernet1": "10.0.0.6/30"}
         }
     """
 
@@ -26,16 +36,13 @@ def generate_interface_map(routers, links):
     # Track next Ethernet number per router
     interface_counters = {router: 1 for router in routers}
 
-    subnet_counter = 1  # used to generate unique /30 per link
+    # One point-to-point block per link
+    blocks = allocate_p2p_blocks(pool, len(links), prefixlen)
 
-    for link in links:
+    for link, (ip1, ip2) in zip(links, blocks):
         r1 = link[0]
         r2 = link[1]
 
-        # Assign subnet 10.0.X.0/30
-        ip1 = f"10.0.{subnet_counter}.1/30"
-        ip2 = f"10.0.{subnet_counter}.2/30"
-
         # Assign next available Ethernet interface
         iface1 = f"Ethernet{interface_counters[r1]}"
         iface2 = f"Ethernet{interface_counters[r2]}"
@@ -46,6 +53,36 @@ def generate_interface_map(routers, links):
         # Increment counters
         interface_counters[r1] += 1
         interface_counters[r2] += 1
-        subnet_counter += 1
 
     return interface_map
+
+
+def expected_lldp_topology(routers, links):
+    """
+    LLDP adjacency the links should produce, using the same Ethernet
+    numbering as generate_interface_map.
+
+    Returns (same shape as the lldp_topology from pipeline.discover):
+        {
+            "r1": [("Ethernet1", "r2", "Ethernet1")],
+            "r2": [("Ethernet1", "r1", "Ethernet1"), ("Ethernet2", "r3", "Ethernet1")],
+            "r3": [("Ethernet1", "r2", "Ethernet2")]
+        }
+    """
+    topology = {router: [] for router in routers}
+    interface_counters = {router: 1 for router in routers}
+
+    for link in links:
+        r1 = link[0]
+        r2 = link[1]
+
+        iface1 = f"Ethernet{interface_counters[r1]}"
+        iface2 = f"Ethernet{interface_counters[r2]}"
+
+        topology[r1].append((iface1, r2, iface2))
+        topology[r2].append((iface2, r1, iface1))
+
+        interface_counters[r1] += 1
+        interface_counters[r2] += 1
+
+    return topology
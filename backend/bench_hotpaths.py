@@ -0,0 +1,433 @@
+"""
+Micro-benchmarks for the controller's hot paths on synthetic topologies.
+
+Times graph building, shortest paths, the global routing table, interface
+addressing, containerlab topology generation and the parsers for router
+output, on ring, full-mesh, leaf-spine and random topologies:
+
+    python -m backend.bench_hotpaths
+    python -m backend.bench_hotpaths --sizes 8,64,512,2000 --json generated/bench.json
+    python -m backend.bench_hotpaths --topologies ring --cases grt,bfs --repeat 10
+    python -m backend.bench_hotpaths --compare generated/bench.json
+
+Each case reports the median and best time per call and, from a separate
+call under tracemalloc, the peak memory it allocated. Cases too large for
+the limits (--max-links, --max-routes) are listed as skipped. With
+--compare, cases slower than the baseline by more than --threshold are
+listed and the command exits non-zero.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+from backend.addressing import expected_lldp_topology, generate_interface_map
+from backend.graph_utils import bfs_shortest_path, build_global_routing_table, build_graph
+from backend.ip_collect import _get_interface_ips
+from backend.lldp_collect import parse_lldp_neighbors
+from backend.topology_gen import build_containerlab_yaml, render_yaml
+
+
+TOPOLOGIES = ("ring", "mesh", "leaf-spine", "random")
+DEFAULT_SIZES = (8, 64, 512, 2000)
+
+# A sample is at least this long: fast cases are called in a loop
+MIN_SAMPLE_SECONDS = 0.05
+# Stop repeating a case once its samples add up to this
+CASE_BUDGET_SECONDS = 2.0
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ======================================
+# Synthetic Topologies
+# ======================================
+
+def ring(n, rng):
+    return [[f"r{i + 1}", f"r{(i + 1) % n + 1}"] for i in range(n if n > 2 else n - 1)]
+
+
+def mesh(n, rng):
+    return [[f"r{i + 1}", f"r{j + 1}"] for i in range(n) for j in range(i + 1, n)]
+
+
+def leaf_spine(n, rng):
+    """Every leaf connects to every spine; 2 to 8 spines."""
+    spines = max(2, min(8, n // 16))
+    return [[f"r{s + 1}", f"r{l + 1}"] for l in range(spines, n) for s in range(spines)]
+
+
+def random_graph(n, rng, degree=4):
+    """A random spanning tree plus random links, up to `degree` on average."""
+    links = [[f"r{rng.randrange(i) + 1}", f"r{i + 1}"] for i in range(1, n)]
+    seen = {frozenset(l) for l in links}
+    target = min(n * degree // 2, n * (n - 1) // 2)
+
+    while len(links) < target:
+        a, b = rng.sample(range(1, n + 1), 2)
+        pair = frozenset((f"r{a}", f"r{b}"))
+        if pair not in seen:
+            seen.add(pair)
+            links.append([f"r{a}", f"r{b}"])
+    return links
+
+
+GENERATORS = {"ring": ring, "mesh": mesh, "leaf-spine": leaf_spine, "random": random_graph}
+
+
+def topology(kind, n, seed=0):
+    routers = [f"r{i + 1}" for i in range(n)]
+    return routers, GENERATORS[kind](n, random.Random(seed))
+
+
+# ======================================
+# Router Output Fixtures
+# ======================================
+
+def lldp_output(neighbors):
+    """`show lldp neighbors detail` as cEOS prints it, Management0 included."""
+    blocks = [
+        "Last table change time   : 0:12:03 ago\n"
+        "Number of table inserts  : 4\n"
+        "Number of table deletes  : 0\n"
+        "Number of table drops    : 0\n"
+        "Number of table age-outs : 0"
+    ]
+    for local_if, system, remote_if in [("Management0", "oob-sw", "Ethernet48")] + neighbors:
+        blocks.append(
+            f"Interface {local_if} detected 1 LLDP neighbors:\n\n"
+            f'  Neighbor 001c.7300.0001/"{remote_if}", age 12 seconds\n'
+            "  Discovered 0:12:03 ago; last changed 0:12:03 ago\n"
+            "  - Chassis ID type: MAC address (4)\n"
+            "    Chassis ID     : 001c.7300.0001\n"
+            "  - Port ID type: Interface name (5)\n"
+            f'    Port ID        : "{remote_if}"\n'
+            "  - Time To Live: 120 seconds\n"
+            f'  - Port Description: "{remote_if}"\n'
+            f'  - System Name: "{system}"\n'
+            "  - System Capabilities : Bridge, Router\n"
+            "    Enabled Capabilities: Router"
+        )
+    return "\n\n".join(blocks) + "\n"
+
+
+def interfaces_output(ifaces):
+    """`show interfaces | json` for a router with the given {interface: cidr}."""
+    interfaces = {
+        "Management0": {
+            "name": "Management0",
+            "interfaceAddress": [{"primaryIp": {"address": "172.20.20.11", "maskLen": 24}}],
+        },
+    }
+    for name, cidr in ifaces.items():
+        address, mask = cidr.split("/")
+        interfaces[name] = {
+            "name": name,
+            "lineProtocolStatus": "up",
+            "interfaceStatus": "connected",
+            "mtu": 1500,
+            "bandwidth": 1000000000,
+            "description": "",
+            "physicalAddress": "001c.7300.0001",
+            "interfaceAddress": [{
+                "primaryIp": {"address": address, "maskLen": int(mask)},
+                "secondaryIpsOrderedList": [],
+            }],
+            "interfaceCounters": {"inOctets": 123456, "outOctets": 654321, "linkStatusChanges": 2},
+        }
+    return json.dumps({"interfaces": interfaces})
+
+
+class CannedConnection:
+    """Stands in for a netmiko session: replays one command's output."""
+
+    def __init__(self, output):
+        self.output = output
+
+    def send_command(self, command, **kwargs):
+        return self.output
+
+
+# ======================================
+# Cases
+# ======================================
+
+def _farthest(graph, start):
+    seen = {start}
+    queue = deque([start])
+    node = start
+    while queue:
+        node = queue.popleft()
+        for neighbor in graph[node]:
+            if neighbor not in seen:
+                seen.add(neighbor)
+                queue.append(neighbor)
+    return node
+
+
+def cases(routers, links):
+    """
+    {case: (setup, fn)}: setup() builds the inputs outside the timing and
+    fn(inputs) is what is measured.
+    """
+    def graph_inputs():
+        return build_graph(expected_lldp_topology(routers, links))
+
+    def bfs_inputs():
+        graph = graph_inputs()
+        return graph, routers[0], _farthest(graph, routers[0])
+
+    def grt_inputs():
+        return graph_inputs(), generate_interface_map(routers, links)
+
+    payload = {"name": "bench", "mgmt_subnet": "172.20.0.0/16", "routers": routers, "links": links}
+
+    def lldp_inputs():
+        topology = expected_lldp_topology(routers, links)
+        return [lldp_output(topology[r]) for r in routers]
+
+    def ips_inputs():
+        interface_map = generate_interface_map(routers, links)
+        return [CannedConnection(interfaces_output(interface_map[r])) for r in routers]
+
+    return {
+        "build_graph": (
+            lambda: expected_lldp_topology(routers, links), build_graph,
+        ),
+        "bfs_shortest_path": (
+            bfs_inputs, lambda args: bfs_shortest_path(*args),
+        ),
+        # As deploys and the monitor build it: backups, no stored paths
+        "build_global_routing_table": (
+            grt_inputs,
+            lambda args: build_global_routing_table(*args, include_paths=False),
+        ),
+        "generate_interface_map": (
+            lambda: None, lambda _: generate_interface_map(routers, links),
+        ),
+        "build_containerlab_yaml": (
+            lambda: payload, lambda p: render_yaml(build_containerlab_yaml(p)[0]),
+        ),
+        # Whole lab: one parse per router
+        "parse_lldp_neighbors": (
+            lldp_inputs, lambda outputs: [parse_lldp_neighbors(o) for o in outputs],
+        ),
+        "_get_interface_ips": (
+            ips_inputs, lambda conns: [_get_interface_ips(c) for c in conns],
+        ),
+    }
+
+
+CASES = tuple(cases(["r1"], []))
+CASE_ALIASES = {"graph": "build_graph", "bfs": "bfs_shortest_path",
+                "grt": "build_global_routing_table", "addressing": "generate_interface_map",
+                "yaml": "build_containerlab_yaml", "lldp": "parse_lldp_neighbors",
+                "ips": "_get_interface_ips"}
+
+
+# ======================================
+# Measurement
+# ======================================
+
+def _time(fn, inputs, repeat):
+    """
+    Per-call seconds for up to `repeat` samples, each at least
+    MIN_SAMPLE_SECONDS long, within CASE_BUDGET_SECONDS.
+    """
+    started = time.perf_counter()
+    fn(inputs)
+    first = time.perf_counter() - started
+
+    number = max(1, int(MIN_SAMPLE_SECONDS / first)) if first > 0 else 1000
+    samples = [first] if number == 1 else []
+
+    while len(samples) < repeat and sum(samples) * number < CASE_BUDGET_SECONDS:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn(inputs)
+        samples.append((time.perf_counter() - started) / number)
+
+    return samples, number
+
+
+def _peak_memory(fn, inputs):
+    """Peak bytes allocated by one call, not counting its inputs."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = fn(inputs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak - baseline
+
+
+def _skip_reason(case, routers, links, max_links, max_routes):
+    if len(links) > max_links:
+        return f"{len(links)} links > --max-links {max_links}"
+    # The routing table holds one route per router and link prefix
+    if case == "build_global_routing_table" and len(routers) * len(links) > max_routes:
+        return f"{len(routers) * len(links)} routes > --max-routes {max_routes}"
+    return None
+
+
+def benchmark(topologies=TOPOLOGIES, sizes=DEFAULT_SIZES, selected=CASES, repeat=5,
+              memory=True, max_links=50_000, max_routes=5_000_000, seed=0, progress=None):
+    results = []
+
+    for kind in topologies:
+        for n in sizes:
+            routers, links = topology(kind, n, seed)
+            row = {"topology": kind, "routers": n, "links": len(links)}
+
+            for case, (setup, fn) in cases(routers, links).items():
+                if case not in selected:
+                    continue
+
+                skipped = _skip_reason(case, routers, links, max_links, max_routes)
+                if skipped:
+                    result = dict(row, case=case, skipped=skipped)
+                else:
+                    inputs = setup()
+                    samples, number = _time(fn, inputs, repeat)
+                    result = dict(
+                        row, case=case, calls=len(samples) * number,
+                        median_ms=round(statistics.median(samples) * 1000, 4),
+                        min_ms=round(min(samples) * 1000, 4),
+                        peak_kib=round(_peak_memory(fn, inputs) / 1024, 1) if memory else None,
+                    )
+
+                results.append(result)
+                if progress:
+                    progress(result)
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=REPO_ROOT,
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+# ======================================
+# Reporting
+# ======================================
+
+def _key(result):
+    return result["topology"], result["routers"], result["case"]
+
+
+def compare(report, baseline, threshold):
+    """
+    Cases measured in both reports with their time ratio (new / old),
+    slowest first, and the ones over `threshold`.
+    """
+    old = {_key(r): r for r in baseline["results"] if "median_ms" in r}
+    rows = []
+    for result in report["results"]:
+        before = old.get(_key(result))
+        if before is None or "median_ms" not in result or not before["median_ms"]:
+            continue
+        rows.append(dict(
+            topology=result["topology"], routers=result["routers"], case=result["case"],
+            old_ms=before["median_ms"], new_ms=result["median_ms"],
+            ratio=round(result["median_ms"] / before["median_ms"], 3),
+        ))
+    rows.sort(key=lambda r: r["ratio"], reverse=True)
+    return rows, [r for r in rows if r["ratio"] > threshold]
+
+
+def _format_result(r):
+    name = f"{r['topology']:<10} {r['routers']:>5} {r['case']:<27}"
+    if "skipped" in r:
+        return f"{name} skipped: {r['skipped']}"
+    memory = f"{r['peak_kib']:>11.1f} KiB" if r["peak_kib"] is not None else ""
+    return f"{name} {r['median_ms']:>11.3f} ms  (min {r['min_ms']:.3f}){memory}"
+
+
+def _parse_sizes(value):
+    return [int(size) for size in value.split(",")]
+
+
+def _parse_names(value, known, aliases=None):
+    names = [(aliases or {}).get(name, name) for name in value.split(",")]
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown: {', '.join(unknown)} (choose from {', '.join(known)})")
+    return names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--topologies", type=lambda v: _parse_names(v, TOPOLOGIES),
+                        default=list(TOPOLOGIES))
+    parser.add_argument("--sizes", type=_parse_sizes, default=list(DEFAULT_SIZES))
+    parser.add_argument("--cases", type=lambda v: _parse_names(v, CASES, CASE_ALIASES),
+                        default=list(CASES),
+                        help=f"Function names or {', '.join(CASE_ALIASES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0, help="Seed for random topologies")
+    parser.add_argument("--max-links", type=int, default=50_000)
+    parser.add_argument("--max-routes", type=int, default=5_000_000)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--json", dest="json_path", help="Also write results here")
+    parser.add_argument("--compare", help="Results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    if any(n < 2 for n in args.sizes):
+        parser.error("sizes must be at least 2")
+
+    print(f"{'topology':<10} {'size':>5} {'case':<27} {'median':>14}")
+    report = benchmark(
+        args.topologies, args.sizes, args.cases, args.repeat, not args.no_memory,
+        args.max_links, args.max_routes, args.seed,
+        progress=lambda r: print(_format_result(r), flush=True),
+    )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows, regressions = compare(report, baseline, args.threshold)
+
+    print(f"\ncompared with {baseline.get('commit') or args.compare}: {len(rows)} cases")
+    for r in rows[:10]:
+        print(f"  {r['ratio']:>6.2f}x  {r['topology']:<10} {r['routers']:>5} {r['case']:<27} "
+              f"{r['old_ms']:.3f} -> {r['new_ms']:.3f} ms")
+    if regressions:
+        print(f"⚠️ {len(regressions)} cases slower than {args.threshold}x")
+
+    # Non-zero exit if any case regressed past the threshold
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+API process startup benchmark.
+
+Each run is a fresh interpreter (as a uvicorn reload or worker spawn is)
+that imports backend.main and answers GET /health in-process:
+
+    python -m backend.bench_startup --runs 10
+    python -m backend.bench_startup --top 15 --json generated/bench_startup.json
+
+Reports median/min/max import and first-/health times, the heaviest
+top-level imports from -X importtime, and whether any device library
+(netmiko, paramiko, ...) was loaded, which should never happen until a
+router is contacted.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+DEVICE_MODULES = ("netmiko", "paramiko", "cryptography", "textfsm")
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import backend.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(backend.main.app)
+tested = time.perf_counter()
+status = client.get("/health").status_code
+answered = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "health_ms": (answered - tested) * 1000,
+    "status": status,
+    "device_modules": [m for m in {DEVICE_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run_probe(python, state_dir, importtime=False):
+    flags = ["-X", "importtime"] if importtime else []
+    result = subprocess.run(
+        [python, *flags, "-c", PROBE],
+        capture_output=True, text=True, cwd=REPO_ROOT,
+        # Keep the deploy cache the app opens at import out of generated/
+        env=dict(os.environ, SDN_STATE_DB=os.path.join(state_dir, "state.db")),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"probe failed: {result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def _top_imports(importtime_log, top):
+    """
+    Heaviest imports made directly by backend.main (cumulative time).
+
+    -X importtime lines look like "import time:  self |  cumulative | name"
+    with the name indented two spaces per nesting level, and a module is
+    printed after everything it imported.
+    """
+    children = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative), name.strip()))
+        elif depth == 0:
+            if name.strip() == "backend.main":
+                break
+            children = []
+
+    children.sort(reverse=True)
+    return [{"module": name, "ms": round(us / 1000, 1)} for us, name in children[:top]]
+
+
+def _stats(values):
+    return {
+        "median": round(statistics.median(values), 1),
+        "min": round(min(values), 1),
+        "max": round(max(values), 1),
+    }
+
+
+def benchmark(runs=5, top=10, python=sys.executable):
+    with tempfile.TemporaryDirectory() as state_dir:
+        samples = [_run_probe(python, state_dir)[0] for _ in range(runs)]
+        # Separate run: -X importtime itself slows the import down
+        _, log = _run_probe(python, state_dir, importtime=True)
+
+    return {
+        "runs": runs,
+        "import_ms": _stats([s["import_ms"] for s in samples]),
+        "health_ms": _stats([s["health_ms"] for s in samples]),
+        "health_status": samples[-1]["status"],
+        "device_modules_loaded": sorted({m for s in samples for m in s["device_modules"]}),
+        "top_imports": _top_imports(log, top),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", dest="json_path", help="Also write results here")
+    args = parser.parse_args(argv)
+
+    report = benchmark(args.runs, args.top)
+
+    print(f"backend.main import: {report['import_ms']['median']} ms median "
+          f"(min {report['import_ms']['min']}, max {report['import_ms']['max']}) "
+          f"over {report['runs']} runs")
+    print(f"first GET /health:   {report['health_ms']['median']} ms median "
+          f"-> {report['health_status']}")
+    print(f"device libraries loaded at startup: {report['device_modules_loaded'] or 'none'}")
+    print("heaviest imports:")
+    for row in report["top_imports"]:
+        print(f"  {row['ms']:>8.1f} ms  {row['module']}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    # Non-zero exit if startup regressed into loading device libraries
+    return 1 if report["device_modules_loaded"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+import json
+import os
+import threading
+import time
+
+
+CLAIM_SUFFIX = ".resuming"
+JOURNAL_SUFFIX = ".log"
+
+
+def checkpoint_path(directory, job_id):
+    return os.path.join(directory, f"{job_id}.json")
+
+
+def journal_path(path):
+    return path + JOURNAL_SUFFIX
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _rename(src, dst):
+    try:
+        os.rename(src, dst)
+    except FileNotFoundError:
+        pass
+
+
+class Checkpoint:
+    """
+    Durable progress record of one pipeline run, rewritten atomically after
+    every completed stage:
+
+        {
+            "job_id": "3f9a1c2b7d4e",
+            "kind": "deploy",
+            "lab": "sdn-lab",
+            "meta": {"request": {...}},
+            "status": "running" | "failed",
+            "stages": {"generate_topology": <artifact>, ...},
+            "routers": {"fabric_config": {"r1": <artifact>, ...}},
+        }
+
+    A completed router only appends one JSON line ({"stage", "router",
+    "artifact"}) to a journal next to the file, so saving stays
+    proportional to the record, not the run. The next full save folds the
+    journal in, and claim() replays it.
+
+    Artifacts are whatever the stage returned and must be JSON-serialisable.
+    A run that succeeds removes its checkpoint; a failed one keeps it so
+    the run can be resumed.
+    """
+
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, directory, job, **meta):
+        os.makedirs(directory, exist_ok=True)
+        checkpoint = cls(checkpoint_path(directory, job.id), {
+            "job_id": job.id,
+            "kind": job.kind,
+            "lab": job.lab,
+            "created_at": time.time(),
+            "meta": meta,
+            "status": "running",
+            "error": None,
+            "resumed_from": None,
+            "stages": {},
+            "routers": {},
+        })
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def claim(cls, directory, job_id):
+        """
+        Take a failed run's checkpoint for resuming. The file is renamed so
+        a concurrent resume of the same job fails with FileNotFoundError.
+        """
+        path = checkpoint_path(directory, job_id)
+        claimed = path + CLAIM_SUFFIX
+        os.rename(path, claimed)
+        _rename(journal_path(path), journal_path(claimed))
+
+        with open(claimed) as f:
+            checkpoint = cls(claimed, json.load(f))
+        checkpoint._replay()
+        return checkpoint
+
+    def _replay(self):
+        """
+        Fold the journal into the data and compact it into the file.
+        """
+        try:
+            with open(journal_path(self.path)) as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Torn last line from a crash mid-append
+                break
+            # Already folded into a stage artifact before a crash
+            if record["stage"] in self.data["stages"]:
+                continue
+            self.data["routers"].setdefault(record["stage"], {})[record["router"]] = (
+                record["artifact"]
+            )
+
+        self.save()
+
+    def unclaim(self):
+        if self.path.endswith(CLAIM_SUFFIX):
+            path = self.path[:-len(CLAIM_SUFFIX)]
+            os.rename(self.path, path)
+            _rename(journal_path(self.path), journal_path(path))
+            self.path = path
+
+    def rebind(self, job):
+        """
+        Continue this checkpoint under a new job, which now owns the file.
+        """
+        old_path = self.path
+        with self._lock:
+            self.path = checkpoint_path(os.path.dirname(old_path), job.id)
+            self.data.update(
+                job_id=job.id, status="running", error=None,
+                resumed_from=self.data["job_id"],
+            )
+        self.save()
+        os.remove(old_path)
+        _remove(journal_path(old_path))
+        return self
+
+    @property
+    def kind(self):
+        return self.data["kind"]
+
+    @property
+    def lab(self):
+        return self.data["lab"]
+
+    @property
+    def meta(self):
+        return self.data["meta"]
+
+    @property
+    def status(self):
+        return self.data["status"]
+
+    def save(self):
+        with self._lock:
+            blob = json.dumps(self.data)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                f.write(blob)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            # Everything journalled so far is in the file now
+            _remove(journal_path(self.path))
+
+    def stage_done(self, stage):
+        return stage in self.data["stages"]
+
+    def artifact(self, stage):
+        return self.data["stages"].get(stage)
+
+    def complete_stage(self, stage, artifact=None):
+        with self._lock:
+            self.data["stages"][stage] = artifact
+            # Per-router progress is subsumed by the stage artifact
+            self.data["routers"].pop(stage, None)
+        self.save()
+
+    def routers(self, stage):
+        with self._lock:
+            return dict(self.data["routers"].get(stage, {}))
+
+    def complete_router(self, stage, router, artifact=None):
+        record = json.dumps({"stage": stage, "router": router, "artifact": artifact})
+        with self._lock:
+            self.data["routers"].setdefault(stage, {})[router] = artifact
+            with open(journal_path(self.path), "a") as f:
+                f.write(record + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def fail(self, error):
+        with self._lock:
+            self.data["status"] = "failed"
+            self.data["error"] = error
+        self.save()
+
+    def finish(self):
+        _remove(self.path)
+        _remove(journal_path(self.path))
+
+    def summary(self):
+        with self._lock:
+            return {
+                "job_id": self.data["job_id"],
+                "status": self.data["status"],
+                "error": self.data["error"],
+                "resumed_from": self.data["resumed_from"],
+                "stages_done": list(self.data["stages"]),
+                "routers_done": {
+                    stage: sorted(routers)
+                    for stage, routers in self.data["routers"].items()
+                },
+            }
@@ -0,0 +1,87 @@
+import math
+import os
+
+from backend.verify import format_link
+
+
+FLAP_PENALTY = float(os.environ.get("SDN_FLAP_PENALTY", "1000"))
+FLAP_SUPPRESS = float(os.environ.get("SDN_FLAP_SUPPRESS", "2000"))
+FLAP_REUSE = float(os.environ.get("SDN_FLAP_REUSE", "750"))
+FLAP_HALF_LIFE = float(os.environ.get("SDN_FLAP_HALF_LIFE", "30"))
+FLAP_MAX_SUPPRESS = float(os.environ.get("SDN_FLAP_MAX_SUPPRESS", "300"))
+
+
+class FlapDamper:
+    """
+    Per-link flap damping with an exponentially decaying penalty, as BGP
+    route flap damping (RFC 2439) does for prefixes.
+
+    Every time a link goes down its penalty grows by `penalty`; the
+    penalty halves every `half_life` seconds. A link whose penalty
+    reaches `suppress` is held down, even while it is up, until the
+    penalty decays below `reuse`. The penalty is capped so no link stays
+    suppressed longer than `max_suppress` seconds after its last flap.
+
+    Times are time.monotonic() seconds passed in by the caller.
+    """
+
+    def __init__(self, penalty=FLAP_PENALTY, suppress=FLAP_SUPPRESS, reuse=FLAP_REUSE,
+                 half_life=FLAP_HALF_LIFE, max_suppress=FLAP_MAX_SUPPRESS):
+        if not 0 < reuse < suppress:
+            raise ValueError("Flap damping needs 0 < reuse < suppress")
+
+        self.penalty = penalty
+        self.suppress = suppress
+        self.reuse = reuse
+        self.half_life = half_life
+        self.max_penalty = max(suppress, reuse * 2 ** (max_suppress / half_life))
+        # link key -> [penalty, as of, suppressed]
+        self._links = {}
+
+    def _decay(self, key, now):
+        entry = self._links[key]
+        entry[0] *= 0.5 ** ((now - entry[1]) / self.half_life)
+        entry[1] = now
+
+        if entry[2] and entry[0] < self.reuse:
+            entry[2] = False
+        if not entry[2] and entry[0] < self.reuse / 2:
+            # Forgotten once it no longer matters, so state stays bounded
+            del self._links[key]
+            return None
+        return entry
+
+    def flap(self, key, now):
+        """Record that a link went down. Returns True if it is now suppressed."""
+        entry = self._links.get(key) and self._decay(key, now)
+        if entry is None:
+            entry = self._links[key] = [0.0, now, False]
+
+        entry[0] = min(entry[0] + self.penalty, self.max_penalty)
+        if entry[0] >= self.suppress:
+            entry[2] = True
+        return entry[2]
+
+    def _entries(self, now):
+        for key in sorted(self._links):
+            entry = self._decay(key, now)
+            if entry is not None:
+                yield key, entry
+
+    def suppressed(self, now):
+        """Set of link keys currently held down."""
+        return {key for key, entry in self._entries(now) if entry[2]}
+
+    def next_reuse(self, now):
+        """Seconds until the first suppressed link is released, or None."""
+        delays = [
+            self.half_life * math.log2(entry[0] / self.reuse)
+            for _, entry in self._entries(now) if entry[2]
+        ]
+        return max(0.0, min(delays)) if delays else None
+
+    def status(self, now):
+        return [
+            {"link": format_link(key), "penalty": round(entry[0]), "suppressed": entry[2]}
+            for key, entry in self._entries(now)
+        ]
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+
+from backend.install_routes import _safe_disconnect, router_route_commands
+from backend.jobs import Job
+from backend.pipeline import ROUTER_WORKERS
+from backend.transport import connect
+
+
+ROUTE_CONFIG_COMMAND = "show running-config | include ^ip route"
+
+
+def fingerprint(payload):
+    """
+    Canonical hash of what a deploy builds: routers, links as an unordered
+    multiset, image, addressing and how the config is applied. Router
+    order, link order and link direction don't change the fingerprint;
+    duplicate links do.
+    """
+    canonical = {
+        "routers": sorted(payload["routers"]),
+        "links": sorted(sorted(link) for link in payload["links"]),
+        "ceos_image": payload["ceos_image"],
+        "mgmt_subnet": payload["mgmt_subnet"],
+        "p2p_pool": payload["p2p_pool"],
+        "p2p_prefixlen": payload["p2p_prefixlen"],
+        "config_mode": payload["config_mode"],
+    }
+    blob = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def route_checksum(lines):
+    """
+    Order-independent checksum of a router's static route lines.
+    """
+    normalized = sorted({" ".join(line.split()) for line in lines if line.strip()})
+    return hashlib.sha256("\n".join(normalized).encode()).hexdigest()
+
+
+def expected_route_checksums(lldp_topology, ip_map, grt):
+    """
+    {router: checksum} of the `ip route` lines install_routes pushes,
+    floating backup routes included.
+    """
+    return {
+        router: route_checksum(
+            router_route_commands(router, lldp_topology, ip_map, grt)[0]
+        )
+        for router in grt
+    }
+
+
+def device_route_checksum(router, mgmt_ip, job=None):
+    """
+    Checksum of the static routes currently configured on a router.
+    """
+    job = job or Job.detached()
+
+    device = {
+        "device_type": "arista_eos",
+        "host": mgmt_ip,
+        "username": "admin",
+        "password": "admin",
+        "ssh_strict": False,
+    }
+
+    conn = connect(device, router, tracer=job.tracer)
+    try:
+        output = conn.send_command(ROUTE_CONFIG_COMMAND)
+    finally:
+        _safe_disconnect(conn, router)
+
+    return route_checksum(
+        line for line in output.splitlines() if line.strip().startswith("ip route")
+    )
+
+
+def verify_lab(mgmt_ips, expected_checksums, job=None, workers=ROUTER_WORKERS):
+    """
+    Check, on up to `workers` routers at a time, that every router answers
+    over SSH and still carries the routes it was deployed with.
+
+    Returns a list of problems in mgmt_ips order, empty when the lab
+    matches:
+        [{"router": "r2", "problem": "unreachable", "detail": "..."}, ...]
+    """
+    job = job or Job.detached()
+    parent = job.tracer.current()
+    found = {}
+
+    def check(router, mgmt_ip):
+        with job.router_step(router, "verify_cached", parent=parent):
+            try:
+                checksum = device_route_checksum(router, mgmt_ip, job)
+            except Exception as e:
+                return {"router": router, "problem": "unreachable", "detail": str(e)}
+
+        if checksum != expected_checksums.get(router):
+            return {"router": router, "problem": "routes_changed"}
+        return None
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(mgmt_ips))),
+        thread_name_prefix="router",
+    ) as pool:
+        futures = {
+            pool.submit(check, router, mgmt_ip): router
+            for router, mgmt_ip in mgmt_ips.items()
+        }
+        for future in as_completed(futures):
+            found[futures[future]] = future.result()
+
+    return [found[router] for router in mgmt_ips if found[router]]
+
+
+class DeployCache:
+    """
+    SQLite record of the last successful deploy per lab: its fingerprint,
+    the discovered state needed to rebuild routing queries, and the
+    per-router route checksums used to verify the running lab.
+    """
+
+    _JSON_FIELDS = ("mgmt_ips", "lldp_topology", "ip_map", "route_checksums", "result")
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with closing(self._connect()) as db, db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS deploys (
+                    lab TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    mgmt_subnet TEXT NOT NULL,
+                    mgmt_ips TEXT NOT NULL,
+                    lldp_topology TEXT NOT NULL,
+                    ip_map TEXT NOT NULL,
+                    route_checksums TEXT NOT NULL,
+                    result TEXT NOT NULL
+                )
+                """
+            )
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS verified_intents (
+                    fingerprint TEXT PRIMARY KEY,
+                    verified_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get(self, lab):
+        with self._lock, closing(self._connect()) as db:
+            row = db.execute("SELECT * FROM deploys WHERE lab = ?", (lab,)).fetchone()
+
+        if row is None:
+            return None
+
+        entry = dict(row)
+        for field in self._JSON_FIELDS:
+            entry[field] = json.loads(entry[field])
+        return entry
+
+    def put(self, lab, fingerprint, mgmt_subnet, mgmt_ips, lldp_topology,
+            ip_map, route_checksums, result):
+        values = (
+            lab, fingerprint, time.time(), mgmt_subnet,
+            json.dumps(mgmt_ips), json.dumps(lldp_topology), json.dumps(ip_map),
+            json.dumps(route_checksums), json.dumps(result),
+        )
+        with self._lock, closing(self._connect()) as db, db:
+            db.execute(
+                "INSERT OR REPLACE INTO deploys VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+
+    def mark_intent_verified(self, fingerprint):
+        """
+        Record that a deploy of this fingerprint came up exactly as intended
+        (cabling and addresses), so later deploys can route from intent.
+        """
+        with self._lock, closing(self._connect()) as db, db:
+            db.execute(
+                "INSERT OR REPLACE INTO verified_intents VALUES (?, ?)",
+                (fingerprint, time.time()),
+            )
+
+    def intent_verified(self, fingerprint):
+        with self._lock, closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT 1 FROM verified_intents WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+        return row is not None
+
+    def delete(self, lab):
+        with self._lock, closing(self._connect()) as db, db:
+            db.execute("DELETE FROM deploys WHERE lab = ?", (lab,))
@@ -0,0 +1,86 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+
+
+EVENT_HISTORY = 1000
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class Subscription:
+    """
+    One consumer of an EventStream, bound to the asyncio loop that reads it.
+
+    The queue is bounded; when a slow reader falls behind the oldest event
+    is dropped so producers never wait on consumers.
+    """
+
+    def __init__(self, loop, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def _put(self, event):
+        # Runs on the subscriber's event loop
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    def offer(self, event):
+        """Hand an event over from any thread without blocking."""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+
+class EventStream:
+    """
+    Thread-safe fan-out of structured events to asyncio subscribers.
+
+    Worker threads call publish(); API handlers subscribe() and await
+    events from the subscription queue. A bounded history lets late
+    subscribers replay what they missed.
+    """
+
+    def __init__(self, history=EVENT_HISTORY):
+        self._history = deque(maxlen=history)
+        self._subscribers = []
+        self._seq = itertools.count(1)
+        self.last_seq = 0
+        self._lock = threading.Lock()
+
+    def publish(self, type, **data):
+        event = {"type": type, "ts": time.time(), **data}
+
+        with self._lock:
+            event["seq"] = self.last_seq = next(self._seq)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+
+        for sub in subscribers:
+            try:
+                sub.offer(event)
+            except RuntimeError:
+                # Subscriber's loop has closed
+                self.unsubscribe(sub)
+
+        return event
+
+    def subscribe(self, loop, after_seq=0):
+        """
+        Register a subscriber and return (subscription, backlog), where
+        backlog holds the retained events with seq > after_seq.
+        """
+        sub = Subscription(loop)
+
+        with self._lock:
+            backlog = [e for e in self._history if e["seq"] > after_seq]
+            self._subscribers.append(sub)
+
+        return sub, backlog
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
@@ -0,0 +1,75 @@
+import json
+import zlib
+
+
+EXPORT_FORMATS = ("ndjson", "columnar")
+FLUSH_BYTES = 64 * 1024
+
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def route_records(state, router=None):
+    """
+    One route per record: {"router", "prefix", "next_router", "next_hop",
+    "cost", "backup_next_hop"}.
+    """
+    return state.iter_routes(router)
+
+
+def columnar_records(state, router=None):
+    """
+    One record per router with the routes as parallel columns, which is
+    much smaller than repeating field names per route:
+        {"router": "r1", "prefix": [...], "next_router": [...], "next_hop": [...],
+         "cost": [...], "backup_next_hop": [...]}
+    """
+    routers = [router] if router is not None else sorted(state.by_router)
+    for name in routers:
+        yield state.router_columns(name)
+
+
+def topology_records(state):
+    """
+    One record per router: its interface addresses and LLDP neighbors.
+    """
+    for router in sorted(state.lldp_topology):
+        yield {
+            "router": router,
+            "interfaces": state.ip_map.get(router, {}),
+            "neighbors": state.neighbors(router),
+        }
+
+
+def ndjson_chunks(records, flush_bytes=FLUSH_BYTES):
+    """
+    Encode records as newline-delimited JSON, batched into chunks of about
+    flush_bytes so only one chunk is held in memory at a time.
+    """
+    buffer = []
+    size = 0
+
+    for record in records:
+        line = _encode(record) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= flush_bytes:
+            yield "".join(buffer).encode()
+            buffer = []
+            size = 0
+
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def gzip_chunks(chunks, level=6):
+    """
+    Gzip a stream of byte chunks incrementally.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+
+    yield compressor.flush()
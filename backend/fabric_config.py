@@ -1,36 +1,56 @@
-from netmiko import ConnectHandler
+from backend.install_routes import _safe_disconnect
+from backend.jobs import Job
+from backend.transport import connect
 
-def configure_fabric(router_mgmt_ips, interfaces):
 
-    for router, host in router_mgmt_ips.items():
+ADMIN_USER_COMMAND = "username admin privilege 15 role network-admin secret admin"
 
-        device = {
-            "device_type": "arista_eos",
-            "host": host,
-            "username": "admin",
-            "password": "admin",
-            "secret": "admin",
-            "fast_cli": False,
-            "global_delay_factor": 2,
-        }
 
-        conn = ConnectHandler(**device)
-        conn.enable()
+def fabric_commands(interfaces):
+    """
+    Interface configuration for one router.
 
-        conn.send_config_set([
-            "username admin privilege 15 role network-admin secret admin"
+    interfaces: {"Ethernet1": "10.0.0.1/30", ...}
+    """
+    cfg = []
+    for iface, ip in interfaces.items():
+        cfg.extend([
+            f"interface {iface}",
+            "no switchport",
+            f"ip address {ip}",
+            "no shutdown"
         ])
+    return cfg
 
-        cfg = []
-        for iface, ip in interfaces.get(router, {}).items():
-            cfg.extend([
-                f"interface {iface}",
-                "no switchport",
-                f"ip address {ip}",
-                "no shutdown"
-            ])
+
+def configure_router(router, host, interfaces, job=None):
+    """
+    Push interface addressing to one router.
+
+    interfaces: {"Ethernet1": "10.0.0.1/30", ...}
+    """
+    job = job or Job.detached()
+
+    device = {
+        "device_type": "arista_eos",
+        "host": host,
+        "username": "admin",
+        "password": "admin",
+        "secret": "admin",
+        "fast_cli": False,
+        "global_delay_factor": 2,
+    }
+
+    conn = connect(device, router, tracer=job.tracer)
+    job.emit("router_connect", router=router, stage="fabric_config")
+
+    try:
+        conn.send_config_set([ADMIN_USER_COMMAND])
+
+        cfg = fabric_commands(interfaces)
 
         if cfg:
             conn.send_config_set(cfg)
-
-        conn.disconnect()
+            job.emit("commands_sent", router=router, count=len(cfg))
+    finally:
+        _safe_disconnect(conn, router)
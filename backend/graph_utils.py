@@ -1,5 +1,6 @@
 import ipaddress
 from collections import deque
+from functools import lru_cache
 
 
 def build_graph(lldp_topology):
@@ -23,11 +24,13 @@ def build_graph(lldp_topology):
     graph = {}
 
     for router, neighbors in lldp_topology.items():
-        graph.setdefault(router, [])
+        adjacent = graph.setdefault(router, [])
+        seen = set(adjacent)
 
         for local_if, neighbor, remote_if in neighbors:
-            if neighbor not in graph[router]:
-                graph[router].append(neighbor)
+            if neighbor not in seen:
+                seen.add(neighbor)
+                adjacent.append(neighbor)
 
     return graph
 
@@ -64,6 +67,157 @@ def bfs_shortest_path(graph, start, goal):
     return None
 
 
+def bfs_tree(graph, start):
+    """
+    Single-source BFS.
+
+    Returns:
+        parent: {node: predecessor on a shortest path from start}
+        dist:   {node: hop count from start}
+    Nodes unreachable from start are absent from both.
+
+    Neighbors are visited in adjacency-list order, so the tree contains
+    the same paths bfs_shortest_path returns.
+    """
+    parent = {start: None}
+    dist = {start: 0}
+    frontier = [start]
+    depth = 0
+
+    # Level-synchronous BFS: same visit order as a FIFO queue, fewer calls
+    while frontier:
+        depth += 1
+        next_frontier = []
+
+        for node in frontier:
+            for neighbor in graph.get(node, ()):
+                if neighbor not in dist:
+                    dist[neighbor] = depth
+                    parent[neighbor] = node
+                    next_frontier.append(neighbor)
+
+        frontier = next_frontier
+
+    return parent, dist
+
+
+def path_from_tree(parent, goal):
+    """
+    Walk a bfs_tree parent map back from goal. Returns None if unreachable.
+    """
+    if goal not in parent:
+        return None
+
+    path = []
+    node = goal
+    while node is not None:
+        path.append(node)
+        node = parent[node]
+    path.reverse()
+    return path
+
+
+def distance_cache(graph):
+    """
+    Memoised hop counts from any node: dist_of(node) -> bfs_tree dist map.
+    Each node's BFS runs at most once however many tables ask for it.
+    """
+    @lru_cache(maxsize=None)
+    def dist_of(node):
+        return bfs_tree(graph, node)[1]
+
+    return dist_of
+
+
+def neighbor_order(graph, src, dist_of):
+    """
+    src's neighbors ranked by distance to each destination, for
+    loop_free_alternate(): order(dst) -> [(hops from neighbor to dst,
+    neighbor position, neighbor), ...], nearest first, unreachable
+    neighbors left out. Each destination is ranked once per source and
+    shared by every prefix attached to it.
+    """
+    neighbors = [
+        (position, neighbor, dist_of(neighbor))
+        for position, neighbor in enumerate(graph.get(src, ()))
+    ]
+
+    @lru_cache(maxsize=None)
+    def order(dst):
+        return sorted(
+            (dist[dst], position, neighbor)
+            for position, neighbor, dist in neighbors
+            if dst in dist
+        )
+
+    return order
+
+
+def loop_free_alternate(graph, src, primary, owners, cost, dist_of, order=None):
+    """
+    Backup next hop from src toward a prefix that does not send traffic
+    back through src (RFC 5286: dist(N, D) < dist(N, src) + dist(src, D)).
+
+    owners: routers the prefix is attached to (both ends of a point-to-
+    point link). Distances to the prefix are the minimum over its owners,
+    so a neighbor nearer the far end than the end src routes to still
+    qualifies.
+    order: neighbor_order(graph, src, dist_of), if the caller already has
+    it.
+
+    Node-protecting alternates, which also avoid the primary next hop
+    router, are preferred, then the shortest. Returns (neighbor, cost via
+    neighbor) or None when no neighbor qualifies.
+    """
+    order = order or neighbor_order(graph, src, dist_of)
+    primary_to_dst = cost - 1
+    best = None
+
+    # A neighbor's distance to the prefix is its distance to the nearest
+    # owner, so the best alternate is the best over the owners taken one
+    # at a time
+    for owner in owners:
+        if owner == src:
+            continue
+
+        candidate = fallback = None
+        for to_dst, position, neighbor in order(owner):
+            # Every neighbor is one hop from src
+            if to_dst >= 1 + cost:
+                break
+            if neighbor == primary:
+                continue
+
+            to_primary = dist_of(neighbor).get(primary)
+            if to_primary is not None and to_dst < to_primary + primary_to_dst:
+                candidate = (False, to_dst, position, neighbor)
+                break
+            if fallback is None:
+                fallback = (True, to_dst, position, neighbor)
+
+        candidate = candidate or fallback
+        if candidate is not None and (best is None or candidate < best):
+            best = candidate
+
+    return (best[3], 1 + best[1]) if best else None
+
+
+def first_hops(parent, start):
+    """
+    Next hop from start toward every reachable node, in one pass over the
+    BFS tree: {node: neighbor of start on the path to node}.
+    """
+    hops = {}
+
+    # parent maps are filled in BFS order, so a node's parent is resolved first
+    for node, pred in parent.items():
+        if pred is None:
+            continue
+        hops[node] = node if pred == start else hops[pred]
+
+    return hops
+
+
 def _router_subnets(router, ip_map):
     """
     Return all subnet prefixes (as strings) attached to a router.
@@ -79,19 +233,103 @@ def _router_subnets(router, ip_map):
     return nets
 
 
-def build_global_routing_table(graph, ip_map):
+def build_router_table(graph, src, subnets, include_paths=True, dist_of=None,
+                       tree=None, owners=None):
+    """
+    Routing table for a single source router from one BFS.
+
+    subnets: {router: [prefix, ...]} as produced by router_subnet_index().
+    dist_of: distance_cache(graph) to also give every entry a loop-free
+        alternate ("backup" next hop and "backup_cost", None if there is
+        none). Neighbors' distances come from the same cache.
+    tree: bfs_tree(graph, src) if the caller already has it.
+    owners: prefix_owners(subnets), if the caller already has it.
+
+    Without backups, the prefixes of one destination share a single entry
+    dict (as they share the path list); entries are read-only.
+    """
+    parent, dist = tree or bfs_tree(graph, src)
+    hops = first_hops(parent, src)
+    table = {}
+    if dist_of is not None:
+        order = neighbor_order(graph, src, dist_of)
+        if owners is None:
+            owners = prefix_owners(subnets)
+
+    # dist is in BFS order, so nearer routers are visited first
+    for dst, cost in dist.items():
+        prefixes = subnets.get(dst)
+        if dst == src or not prefixes:
+            continue
+
+        hop = hops[dst]
+        shared = {"next_hop": hop, "cost": cost}
+        if include_paths:
+            shared["path"] = path_from_tree(parent, dst)
+
+        # Add a route entry for every subnet directly attached to dst
+        for prefix in prefixes:
+            # Only record if we don't already have a shorter/equal path
+            # (both ends of a link share its subnet — the nearer end wins)
+            if prefix in table:
+                continue
+            if dist_of is None:
+                table[prefix] = shared
+                continue
+
+            backup = loop_free_alternate(
+                graph, src, hop, owners[prefix], cost, dist_of, order
+            )
+            entry = dict(shared)
+            entry["backup"], entry["backup_cost"] = backup or (None, None)
+            table[prefix] = entry
+
+    return table
+
+
+def router_subnet_index(graph, ip_map):
+    """
+    {router: sorted list of attached subnet prefixes} for every graph node.
+    """
+    return {router: sorted(_router_subnets(router, ip_map)) for router in graph}
+
+
+def prefix_owners(subnets):
+    """
+    {prefix: [router, ...]} from router_subnet_index() output: the routers
+    a prefix is attached to.
+    """
+    owners = {}
+    for router, prefixes in subnets.items():
+        for prefix in prefixes:
+            owners.setdefault(prefix, []).append(router)
+    return owners
+
+
+def build_global_routing_table(graph, ip_map, include_paths=True, backups=True):
     """
     Build Global Routing Table (GRT) keyed by destination subnet prefix.
 
-    For each source router, compute the shortest path to every other router,
-    then record a route entry for each subnet attached to that destination router.
+    For each source router, run one BFS to get the shortest path to every
+    other router, then record a route entry for each subnet attached to
+    that destination router.
+
+    With include_paths=False the "path" lists are omitted, which keeps
+    memory linear in the number of routes on large fabrics.
+
+    With backups=True every entry also gets a loop-free alternate
+    ("backup", "backup_cost"). The per-router BFS distances are kept and
+    reused for that, so memory is quadratic in the router count.
 
     Output:
         {
             "r1": {
                 "10.0.2.0/30": {
                     "path": ["r1", "r2", "r3"],
-                    "cost": 2
+                    "next_hop": "r2",
+                    "cost": 2,
+                    "backup": "r4",
+                    "backup_cost": 3
                 },
                 ...
             },
@@ -99,28 +337,94 @@ def build_global_routing_table(graph, ip_map):
         }
     """
 
-    grt = {}
+    subnets = router_subnet_index(graph, ip_map)
+    dist_of = distance_cache(graph) if backups else None
+    owners = prefix_owners(subnets) if backups else None
 
-    for src in graph:
-        grt[src] = {}
+    return {
+        src: build_router_table(graph, src, subnets, include_paths, dist_of,
+                                owners=owners)
+        for src in graph
+    }
 
-        for dst in graph:
-            if src == dst:
-                continue
 
-            path = bfs_shortest_path(graph, src, dst)
+def _edges(graph):
+    return {(u, v) for u, neighbors in graph.items() for v in neighbors}
 
-            if not path:
-                continue
 
-            # Add a route entry for every subnet directly attached to dst
-            for prefix in _router_subnets(dst, ip_map):
-                # Only record if we don't already have a shorter/equal path
-                # (multiple routers could share a subnet in theory — take first found)
-                if prefix not in grt[src]:
-                    grt[src][prefix] = {
-                        "path": path,
-                        "cost": len(path) - 1,
-                    }
-
-    return grt
+def update_spf(old_graph, new_graph, trees):
+    """
+    Bring per-source BFS trees ({src: bfs_tree(old_graph, src)}, updated in
+    place) up to date with new_graph, re-running BFS only where a link
+    change can alter the tree:
+
+    - a removed link that is a tree edge of src;
+    - an added link between nodes at different distances from src (links
+      within one BFS level are never tree edges);
+    - a reachable node whose remaining neighbors changed order (e.g. one
+      of two parallel links went away), since BFS breaks ties by order.
+
+    Returns the set of sources whose tree was recomputed.
+    """
+    old_edges = _edges(old_graph)
+    new_edges = _edges(new_graph)
+    removed = old_edges - new_edges
+    added = new_edges - old_edges
+
+    reordered = {
+        u for u in new_graph.keys() & old_graph.keys()
+        if [v for v in old_graph[u] if (u, v) in new_edges]
+        != [v for v in new_graph[u] if (u, v) in old_edges]
+    }
+
+    affected = set()
+    for src in new_graph:
+        if src not in trees:
+            affected.add(src)
+            continue
+
+        parent, dist = trees[src]
+        if (
+            any(parent.get(v) == u for u, v in removed)
+            or any(dist.get(u) != dist.get(v) for u, v in added)
+            or any(u in dist for u in reordered)
+        ):
+            affected.add(src)
+
+    for src in affected:
+        trees[src] = bfs_tree(new_graph, src)
+    for src in set(trees) - set(new_graph):
+        del trees[src]
+
+    return affected
+
+
+def update_global_routing_table(old_graph, new_graph, ip_map, grt, trees):
+    """
+    Incremental build_global_routing_table() after a link change: only
+    routers whose own tree changed, or one of whose neighbors' trees
+    changed (their loop-free alternates depend on it), get a new table.
+
+    trees: {src: bfs_tree(old_graph, src)}, updated in place.
+
+    Returns (new grt, set of routers whose table was rebuilt).
+    """
+    affected = update_spf(old_graph, new_graph, trees)
+    rebuild = set(affected)
+    for src in affected:
+        rebuild.update(new_graph.get(src, ()))
+        rebuild.update(old_graph.get(src, ()))
+    rebuild &= set(new_graph)
+
+    subnets = router_subnet_index(new_graph, ip_map)
+    owners = prefix_owners(subnets)
+    dist_of = lambda node: trees[node][1]
+
+    new_grt = {src: table for src, table in grt.items() if src in new_graph}
+    for src in rebuild:
+        new_grt[src] = build_router_table(
+            new_graph, src, subnets, include_paths=False, dist_of=dist_of,
+            tree=trees[src], owners=owners,
+        )
+
+    return new_grt, rebuild
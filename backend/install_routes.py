@@ -1,5 +1,14 @@
 import ipaddress
-from netmiko import ConnectHandler
+import time
+
+from backend.jobs import Job
+from backend.metrics import ROUTE_PUSH_RATE, ROUTES_PUSHED
+from backend.transport import connect
+
+
+# Floating statics for loop-free alternates: only used once the primary's
+# next hop is unreachable (EOS static routes default to distance 1)
+BACKUP_DISTANCE = 250
 
 
 def _safe_disconnect(conn, router):
@@ -38,88 +47,191 @@ def _directly_connected_networks(router, ip_map):
     return nets
 
 
-def _find_next_hop_ip(curr_router, next_router, lldp_topology, ip_map):
+def _next_hop_ips(curr_router, lldp_topology, ip_map):
     """
-    Uses LLDP tuples from curr_router to locate the neighbor interface on next_router,
-    then reads that interface IP from ip_map[next_router][neighbor_if] and returns just the IP.
+    Uses LLDP tuples from curr_router to locate the neighbor interface on each
+    next router, then reads that interface IP from ip_map[next_router][neighbor_if].
+
+    Returns {next_router: "10.0.2.1"} (None when the neighbor interface has no IP).
+    The first LLDP entry per neighbor wins.
     """
+    hops = {}
     # lldp_topology[curr] = [(local_if, neighbor_router, neighbor_if), ...]
     for local_if, nbr, nbr_if in lldp_topology.get(curr_router, []):
-        if nbr == next_router:
-            ip_cidr = ip_map.get(next_router, {}).get(nbr_if)
-            if not ip_cidr:
-                return None
-            # "10.0.2.1/30" -> "10.0.2.1"
-            return ip_cidr.split("/")[0]
-    return None
-
-
-def install_routes(router_mgmt_ips, lldp_topology, ip_map, global_route_table,
-                   username="admin", password="admin"):
-    """
-    global_route_table schema assumed:
-      grt[router][prefix] = {"path": ["rX","rY",...], "cost": <int>}
-    where prefix is like "10.0.1.0/30" (network string).
-
-    Installs routes on each router:
-      ip route <prefix> <next_hop_ip>
-    """
-    for router, mgmt_ip in router_mgmt_ips.items():
-        print("\n====================================")
-        print(f"Installing routes on {router}")
-        print("====================================")
-
-        connected_nets = _directly_connected_networks(router, ip_map)
-
-        device = {
-            "device_type": "arista_eos",
-            "host": mgmt_ip,
-            "username": username,
-            "password": password,
-            "secret": password,
-            "fast_cli": False,
-            "global_delay_factor": 2,
-        }
-
-        conn = ConnectHandler(**device)
-        conn.enable()
-
-        routes_for_router = global_route_table.get(router, {})
-
-        for prefix, info in routes_for_router.items():
-            # Skip directly connected networks
-            if prefix in connected_nets:
-                continue
+        if nbr in hops:
+            continue
+        ip_cidr = ip_map.get(nbr, {}).get(nbr_if)
+        # "10.0.2.1/30" -> "10.0.2.1"
+        hops[nbr] = ip_cidr.split("/")[0] if ip_cidr else None
+    return hops
 
-            path = info.get("path") or []
-            if len(path) < 2:
-                continue
 
-            next_router = path[1]
+def _route_targets(router, ip_map, global_route_table):
+    """
+    (prefix, GRT entry, next router) for every GRT entry of router that
+    becomes a static route.
+    """
+    connected_nets = _directly_connected_networks(router, ip_map)
+
+    for prefix, info in global_route_table.get(router, {}).items():
+        # Skip directly connected networks
+        if prefix in connected_nets:
+            continue
 
-            # Safety: don't install nonsensical routes
-            if next_router == router:
+        next_router = info.get("next_hop")
+        if not next_router:
+            path = info.get("path")
+            next_router = path[1] if path and len(path) > 1 else None
+            if next_router is None:
                 continue
 
-            next_hop_ip = _find_next_hop_ip(router, next_router, lldp_topology, ip_map)
+        # Safety: don't install nonsensical routes
+        if next_router == router:
+            continue
+
+        yield prefix, info, next_router
+
+
+def plan_router_routes(router, lldp_topology, ip_map, global_route_table):
+    """
+    Work out the static routes for one router without touching the device.
+
+    Returns:
+        [
+            {
+                "prefix": "10.0.2.0/30",
+                "next_router": "r2",
+                "next_hop": "10.0.0.2",
+                "path": ["r1", "r2", "r3"],
+                "command": "ip route 10.0.2.0/30 10.0.0.2",
+                "backup_next_router": "r4",
+                "backup_next_hop": "10.0.0.6",
+                "backup_command": "ip route 10.0.2.0/30 10.0.0.6 250",
+            },
+            ...
+        ]
+    next_hop and command are None when LLDP/IP data has no address for the
+    hop; the backup_* fields are None when the GRT entry has no loop-free
+    alternate (or no address for it).
+    """
+    next_hops = _next_hop_ips(router, lldp_topology, ip_map)
+    routes = []
+
+    for prefix, info, next_router in _route_targets(router, ip_map, global_route_table):
+        path = info.get("path")
+        next_hop_ip = next_hops.get(next_router)
+        backup_router = info.get("backup")
+        backup_ip = next_hops.get(backup_router) if backup_router else None
+
+        routes.append({
+            "prefix": prefix,
+            "next_router": next_router,
+            "next_hop": next_hop_ip,
+            "path": path,
+            "command": f"ip route {prefix} {next_hop_ip}" if next_hop_ip else None,
+            "backup_next_router": backup_router,
+            "backup_next_hop": backup_ip,
+            "backup_command": (
+                f"ip route {prefix} {backup_ip} {BACKUP_DISTANCE}" if backup_ip else None
+            ),
+        })
+
+    return routes
+
+
+def router_route_commands(router, lldp_topology, ip_map, global_route_table):
+    """
+    The `ip route` lines of plan_router_routes() (each route, then its
+    floating backup), rendered in one pass without the per-route records.
+
+    Returns (commands, unresolved), where unresolved is
+    [(prefix, next_router), ...] for routes with no next-hop address.
+    """
+    next_hops = _next_hop_ips(router, lldp_topology, ip_map)
+    # Render each neighbor's end of the line once, not once per route
+    primary = {nbr: f" {ip}" for nbr, ip in next_hops.items() if ip}
+    backup = {nbr: f" {ip} {BACKUP_DISTANCE}" for nbr, ip in next_hops.items() if ip}
+    commands = []
+    unresolved = []
+
+    for prefix, info, next_router in _route_targets(router, ip_map, global_route_table):
+        head = "ip route " + prefix
+        tail = primary.get(next_router)
+        if tail is None:
+            unresolved.append((prefix, next_router))
+        else:
+            commands.append(head + tail)
+
+        backup_router = info.get("backup")
+        if backup_router in backup:
+            commands.append(head + backup[backup_router])
+
+    return commands, unresolved
+
+
+def install_router_routes(router, mgmt_ip, lldp_topology, ip_map,
+                          global_route_table, username="admin",
+                          password="admin", job=None):
+    """
+    Install the GRT routes for a single router.
+
+    Returns the number of routes pushed.
+    """
+    job = job or Job.detached()
+    started = time.perf_counter()
+    installed = 0
+
+    print("\n====================================")
+    print(f"Installing routes on {router}")
+    print("====================================")
+
+    routes = plan_router_routes(router, lldp_topology, ip_map, global_route_table)
+
+    device = {
+        "device_type": "arista_eos",
+        "host": mgmt_ip,
+        "username": username,
+        "password": password,
+        "secret": password,
+        "fast_cli": False,
+        "global_delay_factor": 2,
+    }
+
+    conn = connect(device, router, tracer=job.tracer)
+    job.emit("router_connect", router=router, stage="install_routes")
+
+    try:
+        for route in routes:
+            prefix = route["prefix"]
+            next_router = route["next_router"]
+            next_hop_ip = route["next_hop"]
 
             print("\n----------------------------------")
             print("CURRENT ROUTER:", router)
             print("DEST PREFIX:", prefix)
-            print("PATH:", path)
+            print("PATH:", route["path"])
             print("NEXT ROUTER:", next_router)
             print("NEXT HOP IP:", next_hop_ip)
+            print("BACKUP NEXT HOP IP:", route["backup_next_hop"])
 
             if not next_hop_ip:
                 print("❌ No next-hop found (LLDP/IP mismatch). Skipping.")
+                job.add_error(f"No next-hop for {prefix} via {next_router}",
+                              router=router)
                 continue
 
-            cmd = f"ip route {prefix} {next_hop_ip}"
-            print("Sending:", cmd)
+            cmds = [route["command"]]
+            if route["backup_command"]:
+                cmds.append(route["backup_command"])
+            print("Sending:", cmds)
 
-            out = conn.send_config_set([cmd], read_timeout=30)
+            out = conn.send_config_set(cmds, read_timeout=30)
             print("Device response:")
             print(out)
+            installed += 1
+            ROUTES_PUSHED.labels(router).inc()
+            job.emit("route_installed", router=router, prefix=prefix,
+                     next_hop=next_hop_ip, backup=route["backup_next_hop"])
 
         # Save config: use send_command directly instead of save_config() to avoid
         # Netmiko hanging on cEOS waiting for a prompt that never arrives.
@@ -129,8 +241,53 @@ def install_routes(router_mgmt_ips, lldp_topology, ip_map, global_route_table,
         except Exception as e:
             # cEOS persists running-config automatically; a save failure is non-fatal.
             print(f"Warning: write memory failed (non-fatal): {e}")
-
+    finally:
         # Force-close SSH connection instead of conn.disconnect() which hangs on cEOS
         print("Disconnecting...")
         _safe_disconnect(conn, router)
         print(f"Disconnected from {router}.")
+
+    ROUTE_PUSH_RATE.labels(router).set(installed / (time.perf_counter() - started))
+
+    return installed
+
+
+def apply_route_changes(router, mgmt_ip, commands, username="admin",
+                        password="admin", job=None):
+    """
+    Push one router's share of a route update wave as a single config
+    session. commands come from route_schedule.change_commands().
+
+    Returns the number of config lines sent.
+    """
+    job = job or Job.detached()
+
+    device = {
+        "device_type": "arista_eos",
+        "host": mgmt_ip,
+        "username": username,
+        "password": password,
+        "secret": password,
+        "fast_cli": False,
+        "global_delay_factor": 2,
+    }
+
+    conn = connect(device, router, tracer=job.tracer)
+    job.emit("router_connect", router=router, stage="update_routes")
+
+    try:
+        out = conn.send_config_set(commands, read_timeout=60)
+        print(f"{router} route update:")
+        print(out)
+        ROUTES_PUSHED.labels(router).inc(
+            sum(1 for cmd in commands if cmd.startswith("ip route"))
+        )
+
+        try:
+            conn.send_command("write memory", read_timeout=30)
+        except Exception as e:
+            print(f"Warning: write memory failed (non-fatal): {e}")
+    finally:
+        _safe_disconnect(conn, router)
+
+    return len(commands)
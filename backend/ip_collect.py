@@ -1,5 +1,8 @@
 import json
-from netmiko import ConnectHandler
+
+from backend.install_routes import _safe_disconnect
+from backend.jobs import Job
+from backend.transport import connect
 
 
 def _get_interface_ips(conn):
@@ -40,45 +43,31 @@ def _get_interface_ips(conn):
     return iface_ip_map
 
 
-def collect_interface_ips(inventory):
+def collect_router_ips(router, host, job=None):
     """
-    Collect interface -> IP mappings from all routers.
-
-    Args:
-        inventory: dict mapping router name -> management IP
-
-    Returns:
-        ip_map of the form:
-        {
-          "r1": {
-              "Ethernet1": "10.0.12.1/30",
-              "Ethernet2": "10.0.13.1/30",
-          },
-          "r2": {...},
-        }
+    Collect interface -> IP mappings from a single router.
     """
-    ip_table = {}
-
-    for router, host in inventory.items():
-        print(f"\n=== Collecting interface IPs from {router} ===")
+    job = job or Job.detached()
+    print(f"\n=== Collecting interface IPs from {router} ===")
+
+    device = {
+        "device_type": "arista_eos",
+        "host": host,
+        "username": "admin",
+        "password": "admin",
+        "secret": "admin",
+        "use_keys": False,
+        "allow_agent": False,
+        "fast_cli": False,
+        "global_delay_factor": 2,
+    }
+
+    conn = connect(device, router, tracer=job.tracer)
+    job.emit("router_connect", router=router, stage="ip_collect")
+
+    try:
+        iface_ip_map = _get_interface_ips(conn)
+    finally:
+        _safe_disconnect(conn, router)
 
-        device = {
-            "device_type": "arista_eos",
-            "host": host,
-            "username": "admin",
-            "password": "admin",
-            "secret": "admin",
-            "use_keys": False,
-            "allow_agent": False,
-            "fast_cli": False,
-            "global_delay_factor": 2,
-        }
-
-        conn = ConnectHandler(**device)
-        conn.enable()
-
-        ip_table[router] = _get_interface_ips(conn)
-
-        conn.disconnect()
-
-    return ip_table
+    return iface_ip_map
@@ -0,0 +1,150 @@
+import ipaddress
+
+
+DEFAULT_P2P_POOL = "10.0.0.0/8"
+DEFAULT_P2P_PREFIXLEN = 30
+DEFAULT_FIRST_HOST = 11
+
+
+def _int_to_ipv4(value):
+    """
+    Format an integer as a dotted-quad IPv4 address.
+
+    Much cheaper than str(ipaddress.IPv4Address(value)) when called
+    hundreds of thousands of times.
+    """
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+
+def _formatter(version):
+    if version == 4:
+        return _int_to_ipv4
+    return lambda value: str(ipaddress.IPv6Address(value))
+
+
+def _parse_pool(pool):
+    try:
+        return ipaddress.ip_network(pool, strict=False)
+    except ValueError as e:
+        raise ValueError(f"Invalid address pool {pool!r}: {e}") from None
+
+
+def require_ipv4(network, what):
+    """
+    Raise ValueError unless network is IPv4. Device config (`ip address`,
+    `ip route`) and containerlab's `ipv4-subnet` are IPv4 only.
+    """
+    net = _parse_pool(network)
+    if net.version != 4:
+        raise ValueError(f"{what} {network} is not IPv4; only IPv4 addressing is supported")
+    return net
+
+
+def p2p_capacity(pool, prefixlen=DEFAULT_P2P_PREFIXLEN):
+    """
+    Number of point-to-point blocks of the given prefix length that fit in pool.
+    """
+    net = _parse_pool(pool)
+
+    if prefixlen < net.prefixlen or prefixlen >= net.max_prefixlen:
+        raise ValueError(
+            f"Cannot carve /{prefixlen} point-to-point blocks from {net}"
+        )
+
+    return 1 << (prefixlen - net.prefixlen)
+
+
+def allocate_p2p_blocks(pool, count, prefixlen=DEFAULT_P2P_PREFIXLEN):
+    """
+    Carve `count` consecutive point-to-point blocks out of `pool`.
+
+    /31 (and /127) blocks use both addresses (RFC 3021); larger blocks skip
+    the network address, so a /30 yields .1 and .2.
+
+    Example:
+        allocate_p2p_blocks("10.0.0.0/24", 2, 30)
+    Returns:
+        [
+            ("10.0.0.1/30", "10.0.0.2/30"),
+            ("10.0.0.5/30", "10.0.0.6/30"),
+        ]
+    """
+    capacity = p2p_capacity(pool, prefixlen)
+
+    if count > capacity:
+        raise ValueError(
+            f"Pool {pool} has room for {capacity} /{prefixlen} blocks, "
+            f"{count} requested"
+        )
+
+    net = _parse_pool(pool)
+
+    step = 1 << (net.max_prefixlen - prefixlen)
+    first = int(net.network_address) + (0 if step == 2 else 1)
+    end = first + count * step
+    suffix = f"/{prefixlen}"
+
+    if net.version == 4 and step <= 256:
+        return _ipv4_p2p_blocks(first, end, step, suffix)
+
+    fmt = _formatter(net.version)
+    return [
+        (fmt(base) + suffix, fmt(base + 1) + suffix)
+        for base in range(first, end, step)
+    ]
+
+
+def _ipv4_p2p_blocks(first, end, step, suffix):
+    """
+    Fast path for IPv4 blocks no larger than a /24: format the first three
+    octets once per /24 and reuse precomputed "<octet>/<len>" tails.
+    """
+    tails = [f"{i}{suffix}" for i in range(256)]
+    blocks = []
+
+    # Blocks are aligned, so every /24 after the first starts at the same offset
+    lo_first = first & 255
+    lo_next = first & (step - 1)
+
+    for hi in range(first >> 8, ((end - 1) >> 8) + 1):
+        head = _int_to_ipv4(hi << 8)[:-1]
+        lo_start = lo_first if hi == first >> 8 else lo_next
+        lo_end = min(end - (hi << 8), 256)
+
+        blocks.extend([
+            (head + tails[lo], head + tails[lo + 1])
+            for lo in range(lo_start, lo_end, step)
+        ])
+
+    return blocks
+
+
+def allocate_hosts(subnet, names, first_host=DEFAULT_FIRST_HOST):
+    """
+    Assign one host address per name, counting up from `first_host`
+    (an offset from the network address).
+
+    Example:
+        allocate_hosts("172.20.20.0/24", ["r1", "r2"])
+    Returns:
+        {"r1": "172.20.20.11", "r2": "172.20.20.12"}
+    """
+    net = _parse_pool(subnet)
+    fmt = _formatter(net.version)
+
+    # Network and broadcast addresses are unusable except on /31 and /32
+    size = net.num_addresses
+    last_usable = size - 1 if size <= 2 else size - 2
+
+    names = list(names)
+    last_needed = first_host + len(names) - 1
+
+    if names and last_needed > last_usable:
+        raise ValueError(
+            f"Subnet {net} cannot hold {len(names)} hosts starting at "
+            f"offset {first_host}"
+        )
+
+    base = int(net.network_address) + first_host
+
+    return {name: fmt(base + i) for i, name in enumerate(names)}
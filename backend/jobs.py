@@ -0,0 +1,304 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from backend.events import EventStream
+from backend.metrics import STAGE_SECONDS
+from backend.tracing import Tracer
+
+
+JOB_WORKERS = int(os.environ.get("SDN_JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.environ.get("SDN_JOB_QUEUE_SIZE", "16"))
+MAX_RETAINED_JOBS = int(os.environ.get("SDN_MAX_RETAINED_JOBS", "200"))
+
+
+class QueueFull(Exception):
+    """Raised when the job queue is at capacity."""
+
+
+class Job:
+    """
+    Progress record for one long-running pipeline run.
+
+    Pipeline functions take an optional `job` and report into it:
+        with job.stage("lldp_collect"):
+            ...
+            job.router_timing("r1", "lldp_collect", 0.8)
+        job.set_result("lldp_topology", topology)
+        job.emit("router_connect", router="r1")
+
+    Every report is also published on job.events for live streaming, and
+    stages and per-router steps are recorded as spans on job.tracer.
+
+    When job.checkpoint is set, checkpointed() stages and complete_router()
+    steps are persisted so a failed run can be resumed where it stopped.
+    """
+
+    def __init__(self, kind, lab=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.lab = lab
+        self.status = "queued"
+        self.stage_name = None
+        self.stages = OrderedDict()
+        self.routers = {}
+        self.results = {}
+        self.errors = []
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self.events = EventStream()
+        self.tracer = Tracer()
+        self.checkpoint = None
+
+    @classmethod
+    def detached(cls):
+        """A job that is not tracked by any manager (direct function calls)."""
+        return cls("detached")
+
+    @property
+    def finished(self):
+        return self.status in ("succeeded", "failed")
+
+    def emit(self, type, **data):
+        return self.events.publish(type, job_id=self.id, **data)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+
+        with self._lock:
+            self.stage_name = name
+            self.stages[name] = {"status": "running", "duration": None}
+        self.emit("stage_start", stage=name)
+
+        try:
+            with self.tracer.span("stage", stage=name):
+                yield
+        except Exception as e:
+            self._end_stage(name, started, "failed")
+            self.add_error(str(e), stage=name)
+            raise
+
+        self._end_stage(name, started, "done")
+
+    def checkpointed(self, name, fn, *args, **kwargs):
+        """
+        Run fn inside stage `name` and checkpoint its return value. If the
+        checkpoint already has the stage, return the saved value instead.
+        """
+        if self.checkpoint is not None and self.checkpoint.stage_done(name):
+            with self._lock:
+                self.stages[name] = {"status": "skipped", "duration": 0.0}
+            self.emit("stage_skipped", stage=name)
+            return self.checkpoint.artifact(name)
+
+        with self.stage(name):
+            value = fn(*args, **kwargs)
+
+        if self.checkpoint is not None:
+            self.checkpoint.complete_stage(name, value)
+        return value
+
+    def completed_routers(self, stage):
+        """
+        {router: saved value} for routers already done in `stage` by the
+        run this job resumes.
+        """
+        if self.checkpoint is None:
+            return {}
+        return self.checkpoint.routers(stage)
+
+    def complete_router(self, stage, router, value=None):
+        if self.checkpoint is not None:
+            self.checkpoint.complete_router(stage, router, value)
+
+    @contextmanager
+    def router_step(self, router, stage, parent=None):
+        """
+        Time one router's part of a stage; `parent` is the stage span when
+        the step runs on a different thread than the stage.
+        """
+        started = time.perf_counter()
+
+        with self.tracer.span("router", parent=parent, router=router, stage=stage):
+            yield
+
+        self.router_timing(router, stage, time.perf_counter() - started)
+
+    def _end_stage(self, name, started, status):
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(name).observe(elapsed)
+
+        duration = round(elapsed, 3)
+        with self._lock:
+            self.stages[name] = {"status": status, "duration": duration}
+        self.emit("stage_end", stage=name, status=status, duration=duration)
+
+    def router_timing(self, router, stage, seconds):
+        with self._lock:
+            self.routers.setdefault(router, {})[stage] = round(seconds, 3)
+        self.emit("router_done", router=router, stage=stage,
+                  duration=round(seconds, 3))
+
+    def set_result(self, key, value):
+        with self._lock:
+            self.results[key] = value
+
+    def add_error(self, message, router=None, stage=None):
+        error = {
+            "message": message,
+            "router": router,
+            "stage": stage or self.stage_name,
+        }
+        with self._lock:
+            self.errors.append(error)
+        self.emit("failure", **error)
+
+    def snapshot(self):
+        """JSON-ready view of the job, safe to call while it is running."""
+        with self._lock:
+            elapsed_end = self.finished_at or time.time()
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "lab": self.lab,
+                "status": self.status,
+                "stage": self.stage_name,
+                "stages": {k: dict(v) for k, v in self.stages.items()},
+                "routers": {k: dict(v) for k, v in self.routers.items()},
+                "results": dict(self.results),
+                "errors": list(self.errors),
+                "result": self.result,
+                "created_at": self.created_at,
+                "elapsed": round(elapsed_end - (self.started_at or elapsed_end), 3),
+            }
+
+
+class JobManager:
+    """
+    Runs jobs on a fixed pool of worker threads fed by a bounded queue.
+
+    submit() never blocks: when the queue is full it raises QueueFull so the
+    API can answer 503 instead of piling up work.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, queue_size=JOB_QUEUE_SIZE,
+                 retain=MAX_RETAINED_JOBS):
+        self.workers = workers
+        self.retain = retain
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _ensure_workers(self):
+        # Started lazily so importing the API module does not spawn threads
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(
+                    target=self._worker, name=f"job-worker-{i}", daemon=True
+                )
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, kind, fn, *args, lab=None):
+        """
+        Queue fn(*args, job) and return the Job immediately.
+        """
+        self._ensure_workers()
+        job = Job(kind, lab=lab)
+
+        try:
+            self._queue.put_nowait((job, fn, args))
+        except queue.Full:
+            raise QueueFull(
+                f"Job queue is full ({self._queue.maxsize} pending)"
+            ) from None
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+
+        return job
+
+    def run_inline(self, kind, fn, *args, lab=None):
+        """
+        Run fn(*args, job) in the calling thread, tracked like a queued job.
+        Used by background loops that must wait for their own work.
+        """
+        job = Job(kind, lab=lab)
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+
+        self._run(job, fn, args)
+        return job
+
+    def _evict(self):
+        # Drop the oldest finished jobs once over the retention limit
+        excess = len(self._jobs) - self.retain
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.finished][:excess]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active_count(self):
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j.status == "running")
+
+    def pending_count(self):
+        return self._queue.qsize()
+
+    def _worker(self):
+        while True:
+            job, fn, args = self._queue.get()
+            self._run(job, fn, args)
+            self._queue.task_done()
+
+    def _run(self, job, fn, args):
+        with job._lock:
+            job.status = "running"
+            job.started_at = time.time()
+        job.emit("job_start", kind=job.kind)
+
+        try:
+            with job.tracer.span(job.kind, job_id=job.id, lab=job.lab):
+                result = fn(*args, job)
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            if not job.errors:
+                job.add_error(str(e))
+            if job.checkpoint is not None:
+                job.checkpoint.fail(str(e))
+            with job._lock:
+                job.status = "failed"
+                job.finished_at = time.time()
+            job.emit("job_end", status=job.status)
+            return
+
+        if job.checkpoint is not None:
+            job.checkpoint.finish()
+
+        with job._lock:
+            job.result = result
+            job.status = "succeeded"
+            job.finished_at = time.time()
+        job.emit("job_end", status=job.status)
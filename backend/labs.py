@@ -0,0 +1,178 @@
+import ipaddress
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+
+LAB_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9-]{0,39}$")
+
+# Management subnets handed out when a requested one is already in use
+MGMT_POOL = os.environ.get("SDN_MGMT_POOL", "172.20.0.0/16")
+
+# Host budget and the estimated footprint of one cEOS router
+ROUTER_CPUS = float(os.environ.get("SDN_ROUTER_CPUS", "0.5"))
+ROUTER_MEMORY_MB = int(os.environ.get("SDN_ROUTER_MEMORY_MB", "1024"))
+ADMIT_TIMEOUT = float(os.environ.get("SDN_ADMIT_TIMEOUT", "600"))
+
+
+def _host_memory_mb():
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2**20
+    except (ValueError, OSError, AttributeError):
+        return 8192
+
+
+HOST_CPUS = float(os.environ.get("SDN_HOST_CPUS", os.cpu_count() or 1))
+HOST_MEMORY_MB = int(os.environ.get("SDN_HOST_MEMORY_MB", _host_memory_mb()))
+
+
+def validate_lab_name(name):
+    if not LAB_NAME_RE.match(name):
+        raise ValueError(
+            f"Invalid lab name {name!r}: use lowercase letters, digits and '-'"
+        )
+
+
+def workspace(base_dir, name):
+    """
+    Paths for one lab under the generated directory.
+
+    Example:
+        workspace("/srv/generated", "team-a")
+    Returns:
+        {
+            "root": "/srv/generated/labs/team-a",
+            "topology": ".../team-a/topology.clab.yaml",
+            "inventory": ".../team-a/inventory.json",
+            "clab_dir": ".../team-a/clab-team-a",
+            "container_label": "containerlab=team-a",
+        }
+    """
+    root = os.path.join(base_dir, "labs", name)
+
+    return {
+        "root": root,
+        "topology": os.path.join(root, "topology.clab.yaml"),
+        "inventory": os.path.join(root, "inventory.json"),
+        # containerlab creates its lab directory next to the topology file
+        "clab_dir": os.path.join(root, f"clab-{name}"),
+        # containerlab labels every node with its lab name; a name prefix
+        # would also match other labs ("team" vs "team-a")
+        "container_label": f"containerlab={name}",
+    }
+
+
+class LabScheduler:
+    """
+    Admits labs onto the host within CPU and memory budgets.
+
+    A lab holds its reservation from admission until release() on destroy,
+    including after a failed deploy, whose containers are still running.
+    Each lab also gets a management subnet that does not overlap any other
+    active lab, and a lock that serialises operations on the same lab while
+    different labs run in parallel.
+    """
+
+    def __init__(self, cpus=HOST_CPUS, memory_mb=HOST_MEMORY_MB,
+                 router_cpus=ROUTER_CPUS, router_memory_mb=ROUTER_MEMORY_MB,
+                 mgmt_pool=MGMT_POOL):
+        self.cpus = cpus
+        self.memory_mb = memory_mb
+        self.router_cpus = router_cpus
+        self.router_memory_mb = router_memory_mb
+        self.mgmt_pool = ipaddress.ip_network(mgmt_pool)
+        self._labs = {}
+        self._locks = {}
+        self._cond = threading.Condition()
+
+    def demand(self, router_count):
+        return router_count * self.router_cpus, router_count * self.router_memory_mb
+
+    def check_fits(self, router_count):
+        """Raise ValueError if the lab could never fit on this host."""
+        cpus, memory_mb = self.demand(router_count)
+        if cpus > self.cpus or memory_mb > self.memory_mb:
+            raise ValueError(
+                f"{router_count} routers need {cpus:g} CPUs / {memory_mb} MB, "
+                f"host budget is {self.cpus:g} CPUs / {self.memory_mb} MB"
+            )
+
+    @contextmanager
+    def lab_lock(self, name):
+        with self._cond:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            yield
+
+    def _used(self, exclude=None):
+        cpus = sum(l["cpus"] for n, l in self._labs.items() if n != exclude)
+        mem = sum(l["memory_mb"] for n, l in self._labs.items() if n != exclude)
+        return cpus, mem
+
+    def _pick_subnet(self, name, requested):
+        taken = [
+            ipaddress.ip_network(l["mgmt_subnet"])
+            for n, l in self._labs.items() if n != name
+        ]
+        requested = ipaddress.ip_network(requested, strict=False)
+
+        if not any(requested.overlaps(t) for t in taken):
+            return str(requested)
+
+        for candidate in self.mgmt_pool.subnets(new_prefix=requested.prefixlen):
+            if not any(candidate.overlaps(t) for t in taken):
+                return str(candidate)
+
+        raise ValueError(f"No free /{requested.prefixlen} left in {self.mgmt_pool}")
+
+    def admit(self, name, router_count, mgmt_subnet, timeout=ADMIT_TIMEOUT):
+        """
+        Reserve host resources and a management subnet for a lab, waiting up
+        to `timeout` seconds for other labs to release capacity.
+
+        Returns the management subnet the lab should use.
+        """
+        self.check_fits(router_count)
+        cpus, memory_mb = self.demand(router_count)
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                used_cpus, used_mem = self._used(exclude=name)
+                if (used_cpus + cpus <= self.cpus
+                        and used_mem + memory_mb <= self.memory_mb):
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"Lab {name} waited {timeout:g}s for host capacity"
+                    )
+                self._cond.wait(remaining)
+
+            subnet = self._pick_subnet(name, mgmt_subnet)
+            self._labs[name] = {
+                "routers": router_count,
+                "cpus": cpus,
+                "memory_mb": memory_mb,
+                "mgmt_subnet": subnet,
+                "admitted_at": time.time(),
+            }
+
+        return subnet
+
+    def release(self, name):
+        with self._cond:
+            self._labs.pop(name, None)
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            used_cpus, used_mem = self._used()
+            return {
+                "budget": {"cpus": self.cpus, "memory_mb": self.memory_mb},
+                "used": {"cpus": used_cpus, "memory_mb": used_mem},
+                "labs": {n: dict(l) for n, l in self._labs.items()},
+            }
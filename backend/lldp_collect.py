@@ -1,5 +1,8 @@
 import re
-from netmiko import ConnectHandler
+
+from backend.install_routes import _safe_disconnect
+from backend.jobs import Job
+from backend.transport import connect
 
 
 LOCAL_IF_RE = re.compile(r"Interface (\S+) detected")
@@ -7,65 +10,68 @@ SYSTEM_RE = re.compile(r'System Name:\s+"([^"]+)"')
 REMOTE_IF_RE = re.compile(r'Port ID\s+:\s+"([^"]+)"')
 
 
-def collect_lldp(router_mgmt_ips):
+def parse_lldp_neighbors(output):
     """
-    Collect LLDP topology from all routers.
+    Parse `show lldp neighbors detail` output.
+
     Returns:
-        {
-            "r1": [("Ethernet1","r2","Ethernet1"), ...]
-        }
+        [("Ethernet1", "r2", "Ethernet1"), ...]
     """
+    neighbors = []
+
+    # Split on blank-line + "Interface" boundaries, drop the header block (index 0)
+    raw_blocks = re.split(r'\n\nInterface ', output)
+
+    for i, block in enumerate(raw_blocks):
+        # Re-attach the keyword stripped by split (skip for the first header block)
+        if i > 0:
+            block = "Interface " + block
+        else:
+            # First chunk is the command header; only process if it starts correctly
+            if not block.strip().startswith("Interface"):
+                continue
 
-    topology = {}
-
-    for router, mgmt_ip in router_mgmt_ips.items():
-
-        device = {
-            "device_type": "arista_eos",
-            "host": mgmt_ip,
-            "username": "admin",
-            "password": "admin",
-            "ssh_strict": False,
-        }
-
-        conn = ConnectHandler(**device)
-        conn.enable()
+        local_if = LOCAL_IF_RE.search(block)
+        system = SYSTEM_RE.search(block)
+        remote_if = REMOTE_IF_RE.search(block)
 
-        output = conn.send_command("show lldp neighbors detail")
-        conn.disconnect()
+        if not (local_if and system and remote_if):
+            continue
 
-        neighbors = []
+        if local_if.group(1).lower().startswith("management"):
+            continue
 
-        # Split on blank-line + "Interface" boundaries, drop the header block (index 0)
-        raw_blocks = re.split(r'\n\nInterface ', output)
+        neighbors.append(
+            (
+                local_if.group(1),
+                system.group(1),
+                remote_if.group(1),
+            )
+        )
 
-        for i, block in enumerate(raw_blocks):
-            # Re-attach the keyword stripped by split (skip for the first header block)
-            if i > 0:
-                block = "Interface " + block
-            else:
-                # First chunk is the command header; only process if it starts correctly
-                if not block.strip().startswith("Interface"):
-                    continue
+    return neighbors
 
-            local_if = LOCAL_IF_RE.search(block)
-            system = SYSTEM_RE.search(block)
-            remote_if = REMOTE_IF_RE.search(block)
 
-            if not (local_if and system and remote_if):
-                continue
+def collect_router_lldp(router, mgmt_ip, job=None):
+    """
+    Collect LLDP neighbors from a single router.
+    """
+    job = job or Job.detached()
 
-            if local_if.group(1).lower().startswith("management"):
-                continue
+    device = {
+        "device_type": "arista_eos",
+        "host": mgmt_ip,
+        "username": "admin",
+        "password": "admin",
+        "ssh_strict": False,
+    }
 
-            neighbors.append(
-                (
-                    local_if.group(1),
-                    system.group(1),
-                    remote_if.group(1),
-                )
-            )
+    conn = connect(device, router, tracer=job.tracer)
+    job.emit("router_connect", router=router, stage="lldp_collect")
 
-        topology[router] = neighbors
+    try:
+        output = conn.send_command("show lldp neighbors detail")
+    finally:
+        _safe_disconnect(conn, router)
 
-    return topology
+    return parse_lldp_neighbors(output)
@@ -4,13 +4,45 @@ import subprocess
 import time
 import shutil
 import asyncio
-from fastapi import FastAPI, HTTPException
+import re
+import uuid
+from typing import Literal, Optional
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from backend.addressing import generate_interface_map
-from backend.fabric_config import configure_fabric
+from backend.addressing import expected_lldp_topology, generate_interface_map
+from backend.ipam import (
+    DEFAULT_P2P_POOL,
+    DEFAULT_P2P_PREFIXLEN,
+    allocate_hosts,
+    p2p_capacity,
+    require_ipv4,
+)
 from backend.topology_gen import build_containerlab_yaml, dump_yaml
-from backend.controller import run_controller
+from backend.pipeline import discover, run_pipeline, update_routes, verify_cabling
+from backend.jobs import Job, JobManager, QueueFull
+from backend.checkpoint import Checkpoint
+from backend.labs import LabScheduler, validate_lab_name, workspace
+from backend import metrics
+from backend import profiling
+from backend import export
+from backend.plan import build_plan
+from backend.routing_state import DEFAULT_PAGE_SIZE, RoutingStore
+from backend.monitor import (
+    MONITOR_HOLDDOWN,
+    MONITOR_INTERVAL,
+    MONITOR_RECONCILE_INTERVAL,
+    LinkMonitor,
+)
+from backend.syslog_events import SYSLOG_HOST, SyslogReceiver
+from backend.graph_utils import build_global_routing_table, build_graph
+from backend.deploy_cache import (
+    DeployCache,
+    expected_route_checksums,
+    fingerprint,
+    verify_lab,
+)
 
 
 app = FastAPI()
@@ -28,9 +60,31 @@ GENERATED_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "generated")
 )
 os.makedirs(GENERATED_DIR, exist_ok=True)
+PROFILE_DIR = os.path.join(GENERATED_DIR, "profiles")
+CHECKPOINT_DIR = os.path.join(GENERATED_DIR, "checkpoints")
 
 MAX_ROUTERS = 8
 MIN_ROUTERS = 2
+MAX_PLAN_ROUTERS = 2000
+PLAN_PATHS_MAX_ROUTERS = 100
+PLAN_BACKUPS_MAX_ROUTERS = 200
+SSE_KEEPALIVE_SECONDS = 15
+# Live link view: at most one snapshot per this interval per stream
+LINK_STREAM_MIN_INTERVAL = 0.1
+
+jobs = JobManager()
+scheduler = LabScheduler()
+routing = RoutingStore()
+# Link-state monitors of running labs, by lab name
+monitors = {}
+# Shared by all monitors; bound when the first one starts
+syslog = SyslogReceiver()
+deploy_cache = DeployCache(
+    os.environ.get("SDN_STATE_DB", os.path.join(GENERATED_DIR, "state.db"))
+)
+
+metrics.JOBS_ACTIVE.set_function(jobs.active_count)
+metrics.JOBS_QUEUED.set_function(jobs.pending_count)
 
 
 class DeployRequest(BaseModel):
@@ -39,16 +93,25 @@ class DeployRequest(BaseModel):
     routers: list[str] = Field(min_length=MIN_ROUTERS)
     links: list[list[str]] = Field(min_length=1)
     ceos_image: str = "ceos:4.35.1F"
+    p2p_pool: str = DEFAULT_P2P_POOL
+    p2p_prefixlen: int = DEFAULT_P2P_PREFIXLEN
+    profile: Optional[Literal["sample", "cprofile"]] = None
+    config_mode: Literal["ssh", "startup"] = "ssh"
 
 
-def validate_request(req: DeployRequest):
+def validate_topology(req: DeployRequest, max_routers=MAX_ROUTERS):
     routers = req.routers
     links = req.links
 
-    if len(routers) > MAX_ROUTERS:
+    try:
+        profiling.resolve_mode(req.profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if len(routers) > max_routers:
         raise HTTPException(
             status_code=400,
-            detail=f"Maximum {MAX_ROUTERS} routers allowed."
+            detail=f"Maximum {max_routers} routers allowed."
         )
 
     if len(set(routers)) != len(routers):
@@ -80,35 +143,180 @@ def validate_request(req: DeployRequest):
                 detail="Self-links not allowed."
             )
 
+    try:
+        require_ipv4(req.p2p_pool, "p2p_pool")
+        require_ipv4(req.mgmt_subnet, "mgmt_subnet")
+        capacity = p2p_capacity(req.p2p_pool, req.p2p_prefixlen)
+        allocate_hosts(req.mgmt_subnet, routers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-def _run_deploy_blocking(req: DeployRequest):
-    topo, mgmt_ips = build_containerlab_yaml(req.model_dump())
+    if len(links) > capacity:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Pool {req.p2p_pool} has room for {capacity} links."
+        )
 
-    topo_path = os.path.join(GENERATED_DIR, "topology.clab.yaml")
-    inv_path = os.path.join(GENERATED_DIR, "inventory.json")
 
-    dump_yaml(topo, topo_path)
+def validate_request(req: DeployRequest):
+    try:
+        validate_lab_name(req.name)
+        scheduler.check_fits(len(req.routers))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    validate_topology(req)
 
-    with open(inv_path, "w") as f:
-        json.dump(mgmt_ips, f, indent=2)
 
+def _destroy_lab(ws):
     subprocess.run(
-        ["containerlab", "destroy", "-t", topo_path],
+        ["containerlab", "destroy", "-t", ws["topology"]],
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE
     )
 
+    # Lab names are validated, so the label is safe to interpolate
     subprocess.run(
-        "docker rm -f $(docker ps -aq --filter name=clab-sdn-lab) || true",
+        f"docker rm -f $(docker ps -aq --filter label={ws['container_label']}) || true",
         shell=True
     )
 
     time.sleep(2)
 
-    generated_path = os.path.join("generated", "clab-sdn-lab")
-    if os.path.exists(generated_path):
-        shutil.rmtree(generated_path, ignore_errors=True)
+    if os.path.exists(ws["clab_dir"]):
+        shutil.rmtree(ws["clab_dir"], ignore_errors=True)
+
+
+def _cached_deploy(req, fp, job):
+    """
+    Result of the last deploy of this lab if it had the same fingerprint
+    and the running lab still answers with the same routes, else None.
+    """
+    entry = deploy_cache.get(req.name)
+    if entry is None or entry["fingerprint"] != fp:
+        return None
+
+    with job.stage("verify_cached"):
+        problems = verify_lab(entry["mgmt_ips"], entry["route_checksums"], job)
+
+    if problems:
+        print(f"Cached deploy of {req.name} is stale: {problems}")
+        job.emit("cache_stale", problems=problems)
+        return None
+
+    with job.stage("schedule"):
+        scheduler.admit(req.name, len(req.routers), entry["mgmt_subnet"])
+
+    graph = build_graph(entry["lldp_topology"])
+    grt = build_global_routing_table(graph, entry["ip_map"], include_paths=False)
+    routing.publish(req.name, entry["lldp_topology"], entry["ip_map"], grt)
+
+    job.set_result("mgmt_subnet", entry["mgmt_subnet"])
+    job.set_result("mgmt_ips", entry["mgmt_ips"])
+    job.set_result("cached", True)
+
+    return dict(entry["result"], cached=True, deployed_at=entry["created_at"])
+
+
+def _run_deploy_blocking(req: DeployRequest, force=False, job=None):
+    job = job or Job.detached()
+    ws = workspace(GENERATED_DIR, req.name)
+    fp = fingerprint(req.model_dump())
+    job.set_result("fingerprint", fp)
+
+    # Deploys of the same lab are serialised; different labs run in parallel
+    with scheduler.lab_lock(req.name):
+        if not force:
+            cached = _cached_deploy(req, fp, job)
+            if cached is not None:
+                return cached
+
+        # The running lab is about to be torn down
+        _stop_monitor(req.name)
+        deploy_cache.delete(req.name)
+
+        # Admission is never skipped, but a resumed run asks for the subnet
+        # its containers use; the failed run's reservation is still held
+        requested = req.mgmt_subnet
+        if job.checkpoint is not None and job.checkpoint.stage_done("schedule"):
+            requested = job.checkpoint.artifact("schedule")
 
+        with job.stage("schedule"):
+            mgmt_subnet = scheduler.admit(req.name, len(req.routers), requested)
+        job.set_result("mgmt_subnet", mgmt_subnet)
+        if job.checkpoint is not None:
+            job.checkpoint.complete_stage("schedule", mgmt_subnet)
+
+        # A failed deploy leaves its containers running, so the lab keeps
+        # its reservation until it is destroyed or redeployed
+        result = _deploy_lab(req, ws, mgmt_subnet, job)
+
+        lldp_topology = job.results["lldp_topology"]
+        ip_map = job.results["ip_map"]
+        deploy_cache.put(
+            req.name, fp, mgmt_subnet, job.results["mgmt_ips"], lldp_topology,
+            ip_map,
+            expected_route_checksums(lldp_topology, ip_map, job.results["grt"]),
+            result,
+        )
+        # A lab that came up exactly as intended lets later deploys of the
+        # same topology skip discovery and route from intent
+        if job.results.get("verification", {}).get("ok"):
+            deploy_cache.mark_intent_verified(fp)
+        return result
+
+
+def _start_deploy(req, force, job):
+    job.checkpoint = Checkpoint.create(
+        CHECKPOINT_DIR, job, request=req.model_dump()
+    )
+    return _run_deploy_blocking(req, force, job)
+
+
+def _resume_deploy(checkpoint, job):
+    job.checkpoint = checkpoint.rebind(job)
+    req = DeployRequest(**checkpoint.meta["request"])
+    return _run_deploy_blocking(req, True, job)
+
+
+def _write_startup_configs(ws, payload):
+    """
+    Render every router's full startup-config (interfaces and static
+    routes) from the request alone. Returns {router: path}.
+    """
+    plan = build_plan(payload, include_paths=False)
+    config_dir = os.path.join(ws["root"], "configs")
+    os.makedirs(config_dir, exist_ok=True)
+    paths = {}
+
+    for router, config in plan["startup_configs"].items():
+        path = os.path.join(config_dir, f"{router}.cfg")
+        with open(path, "w") as f:
+            f.write(config)
+        paths[router] = path
+
+    return paths
+
+
+def _write_topology(req, ws, mgmt_subnet):
+    payload = req.model_dump()
+    payload["mgmt_subnet"] = mgmt_subnet
+
+    startup_configs = None
+    if req.config_mode == "startup":
+        startup_configs = _write_startup_configs(ws, payload)
+
+    topo, mgmt_ips = build_containerlab_yaml(payload, startup_configs)
+
+    dump_yaml(topo, ws["topology"])
+
+    with open(ws["inventory"], "w") as f:
+        json.dump(mgmt_ips, f, indent=2)
+
+    return mgmt_ips
+
+
+def _containerlab_deploy(topo_path):
     result = subprocess.run(
         ["sudo", "containerlab", "deploy", "-t", topo_path, "--reconfigure"],
         stdout=subprocess.PIPE,
@@ -117,38 +325,725 @@ def _run_deploy_blocking(req: DeployRequest):
     )
 
     if result.returncode != 0:
-        raise HTTPException(status_code=500, detail=result.stderr)
+        raise RuntimeError(f"containerlab deploy failed: {result.stderr}")
+
+
+def _verify_startup_lab(mgmt_ips, interface_map, expected_lldp, job):
+    """
+    Routers booted with addresses and routes baked in: LLDP only confirms
+    the cabling matches, and the GRT is the one the configs were rendered
+    from.
+    """
+    lldp_topology = job.checkpointed(
+        "verify_cabling", verify_cabling, mgmt_ips, expected_lldp, job
+    )
+    graph = build_graph(expected_lldp)
+    grt = build_global_routing_table(graph, interface_map)
+
+    job.set_result("lldp_topology", lldp_topology)
+    job.set_result("ip_map", interface_map)
+    job.set_result("graph", graph)
+    job.set_result("grt", grt)
+
+    return {
+        "routers_processed": len(mgmt_ips),
+        "topology_nodes": list(graph.keys()),
+        "status": "startup_config_verified",
+    }
+
+
+def _deploy_lab(req, ws, mgmt_subnet, job):
+    """
+    Build and configure the lab. Every stage is checkpointed on the job,
+    so a resumed deploy picks up after the last completed stage/router.
+    """
+    os.makedirs(ws["root"], exist_ok=True)
+
+    mgmt_ips = job.checkpointed(
+        "generate_topology", _write_topology, req, ws, mgmt_subnet
+    )
+    job.set_result("mgmt_ips", mgmt_ips)
+
+    job.checkpointed("containerlab_destroy", _destroy_lab, ws)
 
-    print("Waiting for containers to initialise...")
-    time.sleep(40)
+    job.checkpointed("containerlab_deploy", _containerlab_deploy, ws["topology"])
 
-    generated_interface_map = generate_interface_map(req.routers, req.links)
+    # Configured-at-boot routers are polled until ready instead
+    if req.config_mode == "ssh":
+        print("Waiting for containers to initialise...")
+        job.checkpointed("container_boot", time.sleep, 40)
+
+    generated_interface_map = job.checkpointed(
+        "interface_map", generate_interface_map,
+        req.routers, req.links, req.p2p_pool, req.p2p_prefixlen
+    )
+    job.set_result("interface_map", generated_interface_map)
     print("Generated Interface Map:")
     print(generated_interface_map)
 
-    time.sleep(40)
+    expected_lldp = expected_lldp_topology(req.routers, req.links)
 
-    print("Configuring fabric interfaces....")
-    configure_fabric(mgmt_ips, generated_interface_map)
-
-    print("Waiting for routers to fully boot...")
-    time.sleep(20)
+    mode = profiling.resolve_mode(req.profile)
+    with profiling.profile(mode, job.id, PROFILE_DIR) as prof:
+        if req.config_mode == "startup":
+            controller_result = _verify_startup_lab(
+                mgmt_ips, generated_interface_map, expected_lldp, job
+            )
+        else:
+            # Each router is configured as soon as it accepts SSH and moves
+            # on to LLDP/IP collection on its own; no fabric-wide sleeps
+            controller_result = run_pipeline(
+                mgmt_ips, generated_interface_map, expected_lldp, job=job,
+                trust_intent=deploy_cache.intent_verified(job.results["fingerprint"]),
+            )
+    if mode:
+        job.set_result("profile", prof)
 
-    controller_result = run_controller(inv_path)
+    routing.publish(
+        req.name, job.results["lldp_topology"], job.results["ip_map"],
+        job.results["grt"]
+    )
 
     return {
         "status": "deployed_and_configured",
+        "lab": req.name,
         "router_count": len(req.routers),
         "controller_result": controller_result
     }
 
 
-@app.post("/deploy")
-async def deploy(req: DeployRequest):
+def _run_destroy_blocking(name, job=None):
+    job = job or Job.detached()
+
+    with scheduler.lab_lock(name):
+        _stop_monitor(name)
+        with job.stage("containerlab_destroy"):
+            _destroy_lab(workspace(GENERATED_DIR, name))
+        scheduler.release(name)
+        routing.drop(name)
+        deploy_cache.delete(name)
+
+    return {"status": "destroyed", "lab": name}
+
+
+def _deployed_lab(name):
+    """
+    Deploy cache entry and routing state of a running lab; the lab lock
+    must be held.
+    """
+    entry = deploy_cache.get(name)
+    if entry is None:
+        raise RuntimeError(f"Lab {name} has no deployed routing state")
+
+    # After an API restart only the deploy cache knows the routes
+    state = routing.get(name) or routing.publish(
+        name, entry["lldp_topology"], entry["ip_map"],
+        build_global_routing_table(
+            build_graph(entry["lldp_topology"]), entry["ip_map"],
+            include_paths=False,
+        ),
+    )
+    return entry, state
+
+
+def _apply_topology(name, entry, state, lldp_topology, ip_map, job,
+                    grt=None, rebuilt=None):
+    """
+    Push the route changes for a new topology of a running lab and record
+    the result as its current state; the lab lock must be held.
+    """
+    mgmt_ips = entry["mgmt_ips"]
+    update = job.checkpointed(
+        "update_routes", update_routes,
+        mgmt_ips, state.route_tables(), lldp_topology, ip_map, job,
+        grt=grt, rebuilt=rebuilt,
+    )
+    job.set_result("grt", update["grt"])
+
+    routing.publish(name, lldp_topology, ip_map, update["grt"])
+    deploy_cache.put(
+        name, entry["fingerprint"], entry["mgmt_subnet"], mgmt_ips,
+        lldp_topology, ip_map,
+        expected_route_checksums(lldp_topology, ip_map, update["grt"]),
+        entry["result"],
+    )
+
+    return {
+        "status": "rerouted",
+        "lab": name,
+        "routes_changed": update["routes_changed"],
+        "waves": update["waves"],
+    }
+
+
+def _run_reroute_blocking(name, job=None):
+    """
+    Re-discover a running lab and move its routes onto the current
+    topology in loop-free waves, pushing only the routes that changed.
+    """
+    job = job or Job.detached()
+
+    with scheduler.lab_lock(name):
+        entry, state = _deployed_lab(name)
+
+        discovered = job.checkpointed(
+            "rediscover", discover, entry["mgmt_ips"], job=job
+        )
+        job.set_result("lldp_topology", discovered["lldp_topology"])
+        job.set_result("ip_map", discovered["ip_map"])
+
+        return _apply_topology(
+            name, entry, state,
+            discovered["lldp_topology"], discovered["ip_map"], job,
+        )
+
+
+def _monitor_reroute(name, lldp_topology, grt, rebuilt, job=None):
+    """
+    Reroute for a link change the monitor saw: the topology and the
+    incrementally updated GRT come from the monitor, addresses don't change.
+    """
+    job = job or Job.detached()
+    job.set_result("lldp_topology", lldp_topology)
+
+    with scheduler.lab_lock(name):
+        entry, state = _deployed_lab(name)
+        return _apply_topology(
+            name, entry, state, lldp_topology, entry["ip_map"], job,
+            grt=grt, rebuilt=rebuilt,
+        )
+
+
+def _stop_monitor(name):
+    monitor = monitors.pop(name, None)
+    if monitor is not None:
+        monitor.stop()
+        routing.changes.publish("link_state", lab=name)
+
+
+def _submit(kind, fn, *args, lab=None):
+    try:
+        job = jobs.submit(kind, fn, *args, lab=lab)
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "30"},
+        )
+
+    return {"job_id": job.id, "status": job.status, "url": f"/jobs/{job.id}"}
+
+
+@app.post("/deploy", status_code=202)
+async def deploy(req: DeployRequest, force: bool = False):
+    """
+    Deploy a lab. An identical request for a lab that is still running
+    with the same routes returns the previous result; force=true rebuilds.
+    """
     validate_request(req)
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(None, _run_deploy_blocking, req)
-    return result
+    return _submit("deploy", _start_deploy, req, force, lab=req.name)
+
+
+@app.post("/plan")
+def plan(req: DeployRequest, paths: Optional[bool] = None,
+         backups: Optional[bool] = None):
+    """
+    Dry run: what a deploy of `req` would generate and push, computed in
+    memory without containerlab or SSH. GRT paths are included by default
+    up to PLAN_PATHS_MAX_ROUTERS routers and loop-free alternates up to
+    PLAN_BACKUPS_MAX_ROUTERS; `paths` and `backups` override that.
+    """
+    validate_topology(req, MAX_PLAN_ROUTERS)
+
+    if paths is None:
+        paths = len(req.routers) <= PLAN_PATHS_MAX_ROUTERS
+    if backups is None:
+        backups = len(req.routers) <= PLAN_BACKUPS_MAX_ROUTERS
+
+    plan_id = uuid.uuid4().hex[:12]
+    mode = profiling.resolve_mode(req.profile)
+
+    with profiling.profile(mode, plan_id, PROFILE_DIR) as prof:
+        result = build_plan(
+            req.model_dump(), include_paths=paths, include_backups=backups
+        )
+
+    result["plan_id"] = plan_id
+    if mode:
+        result["profile"] = prof
+
+    # Bypass jsonable_encoder: the plan is already plain JSON data
+    return JSONResponse(result)
+
+
+@app.get("/labs")
+async def list_labs():
+    return scheduler.snapshot()
+
+
+@app.delete("/labs/{name}", status_code=202)
+async def destroy_lab(name: str):
+    try:
+        validate_lab_name(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not os.path.exists(workspace(GENERATED_DIR, name)["topology"]):
+        raise HTTPException(status_code=404, detail=f"Unknown lab {name}")
+
+    return _submit("destroy", _run_destroy_blocking, name, lab=name)
+
+
+@app.post("/labs/{name}/reroute", status_code=202)
+async def reroute_lab(name: str):
+    """
+    Re-discover a running lab (after a link change) and update only the
+    routes that changed, in loop-free waves.
+    """
+    if deploy_cache.get(name) is None:
+        raise HTTPException(status_code=404, detail=f"No deployed lab {name}")
+
+    return _submit("reroute", _run_reroute_blocking, name, lab=name)
+
+
+def _mgmt_gateway(mgmt_subnet):
+    # containerlab gives the management bridge the first host address
+    return allocate_hosts(mgmt_subnet, ["gateway"], first_host=1)["gateway"]
+
+
+@app.post("/labs/{name}/monitor", status_code=202)
+async def start_monitor(
+    name: str,
+    interval: Optional[float] = None,
+    events: bool = True,
+    holddown: Optional[float] = None,
+):
+    """
+    Watch a running lab's links and reroute automatically on changes.
+
+    With events (the default) routers send link and LLDP syslog messages
+    to the controller and polling only reconciles, every
+    SDN_MONITOR_RECONCILE_INTERVAL seconds unless `interval` is given.
+    Events within `holddown` seconds of each other share one reroute.
+    """
+    entry = deploy_cache.get(name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No deployed lab {name}")
+    if name in monitors and monitors[name].running:
+        raise HTTPException(status_code=409, detail=f"Lab {name} is already monitored")
+    if interval is not None and interval <= 0:
+        raise HTTPException(status_code=400, detail="interval must be positive")
+    if holddown is not None and holddown < 0:
+        raise HTTPException(status_code=400, detail="holddown must not be negative")
+
+    gateway = _mgmt_gateway(entry["mgmt_subnet"])
+    event_driven = events and await syslog.start(gateway)
+    default_interval = MONITOR_RECONCILE_INTERVAL if event_driven else MONITOR_INTERVAL
+
+    grt = await asyncio.to_thread(
+        build_global_routing_table,
+        build_graph(entry["lldp_topology"]), entry["ip_map"], False,
+    )
+    monitor = LinkMonitor(
+        name, entry["mgmt_ips"], entry["lldp_topology"], entry["ip_map"], grt,
+        reroute=lambda topology, grt, rebuilt: jobs.run_inline(
+            "reroute", _monitor_reroute, name, topology, grt, rebuilt, lab=name
+        ),
+        interval=interval or default_interval,
+        syslog=syslog if event_driven else None,
+        syslog_host=SYSLOG_HOST or gateway,
+        holddown=MONITOR_HOLDDOWN if holddown is None else holddown,
+        notify=lambda: routing.changes.publish("link_state", lab=name),
+    )
+    monitor.start()
+    monitors[name] = monitor
+    routing.changes.publish("link_state", lab=name)
+    return monitor.status()
+
+
+@app.get("/labs/{name}/monitor")
+async def monitor_status(name: str):
+    if name not in monitors:
+        raise HTTPException(status_code=404, detail=f"Lab {name} is not monitored")
+    return monitors[name].status()
+
+
+@app.delete("/labs/{name}/monitor")
+async def stop_monitor(name: str):
+    if name not in monitors:
+        raise HTTPException(status_code=404, detail=f"Lab {name} is not monitored")
+    monitor = monitors[name]
+    _stop_monitor(name)
+    return dict(monitor.status(), running=False)
+
+
+async def _link_overlay(name):
+    """
+    Every link of a lab with its state (from the monitor, if one is
+    running) and the number of installed routes forwarded over it, or
+    None if the lab has no routing state.
+    """
+    state = routing.get(name)
+    if state is None:
+        return None
+
+    # Counted once per routing state; large fabrics take a moment
+    loads = await asyncio.to_thread(state.link_loads)
+    monitor = monitors.get(name)
+    states = monitor.link_states() if monitor is not None else {}
+
+    links = []
+    for key in sorted(set(loads) | set(states)):
+        (a, a_if), (b, b_if) = key
+        links.append({
+            "a": a, "a_interface": a_if, "b": b, "b_interface": b_if,
+            "state": states.get(key, "up"),
+            "routes": loads.get(key, 0),
+        })
+
+    return {
+        "type": "links",
+        "lab": name,
+        "version": state.version,
+        "monitored": monitor is not None,
+        "max_routes": max(loads.values(), default=0),
+        "links": links,
+    }
+
+
+@app.get("/labs/{name}/links")
+async def lab_links(name: str):
+    overlay = await _link_overlay(name)
+    if overlay is None:
+        raise HTTPException(status_code=404, detail=f"No routing state for lab {name}")
+    return overlay
+
+
+@app.get("/labs/{name}/links/stream")
+async def lab_links_stream(name: str):
+    """
+    Server-Sent Events stream of a lab's links: a full snapshot on
+    connect and again whenever routes are republished or the monitor
+    sees a link change. Bursts of changes are sent as one snapshot.
+    """
+    if routing.get(name) is None:
+        raise HTTPException(status_code=404, detail=f"No routing state for lab {name}")
+
+    sub, _ = routing.changes.subscribe(asyncio.get_running_loop())
+
+    async def stream():
+        try:
+            while True:
+                overlay = await _link_overlay(name)
+                if overlay is None:
+                    yield f"data: {json.dumps({'type': 'lab_gone', 'lab': name})}\n\n"
+                    return
+                yield f"data: {json.dumps(overlay)}\n\n"
+
+                # Wait for a change to this lab, then let a burst settle
+                while True:
+                    try:
+                        event = await asyncio.wait_for(
+                            sub.queue.get(), SSE_KEEPALIVE_SECONDS
+                        )
+                    except asyncio.TimeoutError:
+                        yield ": keepalive\n\n"
+                        continue
+                    if event["lab"] == name:
+                        break
+
+                await asyncio.sleep(LINK_STREAM_MIN_INTERVAL)
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+        finally:
+            routing.changes.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+def _routing_state(lab):
+    state = routing.get(lab)
+    if state is None:
+        detail = f"No routing state for lab {lab}" if lab else "No routing state yet"
+        raise HTTPException(status_code=404, detail=detail)
+    return state
+
+
+@app.get("/routes")
+def get_routes(
+    router: Optional[str] = None,
+    prefix: Optional[str] = None,
+    via: Optional[str] = None,
+    lab: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    """
+    Installed routes from the last controller run, filtered by router,
+    prefix (exact, or an address to find the covering prefixes) and next
+    hop (router name or IP). Pass next_cursor back as cursor for the next page.
+    """
+    state = _routing_state(lab)
+    try:
+        page = state.routes(router, prefix, via, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page["lab"] = state.lab
+    return page
+
+
+@app.get("/path")
+def get_path(src: str, dst: str, lab: Optional[str] = None):
+    state = _routing_state(lab)
+    for router in (src, dst):
+        if router not in state.graph:
+            raise HTTPException(status_code=404, detail=f"Unknown router {router}")
+
+    path = state.path(src, dst)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No path from {src} to {dst}")
+    return path
+
+
+@app.get("/neighbors/{router}")
+def get_neighbors(router: str, lab: Optional[str] = None):
+    state = _routing_state(lab)
+    neighbors = state.neighbors(router)
+    if neighbors is None:
+        raise HTTPException(status_code=404, detail=f"Unknown router {router}")
+    return {"lab": state.lab, "router": router, "neighbors": neighbors}
+
+
+def _stream_export(records, name, lab, version, gzip):
+    chunks = export.ndjson_chunks(records)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{lab}-{name}.ndjson"',
+        "X-Routing-Version": str(version),
+    }
+    if gzip:
+        chunks = export.gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    # A sync generator is iterated in the threadpool, off the event loop
+    return StreamingResponse(
+        chunks, media_type="application/x-ndjson", headers=headers
+    )
+
+
+@app.get("/export/routes")
+def export_routes(
+    lab: Optional[str] = None,
+    router: Optional[str] = None,
+    format: str = "ndjson",
+    gzip: bool = False,
+):
+    """
+    Stream installed routes as NDJSON: one route per line (format=ndjson)
+    or one line per router with column arrays (format=columnar).
+    """
+    if format not in export.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown export format {format}")
+
+    state = _routing_state(lab)
+    if format == "columnar":
+        records = export.columnar_records(state, router)
+    else:
+        records = export.route_records(state, router)
+
+    return _stream_export(records, f"routes-{format}", state.lab, state.version, gzip)
+
+
+@app.get("/export/topology")
+def export_topology(lab: Optional[str] = None, gzip: bool = False):
+    """
+    Stream one NDJSON line per router with its interfaces and neighbors.
+    """
+    state = _routing_state(lab)
+    return _stream_export(
+        export.topology_records(state), "topology", state.lab, state.version, gzip
+    )
+
+
+@app.get("/jobs")
+async def list_jobs():
+    return [
+        {"id": j.id, "kind": j.kind, "lab": j.lab, "status": j.status,
+         "stage": j.stage_name}
+        for j in jobs.list()
+    ]
+
+
+def _get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    return _get_job(job_id).snapshot()
+
+
+@app.post("/jobs/{job_id}/resume", status_code=202)
+async def resume_job(job_id: str):
+    """
+    Re-run a failed deploy from its checkpoint as a new job, skipping the
+    stages and routers that already completed.
+    """
+    if not re.fullmatch(r"[0-9a-f]+", job_id):
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+
+    job = jobs.get(job_id)
+    if job is not None and not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is still {job.status}")
+
+    try:
+        checkpoint = Checkpoint.claim(CHECKPOINT_DIR, job_id)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No checkpoint for job {job_id} (succeeded, already resumed or unknown)",
+        )
+
+    if checkpoint.kind != "deploy":
+        checkpoint.unclaim()
+        raise HTTPException(status_code=400, detail=f"Job {job_id} is not resumable")
+
+    try:
+        response = _submit("deploy", _resume_deploy, checkpoint, lab=checkpoint.lab)
+    except HTTPException:
+        checkpoint.unclaim()
+        raise
+
+    response["resumed_from"] = job_id
+    response["checkpoint"] = checkpoint.summary()
+    return response
+
+
+@app.get("/jobs/{job_id}/trace")
+async def job_trace(job_id: str, format: str = "json"):
+    """
+    Span tree of a job (format=json), flat Gantt rows with stragglers
+    (format=gantt) or a plain-text Gantt chart (format=text).
+    """
+    tracer = _get_job(job_id).tracer
+
+    if format == "json":
+        return tracer.to_json()
+    if format == "gantt":
+        return tracer.timeline()
+    if format == "text":
+        return PlainTextResponse(tracer.gantt_text())
+
+    raise HTTPException(status_code=400, detail=f"Unknown trace format {format}")
+
+
+@app.get("/jobs/{job_id}/profile")
+async def job_profile(job_id: str, format: str = "top", limit: int = 30):
+    """
+    Saved CPU profile of a job run with profiling on: a top-N function
+    table (format=top) or collapsed stacks for flamegraph tools
+    (format=collapsed, sampling mode only).
+    """
+    if not re.fullmatch(r"[0-9a-f]+", job_id):
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+
+    paths = profiling.profile_paths(PROFILE_DIR, job_id)
+
+    if format == "top" and os.path.exists(paths["top"]):
+        with open(paths["top"]) as f:
+            data = json.load(f)
+        data["top"] = data["top"][:limit]
+        return data
+
+    if format == "collapsed" and os.path.exists(paths["collapsed"]):
+        with open(paths["collapsed"]) as f:
+            return PlainTextResponse(f.read())
+
+    if format not in ("top", "collapsed"):
+        raise HTTPException(status_code=400, detail=f"Unknown profile format {format}")
+
+    raise HTTPException(status_code=404, detail=f"No {format} profile for job {job_id}")
+
+
+def _sse(event):
+    return f"id: {event['seq']}\ndata: {json.dumps(event)}\n\n"
+
+
+def _last_event_id(request):
+    """Last-Event-ID as a sequence number; a missing or bad one replays everything."""
+    try:
+        return max(0, int(request.headers.get("last-event-id") or 0))
+    except ValueError:
+        return 0
+
+
+def _job_end_event(job, after):
+    """Stand-in job_end for a finished job whose own one can't be replayed."""
+    return {
+        "type": "job_end", "ts": job.finished_at, "job_id": job.id,
+        "status": job.status, "seq": max(after, job.events.last_seq),
+        "synthetic": True,
+    }
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of a job's progress events.
+
+    Replays retained history (after Last-Event-ID on reconnect), then
+    streams live until the job ends.
+    """
+    job = _get_job(job_id)
+    after = _last_event_id(request)
+    sub, backlog = job.events.subscribe(asyncio.get_running_loop(), after)
+
+    # A finished job publishes nothing more: if its job_end is not in the
+    # backlog (evicted from history, or already seen by the client), end
+    # the stream instead of sending keepalives forever
+    if job.finished and not any(e["type"] == "job_end" for e in backlog):
+        backlog.append(_job_end_event(job, after))
+
+    async def stream():
+        try:
+            for event in backlog:
+                yield _sse(event)
+                if event["type"] == "job_end":
+                    return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        sub.queue.get(), SSE_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield _sse(event)
+                if event["type"] == "job_end":
+                    return
+        finally:
+            job.events.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4"
+    )
 
 
 @app.get("/health")
@@ -0,0 +1,311 @@
+import threading
+import weakref
+from bisect import bisect_left
+
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300,
+)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+class _ShardOwner:
+    """Lives in a thread's locals; collected when the thread exits."""
+
+    __slots__ = ("__weakref__",)
+
+
+class _Sharded:
+    """
+    Per-thread accumulator shards.
+
+    Each thread writes only to its own list, so recording takes no lock;
+    the lock is taken once per thread to register the shard, when the
+    thread exits and its shard is folded into the base totals, and when a
+    scrape sums the shards.
+    """
+
+    def __init__(self, width):
+        self._width = width
+        self._local = threading.local()
+        self._base = [0] * width
+        self._shards = {}
+        self._lock = threading.Lock()
+
+    def shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = [0] * self._width
+            owner = _ShardOwner()
+            with self._lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(owner, self._retire, shard).atexit = False
+            self._local.shard = shard
+            self._local.owner = owner
+            return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            del self._shards[id(shard)]
+            for i, v in enumerate(shard):
+                self._base[i] += v
+
+    def total(self):
+        with self._lock:
+            totals = list(self._base)
+            shards = list(self._shards.values())
+        for shard in shards:
+            for i, v in enumerate(shard):
+                totals[i] += v
+        return totals
+
+
+class _CounterChild:
+    def __init__(self):
+        self._acc = _Sharded(1)
+
+    def inc(self, amount=1):
+        self._acc.shard()[0] += amount
+
+    def value(self):
+        return self._acc.total()[0]
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0
+        self._fn = None
+
+    def set(self, value):
+        self._value = value
+
+    def set_function(self, fn):
+        """Compute the value at scrape time instead of on every change."""
+        self._fn = fn
+
+    def value(self):
+        return self._fn() if self._fn else self._value
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        # One slot per bucket, one for +Inf, one for the running sum
+        self._acc = _Sharded(len(buckets) + 2)
+
+    def observe(self, value):
+        shard = self._acc.shard()
+        shard[bisect_left(self._buckets, value)] += 1
+        shard[-1] += value
+
+    def value(self):
+        totals = self._acc.total()
+        counts, total_sum = totals[:-1], totals[-1]
+        cumulative = []
+        running = 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, total_sum
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._children = {}
+        self._lock = threading.Lock()
+
+        with _registry_lock:
+            _registry.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _unlabelled(self):
+        return self.labels()
+
+    def _label_str(self, values, extra=None):
+        pairs = list(zip(self.label_names, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+        return "{" + body + "}"
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in sorted(children):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{self._label_str(values)} {_num(child.value())}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._unlabelled().inc(amount)
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._unlabelled().set(value)
+
+    def set_function(self, fn):
+        self._unlabelled().set_function(fn)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._unlabelled().observe(value)
+
+    def _render_child(self, values, child):
+        cumulative, total_sum = child.value()
+        lines = []
+        for bound, count in zip(self.buckets + ("+Inf",), cumulative):
+            le = bound if bound == "+Inf" else _num(bound)
+            lines.append(
+                f"{self.name}_bucket{self._label_str(values, ('le', le))} {count}"
+            )
+        labels = self._label_str(values)
+        lines.append(f"{self.name}_sum{labels} {_num(total_sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative[-1]}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Prometheus text exposition (format 0.0.4) of every registered metric."""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ----------------------------
+# Controller metrics
+# ----------------------------
+STAGE_SECONDS = Histogram(
+    "sdn_stage_duration_seconds",
+    "Duration of each deploy/controller pipeline stage.",
+    labels=("stage",),
+)
+SSH_CONNECT_SECONDS = Histogram(
+    "sdn_ssh_connect_seconds",
+    "Time to open and enable an SSH session to a device.",
+    labels=("router",),
+)
+DEVICE_COMMAND_SECONDS = Histogram(
+    "sdn_device_command_seconds",
+    "Latency of commands sent to a device.",
+    labels=("router", "kind"),
+)
+ROUTES_PUSHED = Counter(
+    "sdn_routes_pushed_total",
+    "Static routes pushed to devices.",
+    labels=("router",),
+)
+ROUTE_PUSH_RATE = Gauge(
+    "sdn_route_push_rate",
+    "Routes pushed per second during the last install on each router.",
+    labels=("router",),
+)
+JOBS_ACTIVE = Gauge(
+    "sdn_jobs_active",
+    "Jobs currently running.",
+)
+JOBS_QUEUED = Gauge(
+    "sdn_jobs_queued",
+    "Jobs waiting in the queue.",
+)
+
+# ----------------------------
+# Link-state monitor metrics
+# ----------------------------
+MONITOR_POLL_SECONDS = Histogram(
+    "sdn_monitor_poll_seconds",
+    "Time to poll link state on every router of a lab once.",
+    labels=("lab",),
+)
+LINK_CHANGES = Counter(
+    "sdn_link_changes_total",
+    "Link state changes detected by the monitor.",
+    labels=("lab", "state"),
+)
+REROUTE_SECONDS = Histogram(
+    "sdn_reroute_seconds",
+    "Latency from detecting a link change to the updated routes being installed.",
+    labels=("lab",),
+)
+SYSLOG_MESSAGES = Counter(
+    "sdn_syslog_messages_total",
+    "Syslog messages received from routers.",
+    labels=("result",),
+)
+LINK_FLAPS = Counter(
+    "sdn_link_flaps_total",
+    "Links that went down, each adding a flap-damping penalty.",
+    labels=("lab",),
+)
+LINKS_SUPPRESSED = Gauge(
+    "sdn_links_suppressed",
+    "Links held down by flap damping.",
+    labels=("lab",),
+)
+MONITOR_BATCH_EVENTS = Histogram(
+    "sdn_monitor_batch_events",
+    "Link events coalesced into one route recomputation.",
+    labels=("lab",),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000),
+)
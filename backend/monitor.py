@@ -0,0 +1,514 @@
+import asyncio
+import json
+import os
+import time
+
+from backend.damping import FlapDamper
+from backend.graph_utils import bfs_tree, build_graph, update_global_routing_table
+from backend.install_routes import _safe_disconnect
+from backend.jobs import Job
+from backend.lldp_collect import parse_lldp_neighbors
+from backend.metrics import (
+    LINK_CHANGES,
+    LINK_FLAPS,
+    LINKS_SUPPRESSED,
+    MONITOR_BATCH_EVENTS,
+    MONITOR_POLL_SECONDS,
+    REROUTE_SECONDS,
+)
+from backend.syslog_events import syslog_commands
+from backend.transport import connect
+from backend.verify import format_link, link_key, link_set
+
+
+MONITOR_INTERVAL = float(os.environ.get("SDN_MONITOR_INTERVAL", "5"))
+MONITOR_CONCURRENCY = int(os.environ.get("SDN_MONITOR_CONCURRENCY", "16"))
+# Poll interval when syslog events drive rerouting and polls only reconcile
+MONITOR_RECONCILE_INTERVAL = float(os.environ.get("SDN_MONITOR_RECONCILE_INTERVAL", "60"))
+# Seconds events are collected before one recomputation covers them all
+MONITOR_HOLDDOWN = float(os.environ.get("SDN_MONITOR_HOLDDOWN", "0.1"))
+
+INTERFACE_STATUS_COMMAND = "show interfaces status | json"
+
+
+def parse_interface_status(output):
+    """
+    Parse `show interfaces status | json` into {interface: is_up}.
+    """
+    statuses = json.loads(output).get("interfaceStatuses", {})
+    return {
+        iface: status.get("linkStatus") == "connected"
+        for iface, status in statuses.items()
+    }
+
+
+def poll_link_state(router, mgmt_ip, job=None):
+    """
+    LLDP neighbors of one router on interfaces that are operationally up,
+    from a single SSH session.
+    """
+    job = job or Job.detached()
+
+    device = {
+        "device_type": "arista_eos",
+        "host": mgmt_ip,
+        "username": "admin",
+        "password": "admin",
+        "ssh_strict": False,
+    }
+
+    conn = connect(device, router, tracer=job.tracer)
+    try:
+        neighbors = parse_lldp_neighbors(conn.send_command("show lldp neighbors detail"))
+        up = parse_interface_status(conn.send_command(INTERFACE_STATUS_COMMAND))
+    finally:
+        _safe_disconnect(conn, router)
+
+    # LLDP keeps a neighbor until its hold time expires; oper-state doesn't lag
+    return [n for n in neighbors if up.get(n[0], False)]
+
+
+def configure_syslog(router, mgmt_ip, host, port, job=None):
+    """
+    Point a router's syslog at the controller's receiver.
+    """
+    job = job or Job.detached()
+
+    device = {
+        "device_type": "arista_eos",
+        "host": mgmt_ip,
+        "username": "admin",
+        "password": "admin",
+        "ssh_strict": False,
+    }
+
+    conn = connect(device, router, tracer=job.tracer)
+    try:
+        conn.send_config_set(syslog_commands(host, port))
+    finally:
+        _safe_disconnect(conn, router)
+
+
+def spf_trees(graph):
+    return {src: bfs_tree(graph, src) for src in graph}
+
+
+def confirmed_topology(polled):
+    """
+    Keep only adjacencies both ends report, so a link that is down on one
+    side is down for both and the graph stays symmetric.
+    """
+    return {
+        router: [
+            (local_if, nbr, remote_if)
+            for local_if, nbr, remote_if in neighbors
+            if (remote_if, router, local_if) in polled.get(nbr, ())
+        ]
+        for router, neighbors in polled.items()
+    }
+
+
+def link_changes(old_topology, new_topology):
+    """
+    {"down": [["r1:Ethernet1", "r2:Ethernet1"], ...], "up": [...]}
+    """
+    old = link_set(old_topology)
+    new = link_set(new_topology)
+    return {
+        "down": [format_link(k) for k in sorted(old - new)],
+        "up": [format_link(k) for k in sorted(new - old)],
+    }
+
+
+class LinkMonitor:
+    """
+    Long-running link-state watcher for one deployed lab.
+
+    Every `interval` seconds it polls LLDP and interface oper-state on all
+    routers (at most `concurrency` SSH sessions at a time, each in a worker
+    thread). When the set of up links changes, only the routing tables the
+    change can affect are recomputed (update_global_routing_table) and
+    `reroute(topology, grt, rebuilt)` pushes the difference. That callback
+    is blocking, runs in a thread and returns the finished Job.
+
+    With a `syslog` receiver, routers are pointed at it (`syslog_host`) and
+    their link and LLDP messages update the topology as they arrive, so
+    the poll only reconciles missed messages and can be slow.
+
+    Events are coalesced: the first one opens a `holddown` window and
+    everything arriving within it is covered by one recomputation. Links
+    that keep flapping are held down by `damper` (FlapDamper) until their
+    penalty decays, so a flapping link costs one reroute, not one per flap.
+
+    `notify()` is called on the event loop whenever the state of a link
+    changes (reported up or down, held down or released), before any
+    reroute; link_states() gives the current view.
+
+    Detection-to-reroute latency is exported as sdn_reroute_seconds.
+    """
+
+    def __init__(self, lab, mgmt_ips, lldp_topology, ip_map, grt, reroute,
+                 interval=MONITOR_INTERVAL, concurrency=MONITOR_CONCURRENCY,
+                 poll=poll_link_state, syslog=None, syslog_host=None,
+                 holddown=MONITOR_HOLDDOWN, damper=None, notify=None):
+        self.lab = lab
+        self.mgmt_ips = mgmt_ips
+        self.ip_map = ip_map
+        self.reroute = reroute
+        self.interval = interval
+        self.concurrency = concurrency
+        self.poll_router = poll
+        self.syslog = syslog
+        self.syslog_host = syslog_host
+        self.holddown = holddown
+        self.damper = damper or FlapDamper()
+        self.notify = notify or (lambda: None)
+
+        self.lldp_topology = {
+            router: [tuple(link) for link in neighbors]
+            for router, neighbors in lldp_topology.items()
+        }
+        # What each router last reported, before both ends are cross-checked
+        self.reported = dict(self.lldp_topology)
+        # Last adjacency seen per (router, interface), restored on link up
+        self.known_links = {}
+        self._remember(self.lldp_topology)
+        self._event_at = {}
+        self.graph = build_graph(self.lldp_topology)
+        # Shortest-path trees per source, built off the event loop in _run
+        self.trees = None
+        self.grt = grt
+
+        self.started_at = None
+        self.polls = 0
+        self.last_poll_at = None
+        self.last_poll_seconds = None
+        self.changes = 0
+        self.last_change = None
+        self.events = 0
+        self.last_event = None
+        self.batches = 0
+        self.last_batch_events = None
+        self.errors = {}
+
+        self._loop = None
+        self._task = None
+        self._lock = None
+        self._event_tasks = set()
+        self._batch = None
+        self._batch_events = 0
+        self._batch_detected_at = None
+        self._reuse_timer = None
+        self._suppressed = set()
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._lock = asyncio.Lock()
+        self.started_at = time.time()
+        self._task = self._loop.create_task(self._run())
+
+    def stop(self):
+        """Cancel the monitor; safe to call from any thread."""
+        if self.running:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+
+    @property
+    def event_driven(self):
+        return self.syslog is not None and self.lab in self.syslog.status()["labs"]
+
+    async def _run(self):
+        try:
+            self.trees = await asyncio.to_thread(spf_trees, self.graph)
+            if self.syslog is not None:
+                await self.subscribe()
+
+            while True:
+                started = time.monotonic()
+                try:
+                    await self.poll()
+                    await self.reconcile(detected_at=started)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"⚠️ Monitor for {self.lab}: {e}")
+                    self.errors["monitor"] = str(e)
+
+                await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        finally:
+            if self.syslog is not None:
+                self.syslog.unsubscribe(self.lab)
+            if self._reuse_timer is not None:
+                self._reuse_timer.cancel()
+            for task in [self._batch, *self._event_tasks]:
+                if task is not None:
+                    task.cancel()
+
+    async def subscribe(self):
+        """
+        Point every router's syslog at the receiver, then take events.
+        Routers that can't be configured are still polled.
+        """
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def one(router, mgmt_ip):
+            async with limit:
+                try:
+                    await asyncio.to_thread(
+                        configure_syslog, router, mgmt_ip,
+                        self.syslog_host, self.syslog.port,
+                    )
+                except Exception as e:
+                    self.errors[router] = f"syslog: {e}"
+
+        await asyncio.gather(*(one(r, ip) for r, ip in self.mgmt_ips.items()))
+        self.syslog.subscribe(self.lab, self.mgmt_ips, self.on_event)
+
+    def on_event(self, router, event, received_at):
+        """Receiver callback, on the event loop; handled in a task."""
+        task = self._loop.create_task(self._handle_event(router, event, received_at))
+        self._event_tasks.add(task)
+        task.add_done_callback(self._event_tasks.discard)
+
+    async def _handle_event(self, router, event, received_at):
+        self.events += 1
+        self.last_event = dict(event, at=time.time())
+        self._event_at[router] = received_at
+
+        iface = event["interface"]
+        neighbors = [n for n in self.reported.get(router, []) if n[0] != iface]
+
+        if event["state"] == "up":
+            known = self.known_links.get((router, iface))
+            if known and event.get("remote_interface", known[2]) == known[2]:
+                neighbors.append(known)
+            else:
+                # A neighbor we haven't seen on this port: ask the router
+                await self.refresh(router)
+                neighbors = self.reported.get(router, [])
+
+        self._report(router, neighbors, received_at)
+        self._schedule(received_at)
+
+    def _schedule(self, detected_at):
+        """
+        Queue a recomputation. The first change opens the hold-down
+        window; later ones join it.
+        """
+        self._batch_events += 1
+        if self._batch is None:
+            self._batch_detected_at = detected_at
+            self._batch = self._loop.create_task(self._flush())
+
+    async def _flush(self):
+        await asyncio.sleep(self.holddown)
+
+        # Changes from here on open the next batch
+        detected_at, events = self._batch_detected_at, self._batch_events
+        self._batch = None
+        self._batch_events = 0
+
+        self.batches += 1
+        self.last_batch_events = events
+        MONITOR_BATCH_EVENTS.labels(self.lab).observe(events)
+
+        try:
+            await self.reconcile(detected_at)
+        except Exception as e:
+            print(f"⚠️ Monitor for {self.lab}: {e}")
+            self.errors["monitor"] = str(e)
+
+    def _confirmed_links(self, router):
+        return {
+            link_key(router, local_if, nbr, remote_if)
+            for local_if, nbr, remote_if in self.reported.get(router, [])
+            if (remote_if, router, local_if) in self.reported.get(nbr, ())
+        }
+
+    def _report(self, router, neighbors, now):
+        """
+        Record what a router reports; every link this takes down is a flap.
+        """
+        before = self._confirmed_links(router)
+        self.reported[router] = neighbors
+        after = self._confirmed_links(router)
+
+        for key in before - after:
+            LINK_FLAPS.labels(self.lab).inc()
+            if self.damper.flap(key, now):
+                print(f"⚠️ {self.lab}: link {format_link(key)} is flapping, holding it down")
+
+        if before != after:
+            self.notify()
+
+    def link_states(self):
+        """
+        {link key: "up" | "down" | "suppressed"} for every link seen since
+        the monitor started.
+        """
+        up = link_set(confirmed_topology(self.reported))
+        suppressed = self.damper.suppressed(time.monotonic())
+        known = {link_key(router, *link) for (router, _), link in self.known_links.items()}
+        return {
+            key: "suppressed" if key in suppressed else "up" if key in up else "down"
+            for key in known | up
+        }
+
+    def _remember(self, topology):
+        for router, neighbors in topology.items():
+            for neighbor in neighbors:
+                self.known_links[(router, neighbor[0])] = tuple(neighbor)
+
+    async def _poll_one(self, router):
+        try:
+            neighbors = await asyncio.to_thread(
+                self.poll_router, router, self.mgmt_ips[router]
+            )
+        except Exception as e:
+            self.errors[router] = str(e)
+            return None
+        self.errors.pop(router, None)
+        return [tuple(n) for n in neighbors]
+
+    async def refresh(self, router):
+        started = time.monotonic()
+        neighbors = await self._poll_one(router)
+        if neighbors is not None and self._event_at.get(router, 0) <= started:
+            self._remember({router: neighbors})
+            self._report(router, neighbors, time.monotonic())
+
+    async def poll(self):
+        """
+        Poll every router and update what it reports. A router that can't
+        be polled keeps its last known adjacency; if it is really down its
+        neighbors report the links down anyway. A router that sent an event
+        while being polled keeps the event's view, which is newer.
+        """
+        started = time.monotonic()
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def one(router):
+            async with limit:
+                return router, await self._poll_one(router)
+
+        polled = await asyncio.gather(*(one(router) for router in self.mgmt_ips))
+
+        now = time.monotonic()
+        for router, neighbors in polled:
+            if neighbors is not None and self._event_at.get(router, 0) <= started:
+                self._remember({router: neighbors})
+                self._report(router, neighbors, now)
+
+        elapsed = time.monotonic() - started
+        self.polls += 1
+        self.last_poll_at = time.time()
+        self.last_poll_seconds = elapsed
+        MONITOR_POLL_SECONDS.labels(self.lab).observe(elapsed)
+
+    async def reconcile(self, detected_at):
+        """
+        Reroute if the confirmed topology differs from the installed one.
+        One reroute at a time; changes arriving meanwhile go in the next.
+        """
+        async with self._lock:
+            topology = self._usable_topology(time.monotonic())
+            if link_changes(self.lldp_topology, topology) != {"down": [], "up": []}:
+                await self.apply(topology, detected_at)
+
+    def _usable_topology(self, now):
+        """
+        Confirmed topology without the links flap damping holds down.
+        Arms a timer to recompute when the next one is released.
+        """
+        topology = confirmed_topology(self.reported)
+        suppressed = self.damper.suppressed(now)
+        LINKS_SUPPRESSED.labels(self.lab).set(len(suppressed))
+        if suppressed != self._suppressed:
+            self._suppressed = suppressed
+            self.notify()
+
+        if self._reuse_timer is not None:
+            self._reuse_timer.cancel()
+            self._reuse_timer = None
+        delay = self.damper.next_reuse(now)
+        if delay is not None:
+            self._reuse_timer = self._loop.call_later(
+                delay, lambda: self._schedule(time.monotonic())
+            )
+
+        if not suppressed:
+            return topology
+        return {
+            router: [n for n in neighbors if link_key(router, *n) not in suppressed]
+            for router, neighbors in topology.items()
+        }
+
+    async def apply(self, topology, detected_at):
+        """
+        Recompute the affected routes for `topology` and push them.
+        detected_at is the time.monotonic() the change was first seen.
+        """
+        changes = link_changes(self.lldp_topology, topology)
+        for state in ("down", "up"):
+            if changes[state]:
+                LINK_CHANGES.labels(self.lab, state).inc(len(changes[state]))
+        print(f"🔀 {self.lab}: links down {changes['down']}, up {changes['up']}")
+
+        # SPF on a large fabric takes a while: keep the loop free for
+        # syslog events, SSE streams and requests meanwhile
+        graph = build_graph(topology)
+        grt, rebuilt = await asyncio.to_thread(
+            update_global_routing_table,
+            self.graph, graph, self.ip_map, self.grt, self.trees,
+        )
+        # A router's next-hop addresses follow its own LLDP entries too
+        rebuilt |= {r for r in topology if topology[r] != self.lldp_topology.get(r)}
+
+        job = await asyncio.to_thread(self.reroute, topology, grt, rebuilt)
+        latency = time.monotonic() - detected_at
+
+        self.changes += 1
+        self.last_change = {
+            **changes,
+            "at": time.time(),
+            "job_id": job.id,
+            "status": job.status,
+            "routers_recomputed": sorted(rebuilt),
+            "routes_changed": (job.result or {}).get("routes_changed"),
+            "reroute_seconds": round(latency, 3),
+        }
+
+        if job.status != "succeeded":
+            # Keep the last installed view so the next poll retries
+            self.trees = await asyncio.to_thread(spf_trees, self.graph)
+            return
+
+        REROUTE_SECONDS.labels(self.lab).observe(latency)
+        self.lldp_topology = topology
+        self.graph = graph
+        self.grt = grt
+
+    def status(self):
+        return {
+            "lab": self.lab,
+            "running": self.running,
+            "interval": self.interval,
+            "concurrency": self.concurrency,
+            "started_at": self.started_at,
+            "polls": self.polls,
+            "last_poll_at": self.last_poll_at,
+            "last_poll_seconds": self.last_poll_seconds,
+            "event_driven": self.event_driven,
+            "events": self.events,
+            "last_event": self.last_event,
+            "holddown": self.holddown,
+            "batches": self.batches,
+            "last_batch_events": self.last_batch_events,
+            "damping": self.damper.status(time.monotonic()),
+            "changes": self.changes,
+            "last_change": self.last_change,
+            "errors": dict(self.errors),
+        }
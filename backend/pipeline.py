@@ -0,0 +1,460 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from backend.fabric_config import configure_router
+from backend.graph_utils import (
+    build_global_routing_table,
+    build_graph,
+    build_router_table,
+    distance_cache,
+    prefix_owners,
+    router_subnet_index,
+)
+from backend.install_routes import apply_route_changes, install_router_routes
+from backend.ip_collect import collect_router_ips
+from backend.jobs import Job
+from backend.lldp_collect import collect_router_lldp
+from backend.route_schedule import (
+    change_commands,
+    diff_routes,
+    route_tables,
+    update_waves,
+    wave_summary,
+)
+from backend.verify import verify_intent
+
+
+ROUTER_WORKERS = int(os.environ.get("SDN_ROUTER_WORKERS", "8"))
+READY_TIMEOUT = float(os.environ.get("SDN_ROUTER_READY_TIMEOUT", "180"))
+LLDP_TIMEOUT = float(os.environ.get("SDN_LLDP_TIMEOUT", "90"))
+POLL_INTERVAL = float(os.environ.get("SDN_POLL_INTERVAL", "3"))
+
+
+def _retry_until_ready(fn, timeout=READY_TIMEOUT, interval=POLL_INTERVAL):
+    """
+    Call fn until it stops raising (a booting router refuses SSH), giving
+    up with the last error after `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+
+    while True:
+        try:
+            return fn()
+        except Exception:
+            if time.monotonic() + interval > deadline:
+                raise
+            time.sleep(interval)
+
+
+def wait_for_adjacency(router, host, expected, job=None, timeout=LLDP_TIMEOUT,
+                       interval=POLL_INTERVAL):
+    """
+    Poll LLDP on one router until every expected (local interface, neighbor)
+    pair is seen, instead of sleeping a fixed time for the whole fabric.
+
+    With no expectation the first collection is returned. On timeout the
+    partial adjacency is returned and an lldp_incomplete event is emitted.
+    """
+    job = job or Job.detached()
+    want = {(local_if, nbr) for local_if, nbr, _ in expected or ()}
+    deadline = time.monotonic() + timeout
+
+    while True:
+        neighbors = collect_router_lldp(router, host, job)
+        seen = {(local_if, nbr) for local_if, nbr, _ in neighbors}
+
+        if want <= seen:
+            return neighbors
+
+        if time.monotonic() + interval > deadline:
+            missing = [f"{local_if}->{nbr}" for local_if, nbr in sorted(want - seen)]
+            print(f"⚠️ {router}: LLDP still missing {missing} after {timeout:g}s")
+            job.emit("lldp_incomplete", router=router, missing=missing)
+            return neighbors
+
+        time.sleep(interval)
+
+
+def _discover_router(router, host, interfaces, expected, done, job, parent,
+                     collect=True):
+    """
+    One router's own chain: configure interfaces -> LLDP adjacency ->
+    interface addresses. Steps completed by a previous run are skipped.
+    """
+    if interfaces is not None and router not in done["fabric_config"]:
+        with job.router_step(router, "fabric_config", parent=parent):
+            _retry_until_ready(
+                lambda: configure_router(router, host, interfaces, job)
+            )
+        job.complete_router("fabric_config", router)
+
+    if not collect:
+        return None, None
+
+    neighbors = done["lldp_collect"].get(router)
+    if neighbors is None:
+        with job.router_step(router, "lldp_collect", parent=parent):
+            neighbors = wait_for_adjacency(router, host, expected, job)
+        job.complete_router("lldp_collect", router, neighbors)
+
+    ips = done["ip_collect"].get(router)
+    if ips is None:
+        with job.router_step(router, "ip_collect", parent=parent):
+            ips = collect_router_ips(router, host, job)
+        job.complete_router("ip_collect", router, ips)
+
+    return neighbors, ips
+
+
+def _raise_failures(failures, stage):
+    if failures:
+        names = ", ".join(sorted(failures))
+        raise RuntimeError(f"{len(failures)} router(s) failed in {stage}: {names}")
+
+
+def discover(router_mgmt_ips, interfaces=None, expected_lldp=None, job=None,
+             workers=ROUTER_WORKERS, collect=True):
+    """
+    Run every router through its discovery chain concurrently, with no
+    barrier between routers, and fold each result into the LLDP topology,
+    IP map and graph as soon as that router finishes.
+
+    interfaces: {router: {"Ethernet1": "10.0.0.1/30"}} to push first, or
+        None when the fabric is already configured.
+    expected_lldp: expected_lldp_topology() output to wait for, or None.
+    collect: False to only configure (LLDP/IP collection is skipped and
+        nothing is returned).
+
+    Returns {"lldp_topology": {...}, "ip_map": {...}}.
+    """
+    job = job or Job.detached()
+    parent = job.tracer.current()
+    done = {
+        stage: job.completed_routers(stage)
+        for stage in ("fabric_config", "lldp_collect", "ip_collect")
+    }
+
+    lldp_topology = {}
+    ip_map = {}
+    graph = {}
+    failures = {}
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(router_mgmt_ips))),
+        thread_name_prefix="router",
+    ) as pool:
+        futures = {
+            pool.submit(
+                _discover_router, router, host,
+                None if interfaces is None else interfaces.get(router, {}),
+                (expected_lldp or {}).get(router), done, job, parent, collect,
+            ): router
+            for router, host in router_mgmt_ips.items()
+        }
+
+        for future in as_completed(futures):
+            router = futures[future]
+            try:
+                neighbors, ips = future.result()
+            except Exception as e:
+                failures[router] = str(e)
+                job.add_error(str(e), router=router, stage="router_pipeline")
+                continue
+
+            if not collect:
+                continue
+
+            lldp_topology[router] = neighbors
+            ip_map[router] = ips
+            graph.update(build_graph({router: neighbors}))
+
+            job.set_result("graph", dict(graph))
+            job.emit("router_discovered", router=router,
+                     neighbors=[nbr for _, nbr, _ in neighbors])
+
+    _raise_failures(failures, "router_pipeline")
+
+    if not collect:
+        return None
+
+    # Keep inventory order regardless of completion order
+    return {
+        "lldp_topology": {r: lldp_topology[r] for r in router_mgmt_ips},
+        "ip_map": {r: ip_map[r] for r in router_mgmt_ips},
+    }
+
+
+def verify_cabling(router_mgmt_ips, expected_lldp, job=None, workers=ROUTER_WORKERS):
+    """
+    Wait for LLDP on every router concurrently and compare it with the
+    intended cabling. Used when routers boot fully configured, so LLDP is
+    only a check, not an input.
+
+    Returns the discovered LLDP topology; raises if any router's
+    adjacency differs from expected_lldp.
+    """
+    job = job or Job.detached()
+    parent = job.tracer.current()
+    lldp_topology = job.completed_routers("lldp_collect")
+    failures = {}
+
+    def check(router, host):
+        with job.router_step(router, "lldp_collect", parent=parent):
+            return _retry_until_ready(
+                lambda: wait_for_adjacency(
+                    router, host, expected_lldp.get(router), job
+                )
+            )
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(router_mgmt_ips))),
+        thread_name_prefix="router",
+    ) as pool:
+        futures = {
+            pool.submit(check, router, host): router
+            for router, host in router_mgmt_ips.items()
+            if router not in lldp_topology
+        }
+
+        for future in as_completed(futures):
+            router = futures[future]
+            try:
+                lldp_topology[router] = future.result()
+            except Exception as e:
+                failures[router] = str(e)
+                job.add_error(str(e), router=router, stage="verify_cabling")
+                continue
+
+            # Only a router whose adjacency matches is done for good
+            want = {tuple(l) for l in expected_lldp.get(router, [])}
+            if want == {tuple(l) for l in lldp_topology[router]}:
+                job.complete_router("lldp_collect", router, lldp_topology[router])
+
+    _raise_failures(failures, "verify_cabling")
+
+    job.set_result("lldp_topology", lldp_topology)
+    report = verify_intent(expected_lldp, None, lldp_topology)
+    job.set_result("verification", report)
+    if not report["ok"]:
+        raise RuntimeError(f"Cabling differs from intent: {_summarize(report)}")
+
+    return {r: lldp_topology[r] for r in router_mgmt_ips}
+
+
+def _summarize(report):
+    counts = [
+        f"{len(report[key])} {key.replace('_', ' ')}"
+        for key in (
+            "missing_links", "unexpected_links",
+            "swapped_interfaces", "address_mismatches",
+        )
+        if report[key]
+    ]
+    return ", ".join(counts)
+
+
+def _install_router(router, mgmt_ip, lldp_topology, ip_map, grt, job, parent):
+    with job.router_step(router, "install_routes", parent=parent):
+        count = install_router_routes(
+            router, mgmt_ip, lldp_topology, ip_map, grt, job=job
+        )
+    job.complete_router("install_routes", router, count)
+    return count
+
+
+def route_and_install(router_mgmt_ips, lldp_topology, ip_map, job=None,
+                      workers=ROUTER_WORKERS):
+    """
+    Compute each router's routing table (primary and loop-free alternate
+    next hops) and hand it to a push worker immediately, so the first
+    routers are being configured while the tables of the rest are still
+    being computed.
+
+    Returns {"grt": {...}, "routes_installed": {router: count}}.
+    """
+    job = job or Job.detached()
+    parent = job.tracer.current()
+
+    graph = build_graph(lldp_topology)
+    subnets = router_subnet_index(graph, ip_map)
+    owners = prefix_owners(subnets)
+    dist_of = distance_cache(graph)
+    installed = job.completed_routers("install_routes")
+    grt = {}
+    failures = {}
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(router_mgmt_ips))),
+        thread_name_prefix="router",
+    ) as pool:
+        futures = {}
+
+        for router in graph:
+            with job.router_step(router, "build_grt"):
+                grt[router] = build_router_table(
+                    graph, router, subnets, dist_of=dist_of, owners=owners
+                )
+
+            if router in installed or router not in router_mgmt_ips:
+                continue
+
+            future = pool.submit(
+                _install_router, router, router_mgmt_ips[router],
+                lldp_topology, ip_map, grt, job, parent,
+            )
+            futures[future] = router
+
+        job.set_result("grt", grt)
+
+        for future in as_completed(futures):
+            router = futures[future]
+            try:
+                installed[router] = future.result()
+            except Exception as e:
+                failures[router] = str(e)
+                job.add_error(str(e), router=router, stage="install_routes")
+                continue
+            job.set_result("routes_installed", dict(installed))
+
+    _raise_failures(failures, "install_routes")
+
+    return {"grt": grt, "routes_installed": installed}
+
+
+def update_routes(router_mgmt_ips, old_tables, lldp_topology, ip_map, job=None,
+                  workers=ROUTER_WORKERS, grt=None, rebuilt=None):
+    """
+    Re-route a running lab onto a changed topology without transient
+    loops: only routes that differ from old_tables are pushed, in waves
+    from update_waves(). Routers within a wave are pushed concurrently;
+    the next wave starts once the whole wave is in place.
+
+    old_tables: route_tables() of what the routers currently forward on.
+    grt / rebuilt: an already updated GRT and the routers whose tables
+        changed (update_global_routing_table()); by default the GRT is
+        recomputed and every router is compared.
+
+    Returns {"grt": {...}, "routes_changed": n, "waves": wave_summary()}.
+    """
+    job = job or Job.detached()
+    parent = job.tracer.current()
+
+    if grt is None:
+        grt = build_global_routing_table(
+            build_graph(lldp_topology), ip_map, include_paths=False
+        )
+    new_tables = {r: t for r, t in old_tables.items() if r in grt}
+    new_tables.update(route_tables(lldp_topology, ip_map, grt, rebuilt))
+    changes = diff_routes(old_tables, new_tables)
+    waves = update_waves(changes, new_tables)
+    summary = wave_summary(waves)
+    job.set_result("update_waves", summary)
+
+    def push(router, commands):
+        with job.router_step(router, "update_routes", parent=parent):
+            return apply_route_changes(
+                router, router_mgmt_ips[router], commands, job=job
+            )
+
+    for i, wave in enumerate(waves):
+        batches = {}
+        for router, router_changes in wave.items():
+            commands = []
+            for prefix, change in router_changes:
+                if change["new"] is not None and not change["new"][1]:
+                    # Keep the old route rather than withdraw it with no replacement
+                    job.add_error(f"No next-hop for {prefix} via {change['new'][0]}",
+                                  router=router, stage="update_routes")
+                    continue
+                commands.extend(change_commands(prefix, change))
+            if commands and router in router_mgmt_ips:
+                batches[router] = commands
+
+        job.emit("route_wave", wave=i, routers=sorted(batches))
+        failures = {}
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(workers, len(batches))),
+            thread_name_prefix="router",
+        ) as pool:
+            futures = {
+                pool.submit(push, router, commands): router
+                for router, commands in batches.items()
+            }
+            for future in as_completed(futures):
+                router = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    failures[router] = str(e)
+                    job.add_error(str(e), router=router, stage="update_routes")
+
+        # Later waves rely on this one being in place
+        _raise_failures(failures, f"update_routes wave {i}")
+
+    return {"grt": grt, "routes_changed": len(changes), "waves": summary}
+
+
+def run_pipeline(router_mgmt_ips, interfaces=None, expected_lldp=None, job=None,
+                 workers=ROUTER_WORKERS, trust_intent=False):
+    """
+    Per-router pipelined replacement for the configure-all / sleep /
+    collect-all / install-all sequence. The only global barrier is before
+    the routing tables, which need the whole graph.
+
+    When both interfaces and expected_lldp are given, what was discovered
+    is checked against them in a verify_intent stage (reported, not
+    fatal). With trust_intent=True, for a topology that verified cleanly
+    before, LLDP/IP collection is skipped and routes are computed from
+    the intent directly.
+
+    All stages are checkpointed on the job.
+    """
+    job = job or Job.detached()
+    has_intent = interfaces is not None and expected_lldp is not None
+
+    if trust_intent and has_intent:
+        job.checkpointed(
+            "router_pipeline", discover,
+            router_mgmt_ips, interfaces, expected_lldp, job, workers, False,
+        )
+        lldp_topology = expected_lldp
+        ip_map = interfaces
+        job.set_result("verification", {"ok": True, "trusted": True})
+    else:
+        discovered = job.checkpointed(
+            "router_pipeline", discover,
+            router_mgmt_ips, interfaces, expected_lldp, job, workers,
+        )
+        lldp_topology = discovered["lldp_topology"]
+        ip_map = discovered["ip_map"]
+
+        if has_intent:
+            report = job.checkpointed(
+                "verify_intent", verify_intent,
+                expected_lldp, interfaces, lldp_topology, ip_map,
+            )
+            job.set_result("verification", report)
+            if not report["ok"]:
+                print(f"⚠️ Discovered topology differs from intent: {_summarize(report)}")
+                job.emit("intent_mismatch", **report)
+
+    graph = build_graph(lldp_topology)
+
+    job.set_result("lldp_topology", lldp_topology)
+    job.set_result("ip_map", ip_map)
+    job.set_result("graph", graph)
+
+    routes = job.checkpointed(
+        "install_routes", route_and_install,
+        router_mgmt_ips, lldp_topology, ip_map, job, workers,
+    )
+    job.set_result("grt", routes["grt"])
+    job.set_result("routes_installed", routes["routes_installed"])
+
+    return {
+        "routers_processed": len(router_mgmt_ips),
+        "topology_nodes": list(graph.keys()),
+        "status": "routes_installed",
+    }
@@ -0,0 +1,107 @@
+import time
+
+from backend.addressing import expected_lldp_topology, generate_interface_map
+from backend.fabric_config import ADMIN_USER_COMMAND, fabric_commands
+from backend.graph_utils import build_global_routing_table, build_graph
+from backend.install_routes import router_route_commands
+from backend.topology_gen import (
+    build_containerlab_yaml,
+    render_startup_config,
+    render_yaml,
+)
+
+
+def build_plan(payload, include_paths=True, include_backups=True):
+    """
+    Compute everything a deploy would do, in memory, without containerlab
+    or SSH.
+
+    The interface map doubles as the collected IP map and the expected
+    LLDP adjacency as the collected LLDP topology, so the GRT and route
+    commands are exactly what run_pipeline would produce on a correctly
+    cabled lab.
+
+    Returns:
+        {
+            "topology_yaml": "...",
+            "mgmt_ips": {"r1": "172.20.20.11", ...},
+            "interface_map": {"r1": {"Ethernet1": "10.0.0.1/30"}, ...},
+            "lldp_topology": {"r1": [("Ethernet1", "r2", "Ethernet1")], ...},
+            "grt": {"r1": {"10.0.0.4/30": {"next_hop": "r2", "cost": 1}}, ...},
+            "commands": {
+                "r1": {"fabric": [...], "routes": ["ip route ...", ...]},
+                ...
+            },
+            "timings_ms": {"topology": 0.4, ...},
+            "startup_configs": {"r1": "hostname r1\n..."},  # config_mode="startup" only
+        }
+    """
+    timings = {}
+    clock = time.perf_counter()
+
+    def lap(name):
+        nonlocal clock
+        now = time.perf_counter()
+        timings[name] = round((now - clock) * 1000, 3)
+        clock = now
+
+    routers = payload["routers"]
+    links = payload["links"]
+
+    topo, mgmt_ips = build_containerlab_yaml(payload)
+    topology_yaml = render_yaml(topo)
+    lap("topology")
+
+    interface_map = generate_interface_map(
+        routers, links, payload["p2p_pool"], payload["p2p_prefixlen"]
+    )
+    lap("interface_map")
+
+    lldp_topology = expected_lldp_topology(routers, links)
+    lap("lldp_topology")
+
+    graph = build_graph(lldp_topology)
+    grt = build_global_routing_table(
+        graph, interface_map, include_paths, include_backups
+    )
+    lap("grt")
+
+    commands = {}
+    startup_configs = {}
+    unresolved = []
+    render_configs = payload.get("config_mode") == "startup"
+
+    for router in routers:
+        route_commands, missing = router_route_commands(
+            router, lldp_topology, interface_map, grt
+        )
+        unresolved.extend(
+            {"router": router, "prefix": prefix, "next_router": next_router}
+            for prefix, next_router in missing
+        )
+        fabric = fabric_commands(interface_map[router])
+
+        commands[router] = {
+            "fabric": [ADMIN_USER_COMMAND] + fabric,
+            "routes": route_commands,
+        }
+        if render_configs:
+            startup_configs[router] = render_startup_config(
+                router, fabric, route_commands
+            )
+    lap("commands")
+
+    plan = {
+        "topology_yaml": topology_yaml,
+        "mgmt_ips": mgmt_ips,
+        "interface_map": interface_map,
+        "lldp_topology": lldp_topology,
+        "grt": grt,
+        "commands": commands,
+        "unresolved": unresolved,
+        "timings_ms": timings,
+    }
+    if render_configs:
+        plan["startup_configs"] = startup_configs
+
+    return plan
@@ -0,0 +1,236 @@
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+PROFILE_MODES = ("sample", "cprofile")
+SAMPLE_INTERVAL = float(os.environ.get("SDN_PROFILE_INTERVAL", "0.005"))
+DEFAULT_TOP = 30
+
+
+def resolve_mode(requested=None):
+    """
+    Profiling mode for a run: the request flag wins, then $SDN_PROFILE.
+    Returns None when profiling is off.
+    """
+    mode = requested or os.environ.get("SDN_PROFILE") or None
+    if mode in ("1", "true", "on"):
+        mode = "sample"
+    if mode is not None and mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode {mode!r}, use one of {PROFILE_MODES}")
+    return mode
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _idle_worker(frame):
+    """
+    A ThreadPoolExecutor worker blocked waiting for its next task: the
+    queue get is C code, so _worker is the innermost Python frame.
+    """
+    code = frame.f_code
+    return code.co_name == "_worker" and os.path.basename(code.co_filename) == "thread.py"
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampler: a background thread snapshots stacks every
+    `interval` seconds and counts collapsed stacks.
+
+    Follows the profiled thread and every thread started while profiling,
+    such as the pipeline's per-router workers. Their stacks are rooted at
+    "[<thread name>]" (pool index dropped). Idle pool workers are not
+    counted.
+    """
+
+    def __init__(self, thread_ident, interval=SAMPLE_INTERVAL):
+        self.thread_ident = thread_ident
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="profile-sampler", daemon=True
+        )
+        self._existing = set()
+        self._names = {}
+
+    def start(self):
+        self._existing = {t.ident for t in threading.enumerate()} - {self.thread_ident}
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _thread_root(self, ident):
+        if ident not in self._names:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            name = re.sub(r"[_-]\d+$", "", names.get(ident, "thread"))
+            self._names[ident] = f"[{name}]"
+        return self._names[ident]
+
+    def _run(self):
+        own = threading.get_ident()
+
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident in self._existing or _idle_worker(frame):
+                    continue
+
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if ident != self.thread_ident:
+                    stack.append(self._thread_root(ident))
+                if stack:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        """Brendan Gregg collapsed-stack format, one `stack count` per line."""
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+    def top(self, limit=DEFAULT_TOP):
+        total = sum(self.stacks.values()) or 1
+        self_counts = Counter()
+        total_counts = Counter()
+
+        for stack, n in self.stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += n
+            for fn in set(frames):
+                total_counts[fn] += n
+
+        return [
+            {
+                "function": fn,
+                "self_samples": self_counts[fn],
+                "total_samples": n,
+                "self_pct": round(100 * self_counts[fn] / total, 2),
+                "total_pct": round(100 * n / total, 2),
+            }
+            for fn, n in sorted(
+                total_counts.items(), key=lambda kv: (-self_counts[kv[0]], -kv[1])
+            )[:limit]
+        ]
+
+
+class ThreadedProfile:
+    """
+    cProfile for the calling thread and every thread started while it is
+    enabled (threading.setprofile starts one profiler per new thread),
+    merged into one pstats.Stats.
+    """
+
+    def __init__(self):
+        self.main = cProfile.Profile()
+        self.threads = []
+        self._lock = threading.Lock()
+
+    def _start_thread(self, *args):
+        # First profile event of a new thread: hand over to cProfile
+        sys.setprofile(None)
+        profiler = cProfile.Profile()
+        with self._lock:
+            self.threads.append(profiler)
+        profiler.enable()
+
+    def enable(self):
+        threading.setprofile(self._start_thread)
+        self.main.enable()
+
+    def disable(self):
+        self.main.disable()
+        threading.setprofile(None)
+
+    def stats(self):
+        stats = pstats.Stats(self.main)
+        with self._lock:
+            for profiler in self.threads:
+                stats.add(profiler)
+        return stats
+
+
+def _cprofile_top(stats, limit=DEFAULT_TOP):
+    rows = []
+    for (filename, line, name), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            "function": f"{name} ({os.path.basename(filename)}:{line})",
+            "calls": nc,
+            "self_seconds": round(tt, 6),
+            "total_seconds": round(ct, 6),
+        })
+    rows.sort(key=lambda r: -r["self_seconds"])
+    return rows[:limit]
+
+
+def profile_paths(out_dir, name):
+    return {
+        "collapsed": os.path.join(out_dir, f"{name}.collapsed"),
+        "top": os.path.join(out_dir, f"{name}.top.json"),
+        "pstats": os.path.join(out_dir, f"{name}.prof"),
+    }
+
+
+@contextmanager
+def profile(mode, name, out_dir):
+    """
+    Profile the enclosed block, in the current thread and every thread
+    started meanwhile (pool workers included), and save the result under
+    out_dir as <name>.collapsed / <name>.top.json (and <name>.prof
+    for cProfile). Yields a dict that is filled in with the saved paths.
+
+    With mode=None nothing is installed, so there is no overhead.
+    """
+    info = {"mode": mode, "files": {}}
+
+    if mode is None:
+        yield info
+        return
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = profile_paths(out_dir, name)
+    started = time.perf_counter()
+
+    if mode == "sample":
+        sampler = SamplingProfiler(threading.get_ident())
+        sampler.start()
+    else:
+        profiler = ThreadedProfile()
+        profiler.enable()
+
+    try:
+        yield info
+    finally:
+        if mode == "sample":
+            sampler.stop()
+            with open(paths["collapsed"], "w") as f:
+                f.write(sampler.collapsed())
+            top = sampler.top()
+            info["files"]["collapsed"] = paths["collapsed"]
+            info["samples"] = sum(sampler.stacks.values())
+        else:
+            profiler.disable()
+            stats = profiler.stats()
+            stats.dump_stats(paths["pstats"])
+            top = _cprofile_top(stats)
+            info["threads"] = 1 + len(profiler.threads)
+            info["files"]["pstats"] = paths["pstats"]
+
+        info["seconds"] = round(time.perf_counter() - started, 3)
+
+        with open(paths["top"], "w") as f:
+            json.dump(
+                {"mode": mode, "seconds": info["seconds"], "top": top}, f, indent=2
+            )
+        info["files"]["top"] = paths["top"]
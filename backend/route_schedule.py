@@ -0,0 +1,152 @@
+from backend.install_routes import BACKUP_DISTANCE, plan_router_routes
+
+
+def route_tables(lldp_topology, ip_map, grt, routers=None):
+    """
+    What every router (or just `routers`) forwards on, as computed by
+    install_routes:
+    {router: {prefix: (next_router, next_hop_ip, backup_next_hop_ip)}}.
+    """
+    return {
+        router: {
+            r["prefix"]: (r["next_router"], r["next_hop"], r["backup_next_hop"])
+            for r in plan_router_routes(router, lldp_topology, ip_map, grt)
+        }
+        for router in (grt if routers is None else routers)
+        if router in grt
+    }
+
+
+def diff_routes(old_tables, new_tables):
+    """
+    Route changes between two sets of route tables.
+
+    Returns:
+        {(router, prefix): {"old": (next_router, ip, backup_ip) or None,
+                            "new": (next_router, ip, backup_ip) or None}}
+    """
+    changes = {}
+
+    for router in set(old_tables) | set(new_tables):
+        old = old_tables.get(router, {})
+        new = new_tables.get(router, {})
+
+        for prefix in set(old) | set(new):
+            if old.get(prefix) != new.get(prefix):
+                changes[(router, prefix)] = {
+                    "old": old.get(prefix), "new": new.get(prefix),
+                }
+
+    return changes
+
+
+def _primary(entry):
+    return entry[:2] if entry else None
+
+
+def _downstream_changes(router, prefix, new_tables, changed, memo):
+    """
+    Number of changed routers strictly downstream of router on its new
+    path to prefix. Walks the next-hop chain once per prefix, memoised.
+    """
+    chain = []
+    node = router
+
+    while (node, prefix) not in memo:
+        entry = new_tables.get(node, {}).get(prefix)
+        if entry is None:
+            # prefix is connected here (or unreachable): the chain ends
+            memo[(node, prefix)] = 0
+            break
+        if node in chain:
+            raise ValueError(f"Forwarding loop toward {prefix} through {node}")
+        chain.append(node)
+        node = entry[0]
+
+    # Unwind: each node sees its next hop's count, plus one if that hop changes
+    for node in reversed(chain):
+        nxt = new_tables[node][prefix][0]
+        memo[(node, prefix)] = memo[(nxt, prefix)] + ((nxt, prefix) in changed)
+
+    return memo[(router, prefix)]
+
+
+def update_waves(changes, new_tables):
+    """
+    Order route changes into waves that never form a forwarding loop.
+
+    A router switches a prefix to its new next hop only after every
+    changed router further along its new path has switched, so traffic
+    follows old routes until it meets an updated router and the new tree
+    from there on. That is reverse shortest-path-tree order toward each
+    destination: routers nearest the destination go first. Changes of
+    different prefixes are independent and share waves. The number of
+    waves is the longest chain of dependent changes, which is the
+    minimum this ordering allows.
+
+    Changes to the floating backup alone don't move traffic and go in the
+    first wave. Withdrawn routes (no new next hop) go in a final wave,
+    after every router has moved off them.
+
+    Returns [{router: [(prefix, change), ...]}, ...] in push order.
+    """
+    rerouted = {
+        key for key, change in changes.items()
+        if change["new"] is not None and _primary(change["old"]) != _primary(change["new"])
+    }
+    memo = {}
+    waves = []
+    withdrawals = {}
+
+    for (router, prefix), change in sorted(changes.items()):
+        if change["new"] is None:
+            withdrawals.setdefault(router, []).append((prefix, change))
+            continue
+
+        rank = (
+            _downstream_changes(router, prefix, new_tables, rerouted, memo)
+            if (router, prefix) in rerouted else 0
+        )
+        while len(waves) <= rank:
+            waves.append({})
+        waves[rank].setdefault(router, []).append((prefix, change))
+
+    if withdrawals:
+        waves.append(withdrawals)
+
+    return waves
+
+
+def change_commands(prefix, change):
+    """
+    EOS config lines for one route change, primary and floating backup.
+
+    The new primary is added before the old one is removed, so the prefix
+    is never without a route. The old backup goes first and the new one
+    last, so a next hop that swaps roles is never configured at both
+    distances at once.
+    """
+    _, old_ip, old_backup = change["old"] or (None, None, None)
+    _, new_ip, new_backup = change["new"] or (None, None, None)
+
+    commands = []
+    if old_backup and old_backup != new_backup:
+        commands.append(f"no ip route {prefix} {old_backup} {BACKUP_DISTANCE}")
+    if new_ip and new_ip != old_ip:
+        commands.append(f"ip route {prefix} {new_ip}")
+    if old_ip and old_ip != new_ip:
+        commands.append(f"no ip route {prefix} {old_ip}")
+    if new_backup and new_backup != old_backup:
+        commands.append(f"ip route {prefix} {new_backup} {BACKUP_DISTANCE}")
+    return commands
+
+
+def wave_summary(waves):
+    return [
+        {
+            "wave": i,
+            "routers": sorted(wave),
+            "changes": sum(len(c) for c in wave.values()),
+        }
+        for i, wave in enumerate(waves)
+    ]
@@ -0,0 +1,383 @@
+import bisect
+import ipaddress
+import itertools
+import threading
+import time
+
+from backend.events import EventStream
+from backend.graph_utils import build_graph
+from backend.install_routes import plan_router_routes
+from backend.verify import link_key, link_set
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class StaleCursor(ValueError):
+    pass
+
+
+def _host(ip_cidr):
+    return ip_cidr.split("/")[0] if ip_cidr else None
+
+
+class RoutingState:
+    """
+    Read-only, indexed snapshot of one controller run.
+
+    Routes are stored column-wise (one list per field, one row per route)
+    with indexes from router, prefix and next hop (router name or IP) to
+    ascending row ids, so filtered queries only touch matching rows and
+    the row id doubles as a stable pagination cursor.
+    """
+
+    def __init__(self, lldp_topology, ip_map, grt, lab=None, version=0):
+        self.lab = lab
+        self.version = version
+        self.created_at = time.time()
+        self.lldp_topology = lldp_topology
+        self.ip_map = ip_map
+        self.graph = build_graph(lldp_topology)
+
+        self._router = []
+        self._prefix = []
+        self._next_router = []
+        self._next_hop = []
+        self._cost = []
+        self._backup_hop = []
+
+        self.by_router = {}
+        self.by_prefix = {}
+        self.by_via = {}
+        self.prefix_lengths = set()
+        self._link_loads = None
+        self._rows_by_key = None
+
+        for router in sorted(grt):
+            table = grt[router]
+            for route in plan_router_routes(router, lldp_topology, ip_map, grt):
+                row = len(self._router)
+                prefix = route["prefix"]
+
+                self._router.append(router)
+                self._prefix.append(prefix)
+                self._next_router.append(route["next_router"])
+                self._next_hop.append(route["next_hop"])
+                self._cost.append(table[prefix]["cost"])
+                self._backup_hop.append(route["backup_next_hop"])
+
+                self.by_router.setdefault(router, []).append(row)
+                self.by_prefix.setdefault(prefix, []).append(row)
+                self.by_via.setdefault(route["next_router"], []).append(row)
+                if route["next_hop"]:
+                    self.by_via.setdefault(route["next_hop"], []).append(row)
+                self.prefix_lengths.add(int(prefix.rsplit("/", 1)[1]))
+
+    @property
+    def route_count(self):
+        return len(self._router)
+
+    def _row(self, row):
+        return {
+            "router": self._router[row],
+            "prefix": self._prefix[row],
+            "next_router": self._next_router[row],
+            "next_hop": self._next_hop[row],
+            "cost": self._cost[row],
+            "backup_next_hop": self._backup_hop[row],
+        }
+
+    def iter_routes(self, router=None):
+        """
+        Every route (or every route of one router) in row order, one dict
+        at a time.
+        """
+        rows = self.by_router.get(router, []) if router is not None else range(self.route_count)
+        for row in rows:
+            yield self._row(row)
+
+    def router_columns(self, router):
+        """
+        Routes of one router as parallel column lists.
+        """
+        rows = self.by_router.get(router, [])
+        return {
+            "router": router,
+            "prefix": [self._prefix[r] for r in rows],
+            "next_router": [self._next_router[r] for r in rows],
+            "next_hop": [self._next_hop[r] for r in rows],
+            "cost": [self._cost[r] for r in rows],
+            "backup_next_hop": [self._backup_hop[r] for r in rows],
+        }
+
+    def route_tables(self):
+        """
+        {router: {prefix: (next_router, next_hop, backup_next_hop)}}, the
+        shape route_schedule.route_tables() builds for a new GRT.
+        """
+        tables = {}
+        for row in range(self.route_count):
+            tables.setdefault(self._router[row], {})[self._prefix[row]] = (
+                self._next_router[row], self._next_hop[row], self._backup_hop[row]
+            )
+        return tables
+
+    def link_loads(self):
+        """
+        {link key: routes forwarded over it, both directions}, with keys
+        from verify.link_key. Computed on first use, once per state.
+        """
+        if self._link_loads is not None:
+            return self._link_loads
+
+        owner = {
+            _host(ip): (router, iface)
+            for router, ifaces in self.ip_map.items()
+            for iface, ip in ifaces.items()
+        }
+        egress = {
+            (router, neighbor, remote_if): local_if
+            for router, neighbors in self.lldp_topology.items()
+            for local_if, neighbor, remote_if in neighbors
+        }
+
+        per_hop = {}
+        for router, hop in zip(self._router, self._next_hop):
+            per_hop[(router, hop)] = per_hop.get((router, hop), 0) + 1
+
+        loads = dict.fromkeys(link_set(self.lldp_topology), 0)
+        for (router, hop), count in per_hop.items():
+            neighbor, remote_if = owner.get(hop, (None, None))
+            local_if = egress.get((router, neighbor, remote_if))
+            if local_if is not None:
+                loads[link_key(router, local_if, neighbor, remote_if)] += count
+
+        self._link_loads = loads
+        return loads
+
+    def _prefix_rows(self, prefix):
+        """
+        Rows for an exact prefix, or for every prefix containing an address.
+        """
+        if "/" in prefix:
+            return self.by_prefix.get(str(ipaddress.ip_network(prefix, strict=False)), [])
+
+        addr = ipaddress.ip_address(prefix)
+        rows = []
+        for length in sorted(self.prefix_lengths, reverse=True):
+            net = str(ipaddress.ip_network(f"{addr}/{length}", strict=False))
+            rows.extend(self.by_prefix.get(net, []))
+        return sorted(rows)
+
+    def encode_cursor(self, row):
+        return f"{self.version}.{row}"
+
+    def decode_cursor(self, cursor):
+        try:
+            version, row = (int(part) for part in cursor.split("."))
+        except ValueError:
+            raise StaleCursor(f"Malformed cursor {cursor!r}")
+        if version != self.version:
+            raise StaleCursor("Cursor is from an older routing state, restart the query")
+        return row
+
+    def routes(self, router=None, prefix=None, via=None, cursor=None,
+               limit=DEFAULT_PAGE_SIZE):
+        """
+        Page of routes matching every given filter, in row order.
+
+        Returns:
+            {"routes": [...], "next_cursor": "3.200" or None, "version": 3}
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        candidates = []
+        if router is not None:
+            candidates.append(self.by_router.get(router, []))
+        if prefix is not None:
+            candidates.append(self._prefix_rows(prefix))
+        if via is not None:
+            candidates.append(self.by_via.get(via, []))
+
+        if candidates:
+            # Walk the most selective index, check the others by membership
+            candidates.sort(key=len)
+            rows = candidates[0]
+            others = [set(c) for c in candidates[1:]]
+        else:
+            rows = range(self.route_count)
+            others = []
+
+        start = 0
+        if cursor:
+            after = self.decode_cursor(cursor)
+            start = bisect.bisect_right(rows, after)
+
+        page = []
+        last = None
+        for i in range(start, len(rows)):
+            row = rows[i]
+            if all(row in other for other in others):
+                if len(page) == limit:
+                    break
+                page.append(self._row(row))
+                last = row
+        else:
+            last = None
+
+        return {
+            "version": self.version,
+            "routes": page,
+            "next_cursor": self.encode_cursor(last) if last is not None else None,
+        }
+
+    def neighbors(self, router):
+        """
+        LLDP neighbors of router with the addresses on both ends, or None
+        if router is unknown.
+        """
+        if router not in self.lldp_topology:
+            return None
+
+        local_ips = self.ip_map.get(router, {})
+        return [
+            {
+                "local_interface": local_if,
+                "local_ip": local_ips.get(local_if),
+                "neighbor": neighbor,
+                "neighbor_interface": remote_if,
+                "neighbor_ip": self.ip_map.get(neighbor, {}).get(remote_if),
+            }
+            for local_if, neighbor, remote_if in self.lldp_topology[router]
+        ]
+
+    def _route_row(self, router, prefix):
+        if self._rows_by_key is None:
+            self._rows_by_key = {
+                (r, p): row for row, (r, p) in enumerate(zip(self._router, self._prefix))
+            }
+        return self._rows_by_key.get((router, prefix))
+
+    def _egress(self, router, neighbor, next_hop):
+        """Local interface of router facing the neighbor that owns next_hop."""
+        for local_if, peer, remote_if in self.lldp_topology.get(router, []):
+            if peer == neighbor and _host(self.ip_map.get(peer, {}).get(remote_if)) == next_hop:
+                return local_if
+        return None
+
+    def _walk(self, src, dst, prefix):
+        """
+        Hops the installed routes take from src toward one of dst's
+        prefixes, ending with the delivery to dst on that prefix, or None
+        if they don't get there.
+        """
+        hops = []
+        curr = src
+
+        for _ in range(len(self.graph) + 1):
+            row = self._route_row(curr, prefix)
+            if row is None:
+                break
+            hops.append({
+                "router": curr,
+                "interface": self._egress(curr, self._next_router[row], self._next_hop[row]),
+                "next_router": self._next_router[row],
+                "next_hop": self._next_hop[row],
+            })
+            curr = self._next_router[row]
+        else:
+            return None
+
+        if curr == dst:
+            return hops
+
+        # curr is the other end of dst's link: it delivers on the subnet
+        for local_if, peer, remote_if in self.lldp_topology.get(curr, []):
+            dst_ip = self.ip_map.get(dst, {}).get(remote_if) if peer == dst else None
+            if dst_ip and str(ipaddress.ip_interface(dst_ip).network) == prefix:
+                return hops + [{
+                    "router": curr, "interface": local_if,
+                    "next_router": dst, "next_hop": _host(dst_ip),
+                }]
+        return None
+
+    def path(self, src, dst):
+        """
+        Path the installed routes take from src to dst, with the egress
+        interface and next-hop address of every hop, or None if they
+        don't reach it.
+
+        Follows each router's route for a prefix of dst (the one reached
+        in the fewest hops), so it is the path in the routing tables, not
+        a fresh search that may break ties differently.
+        """
+        if src == dst:
+            return {"src": src, "dst": dst, "cost": 0, "prefix": None,
+                    "path": [src], "hops": []}
+
+        best = None
+        for iface in sorted(self.ip_map.get(dst, {})):
+            prefix = str(ipaddress.ip_interface(self.ip_map[dst][iface]).network)
+            hops = self._walk(src, dst, prefix)
+            if hops is not None and (best is None or len(hops) < len(best[1])):
+                best = (prefix, hops)
+
+        if best is None:
+            return None
+
+        prefix, hops = best
+        nodes = [h["router"] for h in hops] + [dst]
+        return {"src": src, "dst": dst, "cost": len(hops), "prefix": prefix,
+                "path": nodes, "hops": hops}
+
+    def summary(self):
+        return {
+            "lab": self.lab,
+            "version": self.version,
+            "created_at": self.created_at,
+            "routers": len(self.graph),
+            "routes": self.route_count,
+        }
+
+
+class RoutingStore:
+    """
+    Latest RoutingState per lab, replaced atomically on each publish.
+
+    `changes` carries a {"type": "routing", "lab": ...} event for every
+    publish and drop, for live views that follow a lab.
+    """
+
+    def __init__(self):
+        self._states = {}
+        self._latest = None
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+        # Notifications only: subscribers read the current state themselves
+        self.changes = EventStream(history=0)
+
+    def publish(self, lab, lldp_topology, ip_map, grt):
+        state = RoutingState(
+            lldp_topology, ip_map, grt, lab=lab, version=next(self._versions)
+        )
+        with self._lock:
+            self._states[lab] = state
+            self._latest = lab
+        self.changes.publish("routing", lab=lab, version=state.version)
+        return state
+
+    def get(self, lab=None):
+        with self._lock:
+            return self._states.get(lab if lab is not None else self._latest)
+
+    def drop(self, lab):
+        with self._lock:
+            self._states.pop(lab, None)
+            if self._latest == lab:
+                self._latest = next(reversed(self._states), None)
+        self.changes.publish("routing", lab=lab, version=None)
+
+    def snapshot(self):
+        with self._lock:
+            return [state.summary() for state in self._states.values()]
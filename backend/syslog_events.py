@@ -0,0 +1,257 @@
+"""
+UDP syslog receiver for router link events.
+
+Routers send syslog to the controller (`logging host`). Link up/down and
+LLDP neighbor messages are parsed into topology events and handed to the
+link-state monitor of the lab the sender belongs to:
+
+    {"router": "r1", "interface": "Ethernet1", "kind": "link", "state": "down"}
+
+To try it without routers, send a message from the local host:
+
+    python -m backend.syslog_events --host 172.20.20.1 r1 "%LINEPROTO-5-UPDOWN: Line protocol on Interface Ethernet1, changed state to down"
+"""
+import argparse
+import asyncio
+import ipaddress
+import os
+import re
+import socket
+import time
+
+from backend.metrics import SYSLOG_MESSAGES
+
+
+# Unset: listen on each monitored lab's management gateway only
+SYSLOG_BIND = os.environ.get("SDN_SYSLOG_BIND")
+# 0 disables the receiver; monitors then only poll
+SYSLOG_PORT = int(os.environ.get("SDN_SYSLOG_PORT", "5514"))
+# Address routers send to; defaults to their lab's management gateway
+SYSLOG_HOST = os.environ.get("SDN_SYSLOG_HOST")
+
+# RFC 3164: "<PRI>Mmm dd hh:mm:ss HOST PROCESS[PID]: %FAC-SEV-MNEMONIC: text"
+HEADER_RE = re.compile(
+    r"^(?:<\d+>)?(?:[A-Z][a-z]{2}\s+\d+\s+\d\d:\d\d:\d\d\s+)?(?P<host>\S+)\s+\S+?:\s+%"
+)
+MESSAGE_RE = re.compile(r"%(?P<facility>[A-Z0-9_]+)-\d-(?P<mnemonic>[A-Z0-9_]+):\s*(?P<text>.*)")
+
+LINK_RE = re.compile(r"Interface (?P<iface>\S+?),? changed state to (?P<state>up|down)")
+LLDP_RE = re.compile(
+    r'portId "?(?P<port>[^"\s]+)"?.* (?:on|from) interface (?P<iface>\S+)'
+)
+
+LINK_FACILITIES = {"LINEPROTO", "LINK"}
+LLDP_STATES = {"NEIGHBOR_NEW": "up", "NEIGHBOR_DEL": "down", "NEIGHBOR_AGEOUT": "down"}
+
+
+def parse_syslog(message):
+    """
+    Topology event from one syslog line, or None if it isn't one.
+
+    Understands cEOS link and LLDP messages:
+        %LINEPROTO-5-UPDOWN: Line protocol on Interface Ethernet1, changed state to down
+        %LINK-3-UPDOWN: Interface Ethernet1, changed state to up
+        %LLDP-5-NEIGHBOR_NEW: LLDP neighbor with chassisId 001c.7300.0001 and
+            portId "Ethernet1" added on interface Ethernet2
+        %LLDP-5-NEIGHBOR_DEL: ... removed from interface Ethernet2
+
+    Returns:
+        {"router": "r1" or None, "interface": "Ethernet1",
+         "kind": "link" | "lldp", "state": "up" | "down",
+         "remote_interface": "Ethernet1" (lldp only)}
+    """
+    body = MESSAGE_RE.search(message)
+    if body is None:
+        return None
+
+    header = HEADER_RE.match(message)
+    event = {"router": header.group("host") if header else None}
+    facility, mnemonic, text = body.group("facility", "mnemonic", "text")
+
+    if facility in LINK_FACILITIES and mnemonic == "UPDOWN":
+        match = LINK_RE.search(text)
+        if match is None:
+            return None
+        event.update(kind="link", interface=match.group("iface"), state=match.group("state"))
+
+    elif facility == "LLDP" and mnemonic in LLDP_STATES:
+        match = LLDP_RE.search(text)
+        if match is None:
+            return None
+        event.update(
+            kind="lldp", interface=match.group("iface"), state=LLDP_STATES[mnemonic],
+            remote_interface=match.group("port"),
+        )
+
+    else:
+        return None
+
+    if event["interface"].lower().startswith("management"):
+        return None
+    return event
+
+
+class _Protocol(asyncio.DatagramProtocol):
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def datagram_received(self, data, addr):
+        self.receiver.received(data.decode("utf-8", "replace"), addr[0])
+
+
+class SyslogReceiver:
+    """
+    UDP listeners shared by every monitored lab: one on each lab's
+    management gateway, or a single one on `bind` if it is set.
+
+    Monitors subscribe with their routers' management IPs. A message is
+    routed by its source address. Messages are not authenticated, so the
+    hostname in the header is only trusted from the controller host itself
+    (a local test sender), and only if exactly one subscribed lab has a
+    router of that name.
+    """
+
+    def __init__(self, bind=SYSLOG_BIND, port=SYSLOG_PORT):
+        self.bind = bind
+        self.port = port
+        # address -> transport
+        self._transports = {}
+        self._loop = None
+        # mgmt_ip -> (lab, router); lab -> callback(router, event, received_at)
+        self._sources = {}
+        self._callbacks = {}
+        self.received_count = 0
+
+    @property
+    def enabled(self):
+        return self.port > 0
+
+    @property
+    def listening(self):
+        return bool(self._addresses())
+
+    def _addresses(self):
+        return sorted(a for a, t in self._transports.items() if not t.is_closing())
+
+    async def start(self, address):
+        """
+        Listen on `address` (a lab's management gateway), or on `bind` if
+        set, on the running loop if not already. Returns False if the
+        receiver is disabled or the port can't be bound.
+        """
+        if not self.enabled:
+            return False
+
+        address = self.bind or address
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self.close()
+        if address in self._addresses():
+            return True
+
+        try:
+            self._transports[address], _ = await loop.create_datagram_endpoint(
+                lambda: _Protocol(self), local_addr=(address, self.port),
+            )
+        except OSError as e:
+            print(f"⚠️ Syslog receiver can't listen on {address}:{self.port}: {e}")
+            return False
+
+        self._loop = loop
+        return True
+
+    def close(self):
+        for transport in self._transports.values():
+            transport.close()
+        self._transports = {}
+
+    def subscribe(self, lab, mgmt_ips, callback):
+        self.unsubscribe(lab)
+        for router, mgmt_ip in mgmt_ips.items():
+            self._sources[mgmt_ip] = (lab, router)
+        self._callbacks[lab] = callback
+
+    def unsubscribe(self, lab):
+        self._callbacks.pop(lab, None)
+        self._sources = {ip: src for ip, src in self._sources.items() if src[0] != lab}
+
+    def _local(self, addr):
+        """Sent from the controller host: loopback or a listening address."""
+        try:
+            return ipaddress.ip_address(addr).is_loopback or addr in self._transports
+        except ValueError:
+            return False
+
+    def _source(self, addr, hostname):
+        if addr in self._sources:
+            return self._sources[addr]
+        if not self._local(addr):
+            return None
+
+        matches = [src for src in self._sources.values() if src[1] == hostname]
+        return matches[0] if len(matches) == 1 else None
+
+    def received(self, message, addr):
+        received_at = time.monotonic()
+        self.received_count += 1
+
+        event = parse_syslog(message)
+        if event is None:
+            SYSLOG_MESSAGES.labels("ignored").inc()
+            return
+
+        source = self._source(addr, event["router"])
+        if source is None or source[0] not in self._callbacks:
+            SYSLOG_MESSAGES.labels("unknown_source").inc()
+            return
+
+        lab, router = source
+        event["router"] = router
+        SYSLOG_MESSAGES.labels("event").inc()
+        self._callbacks[lab](router, event, received_at)
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "listening": self.listening,
+            "bind": self._addresses() if self.listening else self.bind,
+            "port": self.port,
+            "received": self.received_count,
+            "labs": sorted(self._callbacks),
+        }
+
+
+def syslog_commands(host, port):
+    """
+    EOS config that sends link and LLDP messages to the controller.
+    """
+    return [
+        f"logging host {host} {port} protocol udp",
+        "logging level LLDP notifications",
+    ]
+
+
+def format_syslog(router, message, severity=5, facility=23):
+    """An RFC 3164 line as cEOS would send it."""
+    timestamp = time.strftime("%b %d %H:%M:%S")
+    return f"<{facility * 8 + severity}>{timestamp} {router} Ebra: {message}"
+
+
+def send_syslog(router, message, host="127.0.0.1", port=SYSLOG_PORT):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.sendto(format_syslog(router, message).encode(), (host, port))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send a test syslog message to the controller")
+    parser.add_argument("router")
+    parser.add_argument("message")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=SYSLOG_PORT)
+    args = parser.parse_args(argv)
+
+    send_syslog(args.router, args.message, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,61 @@
 import yaml
 
+from backend.ipam import allocate_hosts
 
-def _base_from_subnet(subnet_cidr):
+
+BASE_STARTUP_CONFIG = [
+    "service routing protocols model multi-agent",
+    "lldp run",
+    "",
+    "username admin privilege 15 role network-admin secret admin",
+    "",
+    "management ssh",
+    "   no shutdown",
+    "",
+    "management api http-commands",
+    "   protocol http",
+    "   no shutdown",
+]
+
+
+def base_startup_config(hostname):
     """
-    Example:
-        "172.20.20.0/24"
-    Returns:
-        "172.20.20"
+    The config every router boots with, as lines. hostname may be the
+    containerlab template "{{ .Name }}" for the shared kind-level config.
     """
-    ip = subnet_cidr.split("/")[0]
-    return ip.rsplit(".", 1)[0]
+    return [f"hostname {hostname}"] + BASE_STARTUP_CONFIG
 
 
-def build_containerlab_yaml(payload):
+def render_startup_config(router, fabric, routes):
+    """
+    Full EOS startup-config for one router: the base config plus the same
+    interface and static route commands the SSH path would push.
+
+    fabric: fabric_commands() output, e.g. ["interface Ethernet1", "no switchport", ...]
+    routes: ["ip route 10.0.0.4/30 10.0.0.2", ...]
+    """
+    lines = base_startup_config(router) + [""]
+
+    for command in fabric:
+        if command.startswith("interface "):
+            lines.append(command)
+        else:
+            lines.append(f"   {command}")
+    lines.append("")
+
+    lines.extend(routes)
+    lines.append("")
+
+    return "\n".join(lines)
+
+
+def build_containerlab_yaml(payload, startup_configs=None):
     """
     Builds containerlab topology dict and management IP map.
 
+    startup_configs: optional {router: path to a rendered startup-config}
+    overriding the shared bare config for those nodes.
+
     Returns:
         topo_dict
         mgmt_ips (dict)
@@ -28,14 +68,13 @@ def build_containerlab_yaml(payload):
     image = payload.get("ceos_image", "ceos:4.35.1F")
 
     # Assign management IPs deterministically (.11, .12, ...)
-    base = _base_from_subnet(mgmt_subnet)
-    start_host = 11
-    mgmt_ips = {r: f"{base}.{start_host + i}" for i, r in enumerate(routers)}
+    mgmt_ips = allocate_hosts(mgmt_subnet, routers)
 
     topo = {
         "name": name,
         "mgmt": {
-            "network": "clab",
+            # One management network per lab so labs can run side by side
+            "network": f"clab-{name}",
             "ipv4-subnet": mgmt_subnet,
         },
         "topology": {
@@ -43,20 +82,7 @@ def build_containerlab_yaml(payload):
                 "ceos": {
                     "image": image,
                     "env": {"INTFTYPE": "eth"},
-                    "startup-config": "\n".join([
-                        "hostname {{ .Name }}",
-                        "service routing protocols model multi-agent",
-                        "lldp run",
-                        "",
-                  "username admin privilege 15 role network-admin secret admin",
-                  "",
-                  "management ssh",
-                   "no shutdown",
-                    "",
-                        "management api http-commands",
-                        "  protocol http",
-                        "  no shutdown",
-                    ]),
+                    "startup-config": "\n".join(base_startup_config("{{ .Name }}")),
                 }
             },
             "nodes": {},
@@ -70,6 +96,8 @@ def build_containerlab_yaml(payload):
             "kind": "ceos",
             "mgmt-ipv4": mgmt_ips[r],
         }
+        if startup_configs and r in startup_configs:
+            topo["topology"]["nodes"][r]["startup-config"] = startup_configs[r]
 
     # Assign link interfaces (eth1, eth2, etc.)
     if_counter = {r: 1 for r in routers}
@@ -87,6 +115,14 @@ def build_containerlab_yaml(payload):
     return topo, mgmt_ips
 
 
+# libyaml's emitter is several times faster when PyYAML was built with it
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def render_yaml(data):
+    return yaml.dump(data, Dumper=_YAML_DUMPER, sort_keys=False)
+
+
 def dump_yaml(data, path):
     with open(path, "w") as f:
-        yaml.safe_dump(data, f, sort_keys=False)
+        yaml.dump(data, f, Dumper=_YAML_DUMPER, sort_keys=False)
@@ -0,0 +1,219 @@
+import itertools
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+
+MAX_SPANS = 20000
+STRAGGLER_FACTOR = 1.5
+GANTT_WIDTH = 60
+
+
+class Span:
+    __slots__ = ("id", "parent_id", "name", "attrs", "start", "end", "thread")
+
+    def __init__(self, span_id, parent_id, name, attrs):
+        self.id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end = None
+        self.thread = threading.current_thread().name
+
+    def to_dict(self, origin):
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "attrs": self.attrs,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": (
+                round((self.end - self.start) * 1000, 3)
+                if self.end is not None else None
+            ),
+            "thread": self.thread,
+        }
+
+
+class Tracer:
+    """
+    Minimal in-process tracer.
+
+    Spans nest automatically within a thread; work handed to another thread
+    passes `parent=` explicitly:
+
+        with tracer.span("deploy"):
+            with tracer.span("stage", stage="lldp_collect") as stage:
+                pool.submit(work, parent=stage)
+    """
+
+    def __init__(self, max_spans=MAX_SPANS):
+        self.origin = time.perf_counter()
+        self.wall_origin = time.time()
+        self.max_spans = max_spans
+        self.dropped = 0
+        self._spans = []
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def current(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name, parent=None, **attrs):
+        stack = self._stack()
+        if parent is None and stack:
+            parent = stack[-1]
+
+        span = Span(next(self._ids), parent.id if parent else None, name, attrs)
+
+        with self._lock:
+            if len(self._spans) < self.max_spans:
+                self._spans.append(span)
+            else:
+                self.dropped += 1
+
+        stack.append(span)
+        try:
+            yield span
+        except Exception as e:
+            span.attrs["error"] = str(e)
+            raise
+        finally:
+            span.end = time.perf_counter()
+            stack.pop()
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def to_json(self):
+        """
+        Nested span tree:
+            [{"name": "deploy", ..., "children": [{"name": "stage", ...}]}]
+        """
+        nodes = {}
+        roots = []
+
+        for span in self.spans():
+            node = span.to_dict(self.origin)
+            node["children"] = []
+            nodes[span.id] = node
+
+            parent = nodes.get(span.parent_id)
+            if parent is not None:
+                parent["children"].append(node)
+            else:
+                roots.append(node)
+
+        return {
+            "started_at": self.wall_origin,
+            "dropped_spans": self.dropped,
+            "spans": roots,
+        }
+
+    def timeline(self):
+        """
+        Flat Gantt rows ordered by start time, plus per-stage stragglers.
+        """
+        spans = self.spans()
+        by_id = {s.id: s for s in spans}
+        rows = []
+
+        for span in sorted(spans, key=lambda s: s.start):
+            depth = 0
+            parent = by_id.get(span.parent_id)
+            while parent is not None:
+                depth += 1
+                parent = by_id.get(parent.parent_id)
+
+            row = span.to_dict(self.origin)
+            row["depth"] = depth
+            row["label"] = _label(span)
+            rows.append(row)
+
+        return {
+            "started_at": self.wall_origin,
+            "rows": rows,
+            "stragglers": self._stragglers(spans),
+        }
+
+    def _stragglers(self, spans):
+        """
+        Routers whose per-stage span took more than STRAGGLER_FACTOR times
+        the stage median.
+        """
+        per_stage = {}
+        for span in spans:
+            if span.name == "router" and span.end is not None:
+                per_stage.setdefault(span.attrs.get("stage"), []).append(span)
+
+        result = {}
+        for stage, stage_spans in per_stage.items():
+            durations = [s.end - s.start for s in stage_spans]
+            median = statistics.median(durations)
+            slow = [
+                {
+                    "router": s.attrs.get("router"),
+                    "duration_ms": round(d * 1000, 3),
+                    "median_ms": round(median * 1000, 3),
+                }
+                for s, d in zip(stage_spans, durations)
+                if len(durations) > 1 and d > median * STRAGGLER_FACTOR
+            ]
+            if slow:
+                result[stage] = slow
+        return result
+
+    def gantt_text(self, width=GANTT_WIDTH):
+        """
+        Plain-text Gantt chart, one bar per span.
+        """
+        timeline = self.timeline()
+        rows = timeline["rows"]
+        if not rows:
+            return ""
+
+        now_ms = (time.perf_counter() - self.origin) * 1000
+        total = max(
+            (r["start_ms"] + (r["duration_ms"] or now_ms - r["start_ms"]))
+            for r in rows
+        ) or 1
+
+        label_width = max(len("  " * r["depth"] + r["label"]) for r in rows)
+        lines = []
+
+        for r in rows:
+            duration = r["duration_ms"]
+            if duration is None:
+                duration = now_ms - r["start_ms"]
+            begin = int(r["start_ms"] / total * width)
+            length = max(1, int(duration / total * width))
+            bar = " " * begin + "█" * length
+            label = ("  " * r["depth"] + r["label"]).ljust(label_width)
+            lines.append(f"{label} |{bar.ljust(width)}| {duration:10.1f} ms")
+
+        return "\n".join(lines) + "\n"
+
+
+def _label(span):
+    if span.name == "stage":
+        return span.attrs.get("stage", "stage")
+    if span.name == "router":
+        label = span.attrs.get("router", "router")
+        stage = span.attrs.get("stage")
+        return f"{label} {stage}" if stage else label
+    if span.name == "command":
+        return f"{span.attrs.get('call')}: {span.attrs.get('command', '')}"[:60]
+    return span.name
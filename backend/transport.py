@@ -0,0 +1,76 @@
+import time
+from contextlib import nullcontext
+
+from backend.metrics import DEVICE_COMMAND_SECONDS, SSH_CONNECT_SECONDS
+
+
+class DeviceSession:
+    """
+    Netmiko connection wrapper that records connect and command latency,
+    and a trace span per command when a tracer is given.
+
+    Anything not overridden here is passed through to the underlying
+    connection, so callers use it exactly like a ConnectHandler.
+    """
+
+    def __init__(self, conn, router, tracer=None):
+        self.conn = conn
+        self.router = router
+        self.tracer = tracer
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def _span(self, call, command):
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.span(
+            "command", router=self.router, call=call, command=command
+        )
+
+    def _timed(self, kind, call, command, fn, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with self._span(call, command):
+                return fn(*args, **kwargs)
+        finally:
+            DEVICE_COMMAND_SECONDS.labels(self.router, kind).observe(
+                time.perf_counter() - started
+            )
+
+    def send_command(self, command, **kwargs):
+        return self._timed(
+            "command", "send_command", command,
+            self.conn.send_command, command, **kwargs
+        )
+
+    def send_config_set(self, commands, **kwargs):
+        summary = "; ".join(commands[:3]) + (" ..." if len(commands) > 3 else "")
+        return self._timed(
+            "config", "send_config_set", summary,
+            self.conn.send_config_set, commands, **kwargs
+        )
+
+
+def connect(device, router, tracer=None):
+    """
+    Open an SSH session to `router`, enter enable mode and return a
+    DeviceSession.
+    """
+    # netmiko pulls in paramiko, cryptography and textfsm; importing it
+    # here keeps API startup (and every non-device request) free of it
+    from netmiko import ConnectHandler
+
+    started = time.perf_counter()
+    span = (
+        tracer.span("connect", router=router, host=device.get("host"))
+        if tracer else nullcontext()
+    )
+
+    with span:
+        conn = ConnectHandler(**device)
+        conn.enable()
+
+    SSH_CONNECT_SECONDS.labels(router).observe(time.perf_counter() - started)
+
+    return DeviceSession(conn, router, tracer)
@@ -0,0 +1,127 @@
+def link_key(router_a, iface_a, router_b, iface_b):
+    """
+    Direction-independent key for one cable.
+    """
+    a = (router_a, iface_a)
+    b = (router_b, iface_b)
+    return (a, b) if a <= b else (b, a)
+
+
+def link_set(lldp_topology):
+    """
+    Hashed set of cables from LLDP-shaped adjacency. A cable seen from
+    either end (or both) appears once.
+    """
+    links = set()
+    for router, neighbors in lldp_topology.items():
+        for local_if, neighbor, remote_if in neighbors:
+            links.add(link_key(router, local_if, neighbor, remote_if))
+    return links
+
+
+def _router_pair(key):
+    return tuple(sorted((key[0][0], key[1][0])))
+
+
+def format_link(key):
+    (ra, ia), (rb, ib) = key
+    return [f"{ra}:{ia}", f"{rb}:{ib}"]
+
+
+def compare_links(expected_lldp, discovered_lldp):
+    """
+    Compare intended and discovered cabling in one pass over each side.
+
+    A missing and an unexpected cable between the same two routers are
+    reported together as a swapped interface rather than separately.
+
+    Returns:
+        {
+            "missing_links": [["r1:Ethernet1", "r2:Ethernet1"], ...],
+            "unexpected_links": [...],
+            "swapped_interfaces": [
+                {"expected": ["r1:Ethernet1", "r3:Ethernet1"],
+                 "discovered": ["r1:Ethernet2", "r3:Ethernet1"]},
+            ],
+        }
+    """
+    expected = link_set(expected_lldp)
+    discovered = link_set(discovered_lldp)
+
+    missing = expected - discovered
+    unexpected = discovered - expected
+
+    # Index missing cables by router pair so each unexpected one is an O(1) lookup
+    missing_by_pair = {}
+    for key in missing:
+        missing_by_pair.setdefault(_router_pair(key), []).append(key)
+
+    swapped = []
+    for key in sorted(unexpected):
+        candidates = missing_by_pair.get(_router_pair(key))
+        if candidates:
+            intended = candidates.pop()
+            missing.discard(intended)
+            swapped.append((intended, key))
+    unexpected -= {found for _, found in swapped}
+
+    return {
+        "missing_links": [format_link(k) for k in sorted(missing)],
+        "unexpected_links": [format_link(k) for k in sorted(unexpected)],
+        "swapped_interfaces": [
+            {"expected": format_link(intended), "discovered": format_link(found)}
+            for intended, found in swapped
+        ],
+    }
+
+
+def compare_addresses(expected_ips, discovered_ips):
+    """
+    Interface addresses that differ between intent and what the routers
+    report, including intended addresses that are absent and addresses on
+    interfaces the intent does not mention.
+
+    Returns:
+        [{"router": "r1", "interface": "Ethernet1",
+          "expected": "10.0.0.1/30", "discovered": "10.0.0.5/30"}, ...]
+    """
+    mismatches = []
+
+    for router in sorted(set(expected_ips) | set(discovered_ips)):
+        want = expected_ips.get(router, {})
+        have = discovered_ips.get(router, {})
+
+        for iface in sorted(set(want) | set(have)):
+            if want.get(iface) != have.get(iface):
+                mismatches.append({
+                    "router": router,
+                    "interface": iface,
+                    "expected": want.get(iface),
+                    "discovered": have.get(iface),
+                })
+
+    return mismatches
+
+
+def verify_intent(expected_lldp, expected_ips, discovered_lldp, discovered_ips=None):
+    """
+    Intent-vs-discovered report for a deployed lab.
+
+    expected_lldp / expected_ips: expected_lldp_topology() and
+        generate_interface_map() output for the request.
+    discovered_lldp / discovered_ips: the lldp_topology and ip_map that
+        pipeline.discover() returns. With discovered_ips=None only the
+        cabling is checked.
+    """
+    report = compare_links(expected_lldp, discovered_lldp)
+    report["address_mismatches"] = (
+        compare_addresses(expected_ips, discovered_ips)
+        if discovered_ips is not None else []
+    )
+    report["ok"] = not any(
+        report[k] for k in (
+            "missing_links", "unexpected_links",
+            "swapped_interfaces", "address_mismatches",
+        )
+    )
+    return report
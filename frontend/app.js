@@ -4,6 +4,98 @@
 
 let routers = [];
 let links = [];
+let routerProgress = {};
+
+const API_BASE = "http://localhost:5000";
+const JOB_POLL_INTERVAL_MS = 2000;
+
+// The builder handles large topologies (as /plan does); the backend
+// enforces its own, smaller limit on what can actually be deployed.
+const MAX_ROUTERS = 2000;
+const FRAME_BUDGET_MS = 16;
+
+
+// ======================================
+// Keyed DOM Updates
+// ======================================
+
+// Make container's children match `items`, one element per key.
+// Elements are created once and reused, so an edit only touches the DOM
+// for rows that were added, removed or moved.
+function syncChildren(container, items, keyOf, create, update) {
+
+    const keyed = container._keyed ||= new Map();
+    const wanted = new Set(items.map(keyOf));
+
+    for (const [key, el] of keyed) {
+        if (!wanted.has(key)) {
+            el.remove();
+            keyed.delete(key);
+        }
+    }
+
+    let next = container.firstChild;
+
+    for (const item of items) {
+        const key = keyOf(item);
+        let el = keyed.get(key);
+
+        if (!el) {
+            el = create(item);
+            keyed.set(key, el);
+        }
+        if (update) update(el, item);
+
+        if (el === next) {
+            next = next.nextSibling;
+        } else {
+            container.insertBefore(el, next);
+        }
+    }
+}
+
+
+// Set attributes that changed since the last call; unchanged ones cost
+// no DOM write.
+function setAttributes(el, attrs) {
+
+    const last = el._attrs ||= {};
+
+    for (const name in attrs) {
+        const value = String(attrs[name]);
+        if (last[name] !== value) {
+            el.setAttribute(name, value);
+            last[name] = value;
+        }
+    }
+}
+
+
+function listRow(label, onDelete) {
+
+    const row = document.createElement("div");
+    row.append(label + " ");
+
+    const button = document.createElement("button");
+    button.textContent = "🗑";
+    button.addEventListener("click", onDelete);
+    row.append(button);
+
+    return row;
+}
+
+
+function option(name) {
+    const el = document.createElement("option");
+    el.value = name;
+    el.textContent = name;
+    return el;
+}
+
+
+function linkKey(link) {
+    return link[0] + "\n" + link[1];
+}
 
 
 // ======================================
@@ -12,38 +104,28 @@ let links = [];
 
 function refreshUI() {
 
+    const started = performance.now();
+
     // ----- Update Router List (with delete button) -----
-    document.getElementById("routerList").innerHTML =
-        routers.map(r =>
-            `<div>
-                ${r}
-                <button onclick="deleteRouter('${r}')">🗑</button>
-             </div>`
-        ).join("");
+    syncChildren(document.getElementById("routerList"), routers, r => r,
+        r => listRow(r, () => deleteRouter(r)));
 
     // ----- Update Dropdowns -----
-    const routerA = document.getElementById("routerA");
-    const routerB = document.getElementById("routerB");
-
-    routerA.innerHTML = "";
-    routerB.innerHTML = "";
-
-    routers.forEach(r => {
-        routerA.innerHTML += `<option value="${r}">${r}</option>`;
-        routerB.innerHTML += `<option value="${r}">${r}</option>`;
-    });
+    syncChildren(document.getElementById("routerA"), routers, r => r, option);
+    syncChildren(document.getElementById("routerB"), routers, r => r, option);
 
     // ----- Update Link List (with delete button) -----
-    document.getElementById("linkList").innerHTML =
-        links.map((l, index) =>
-            `<div>
-                ${l[0]} ↔ ${l[1]}
-                <button onclick="deleteLink(${index})">🗑</button>
-             </div>`
-        ).join("");
-
-    updateJSONPreview();
+    syncChildren(document.getElementById("linkList"), links, linkKey,
+        l => listRow(`${l[0]} ↔ ${l[1]}`, () => deleteLink(linkKey(l))));
+
+    requestLayout();
     renderTopologyDiagram();
+    scheduleJSONPreview();
+
+    const elapsed = performance.now() - started;
+    if (elapsed > FRAME_BUDGET_MS) {
+        console.warn(`refreshUI took ${elapsed.toFixed(1)} ms for ${routers.length} routers`);
+    }
 }
 
 
@@ -51,21 +133,49 @@ function refreshUI() {
 // JSON Preview
 // ======================================
 
-function updateJSONPreview() {
+function buildPayload() {
 
-    const payload = {
-        name: "sdn-lab",
+    return {
+        name: document.getElementById("labName").value.trim() || "sdn-lab",
         mgmt_subnet: "172.20.20.0/24",
         routers: routers,
         links: links,
         ceos_image: "ceos:4.35.1F"
     };
+}
+
+
+function updateJSONPreview() {
+
+    const payload = buildPayload();
 
     document.getElementById("jsonPreview").textContent =
         JSON.stringify(payload, null, 2);
 }
 
 
+// The preview of a large topology is a big text node; refresh it once
+// the browser is idle instead of on every edit's frame.
+let previewPending = false;
+
+function scheduleJSONPreview() {
+
+    if (previewPending) return;
+    previewPending = true;
+
+    const run = () => {
+        previewPending = false;
+        updateJSONPreview();
+    };
+
+    if (window.requestIdleCallback) {
+        requestIdleCallback(run, { timeout: 500 });
+    } else {
+        setTimeout(run, 0);
+    }
+}
+
+
 // ======================================
 // Add Router
 // ======================================
@@ -76,8 +186,8 @@ function addRouter() {
 
     if (!name) return;
 
-    if (routers.length >= 8) {
-        alert("Maximum 8 routers allowed.");
+    if (routers.length >= MAX_ROUTERS) {
+        alert(`Maximum ${MAX_ROUTERS} routers allowed.`);
         return;
     }
 
@@ -143,9 +253,9 @@ function addLink() {
 // Delete Link
 // ======================================
 
-function deleteLink(index) {
+function deleteLink(key) {
 
-    links.splice(index, 1);
+    links = links.filter(l => linkKey(l) !== key);
 
     refreshUI();
 }
@@ -157,48 +267,159 @@ function deleteLink(index) {
 
 async function deploy() {
 
-    const payload = {
-        name: "sdn-lab",
-        mgmt_subnet: "172.20.20.0/24",
-        routers: routers,
-        links: links,
-        ceos_image: "ceos:4.35.1F"
-    };
-
-    setDeployStatus("running", "Deploying topology... this may take a few minutes.");
+    const payload = buildPayload();
 
-    // 10 minute timeout — deploy pipeline takes several minutes
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), 10 * 60 * 1000);
+    setDeployStatus("running", "Submitting deployment...");
 
     try {
-        const response = await fetch("http://localhost:5000/deploy", {
+        const response = await fetch(`${API_BASE}/deploy`, {
             method: "POST",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify(payload),
-            signal: controller.signal
+            body: JSON.stringify(payload)
         });
 
-        clearTimeout(timeoutId);
         const data = await response.json();
 
-        if (response.ok) {
-            const routers = data.controller_result?.topology_nodes?.join(", ") || "";
-            setDeployStatus("success",
-                `Routes installed successfully on ${data.router_count} routers (${routers}).`
-            );
-        } else {
+        if (!response.ok) {
             setDeployStatus("error", "Deploy failed: " + (data.detail || JSON.stringify(data)));
+            return;
         }
 
+        watchJob(data.job_id);
+
     } catch (error) {
-        clearTimeout(timeoutId);
-        if (error.name === "AbortError") {
-            setDeployStatus("error", "Deploy timed out after 10 minutes.");
-        } else {
-            setDeployStatus("error", "Backend error: " + error);
+        setDeployStatus("error", "Backend error: " + error);
+    }
+}
+
+
+// ======================================
+// Live Deploy Progress (Server-Sent Events)
+// ======================================
+
+function watchJob(jobId) {
+
+    routerProgress = {};
+    renderRouterProgress();
+
+    const source = new EventSource(`${API_BASE}/jobs/${jobId}/events`);
+
+    source.onmessage = (msg) => {
+        const event = JSON.parse(msg.data);
+        handleJobEvent(event);
+
+        if (event.type === "job_end") {
+            source.close();
+            pollJob(jobId);
+        }
+    };
+
+    // Stream unavailable: fall back to polling the job
+    source.onerror = () => {
+        source.close();
+        pollJob(jobId);
+    };
+}
+
+
+function handleJobEvent(event) {
+
+    const entry = event.router
+        ? (routerProgress[event.router] ||= { stage: "", state: "", commands: 0, routes: 0 })
+        : null;
+
+    switch (event.type) {
+        case "stage_start":
+            setDeployStatus("running", `Deploying topology (stage: ${event.stage})...`);
+            break;
+        case "router_connect":
+            entry.stage = event.stage;
+            entry.state = "connected";
+            break;
+        case "commands_sent":
+            entry.commands += event.count;
+            break;
+        case "route_installed":
+            entry.routes += 1;
+            break;
+        case "router_done":
+            entry.stage = event.stage;
+            entry.state = `done (${event.duration}s)`;
+            break;
+        case "failure":
+            if (entry) entry.state = "failed: " + event.message;
+            break;
+        default:
+            return;
+    }
+
+    renderRouterProgress();
+}
+
+
+function renderRouterProgress() {
+
+    // Called once per job event: only the rows whose text changed are written
+    syncChildren(
+        document.getElementById("routerProgress"),
+        Object.entries(routerProgress),
+        ([r]) => r,
+        ([r]) => {
+            const row = document.createElement("div");
+            const name = document.createElement("b");
+            name.textContent = r;
+            row.append(name, document.createTextNode(""));
+            return row;
+        },
+        (row, [, p]) => {
+            const text = ` — ${p.stage} ${p.state} · ${p.commands} commands · ${p.routes} routes`;
+            if (row.lastChild.data !== text) row.lastChild.data = text;
+        }
+    );
+}
+
+
+// ======================================
+// Poll Deploy Job
+// ======================================
+
+async function pollJob(jobId) {
+
+    let job;
+
+    try {
+        const response = await fetch(`${API_BASE}/jobs/${jobId}`);
+        job = await response.json();
+
+        if (!response.ok) {
+            setDeployStatus("error", "Deploy failed: " + (job.detail || JSON.stringify(job)));
+            return;
         }
+    } catch (error) {
+        setDeployStatus("error", "Backend error: " + error);
+        return;
+    }
+
+    if (job.status === "succeeded") {
+        const data = job.result;
+        const routers = data.controller_result?.topology_nodes?.join(", ") || "";
+        setDeployStatus("success",
+            `Routes installed successfully on ${data.router_count} routers (${routers}) in ${job.elapsed}s.`
+        );
+        watchLab(data.lab || buildPayload().name);
+        return;
+    }
+
+    if (job.status === "failed") {
+        const reason = job.errors.map(e => e.message).join("; ");
+        setDeployStatus("error", `Deploy failed during ${job.stage}: ${reason}`);
+        return;
     }
+
+    const stage = job.stage ? `stage: ${job.stage}` : "queued";
+    setDeployStatus("running", `Deploying topology (${stage}, ${job.elapsed}s elapsed)...`);
+
+    setTimeout(() => pollJob(jobId), JOB_POLL_INTERVAL_MS);
 }
 
 
@@ -214,87 +435,395 @@ function setDeployStatus(state, message) {
 // Render Topology Diagram (SVG)
 // ======================================
 
-function renderTopologyDiagram() {
+// The SVG is built once; each render diffs it against the topology:
+// elements are keyed by router / link and only changed attributes are
+// written, so adding a router adds one node instead of re-parsing the
+// whole drawing.
 
-    const container = document.getElementById("diagram");
+const SVG_NS = "http://www.w3.org/2000/svg";
+const DIAGRAM_WIDTH = 860;
+const DIAGRAM_HEIGHT = 420;
 
-    if (!container) return;
+let diagram = null;
+
+
+function svgElement(tag, attrs) {
+    const el = document.createElementNS(SVG_NS, tag);
+    setAttributes(el, attrs);
+    return el;
+}
+
+
+function diagramLayers(container) {
+
+    if (diagram && container.contains(diagram.svg)) return diagram;
+
+    const svg = svgElement("svg", {
+        viewBox: `0 0 ${DIAGRAM_WIDTH} ${DIAGRAM_HEIGHT}`,
+    });
+    const linkLayer = svgElement("g", { class: "links" });
+    const nodeLayer = svgElement("g", { class: "nodes" });
+    svg.append(linkLayer, nodeLayer);
+
+    const placeholder = document.createElement("div");
+    placeholder.textContent = "Add routers to visualize topology.";
+
+    container.replaceChildren(placeholder, svg);
+    diagram = { svg, linkLayer, nodeLayer, placeholder };
+    return diagram;
+}
+
+
+// ======================================
+// Diagram Layout (Web Worker)
+// ======================================
+
+// Force-directed positions come from layout_worker.js, off the main
+// thread, streamed while the layout settles. If the worker can't start
+// (some browsers refuse workers on file:// pages) routers are drawn on
+// a circle instead.
+
+const DIAGRAM_PADDING = 40;
+
+let layoutWorker = null;
+let layoutVersion = 0;
+let layoutRouters = [];
+let layoutPositions = new Map();
+let diagramFrame = null;
 
-    if (routers.length === 0) {
-        container.innerHTML = "<div>Add routers to visualize topology.</div>";
+
+function startLayoutWorker() {
+
+    try {
+        layoutWorker = new Worker("layout_worker.js");
+    } catch (error) {
+        layoutWorker = null;
         return;
     }
 
-    const width = 860;
-    const height = 420;
-    const cx = width / 2;
-    const cy = height / 2;
-    const radius = Math.min(width, height) * 0.33;
+    layoutWorker.onmessage = (msg) => {
+        const { version, xy } = msg.data;
 
-    const positions = {};
+        // Positions for an older topology; the newer ones are on the way
+        if (version !== layoutVersion) return;
 
-    routers.forEach((r, i) => {
-        const angle = (2 * Math.PI * i) / routers.length;
-        const x = cx + radius * Math.cos(angle);
-        const y = cy + radius * Math.sin(angle);
-        positions[r] = { x, y };
+        layoutRouters.forEach((r, i) => {
+            layoutPositions.set(r, { x: xy[2 * i], y: xy[2 * i + 1] });
+        });
+        scheduleDiagramRender();
+    };
+
+    layoutWorker.onerror = () => {
+        layoutWorker.terminate();
+        layoutWorker = null;
+        scheduleDiagramRender();
+    };
+}
+
+
+function requestLayout() {
+
+    if (!layoutWorker) return;
+
+    layoutVersion += 1;
+    layoutRouters = routers.slice();
+
+    layoutWorker.postMessage({
+        type: "topology", version: layoutVersion, routers: layoutRouters, links,
     });
+}
+
+
+function scheduleDiagramRender() {
 
-    let svg = `
-        <svg viewBox="0 0 ${width} ${height}" xmlns="http://www.w3.org/2000/svg">
-            <g class="links">
-    `;
-
-    links.forEach(([a, b]) => {
-
-        if (!positions[a] || !positions[b]) return;
-
-        svg += `
-            <line 
-                x1="${positions[a].x}" 
-                y1="${positions[a].y}" 
-                x2="${positions[b].x}" 
-                y2="${positions[b].y}" 
-                stroke="#444" 
-                stroke-width="2"
-            />
-        `;
+    if (diagramFrame !== null) return;
+
+    diagramFrame = requestAnimationFrame(() => {
+        diagramFrame = null;
+        renderTopologyDiagram();
     });
+}
+
+
+function diagramPositions() {
 
-    svg += `
-            </g>
-            <g class="nodes">
-    `;
+    if (!layoutWorker) return circleLayout(routers);
+
+    // A router the worker hasn't placed yet starts at the centre
+    const positions = {};
+    for (const r of routers) {
+        positions[r] = layoutPositions.get(r) || { x: 0, y: 0 };
+    }
+    return positions;
+}
 
-    routers.forEach(r => {
 
+// Worker coordinates are unbounded: fit the view to the drawing.
+function diagramViewBox(positions) {
+
+    if (!layoutWorker) return `0 0 ${DIAGRAM_WIDTH} ${DIAGRAM_HEIGHT}`;
+
+    let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+    for (const r of routers) {
         const { x, y } = positions[r];
+        minX = Math.min(minX, x);
+        minY = Math.min(minY, y);
+        maxX = Math.max(maxX, x);
+        maxY = Math.max(maxY, y);
+    }
+
+    const width = maxX - minX + 2 * DIAGRAM_PADDING;
+    const height = maxY - minY + 2 * DIAGRAM_PADDING;
+    return [minX - DIAGRAM_PADDING, minY - DIAGRAM_PADDING, width, height]
+        .map(v => v.toFixed(0)).join(" ");
+}
+
+
+function circleLayout(routers) {
+
+    const cx = DIAGRAM_WIDTH / 2;
+    const cy = DIAGRAM_HEIGHT / 2;
+    const radius = Math.min(DIAGRAM_WIDTH, DIAGRAM_HEIGHT) * 0.33;
 
-        svg += `
-            <g class="node">
-                <circle 
-                    cx="${x}" 
-                    cy="${y}" 
-                    r="22" 
-                    fill="#e8f0ff" 
-                    stroke="#2b5cff" 
-                    stroke-width="2">
-                </circle>
-                <text 
-                    x="${x}" 
-                    y="${y + 4}" 
-                    text-anchor="middle" 
-                    fill="#111">
-                    ${r}
-                </text>
-            </g>
-        `;
+    const positions = {};
+
+    routers.forEach((r, i) => {
+        const angle = (2 * Math.PI * i) / routers.length;
+        positions[r] = {
+            x: cx + radius * Math.cos(angle),
+            y: cy + radius * Math.sin(angle),
+        };
     });
 
-    svg += `
-            </g>
-        </svg>
-    `;
+    return positions;
+}
+
+
+function renderTopologyDiagram() {
+
+    const container = document.getElementById("diagram");
+
+    if (!container) return;
+
+    const { svg, linkLayer, nodeLayer, placeholder } = diagramLayers(container);
+
+    placeholder.style.display = routers.length ? "none" : "";
+    svg.style.display = routers.length ? "" : "none";
+
+    if (!routers.length) return;
+
+    const positions = diagramPositions();
+    setAttributes(svg, { viewBox: diagramViewBox(positions) });
+
+    syncChildren(
+        linkLayer,
+        links.filter(([a, b]) => positions[a] && positions[b]),
+        linkKey,
+        () => svgElement("line", {}),
+        (line, [a, b]) => setAttributes(line, {
+            x1: positions[a].x.toFixed(1), y1: positions[a].y.toFixed(1),
+            x2: positions[b].x.toFixed(1), y2: positions[b].y.toFixed(1),
+            ...linkStyle(a, b),
+        })
+    );
+
+    syncChildren(
+        nodeLayer,
+        routers,
+        r => r,
+        r => {
+            const node = svgElement("g", { class: "node" });
+            const circle = svgElement("circle", { r: 22, "stroke-width": 2 });
+            const label = svgElement("text", { y: 4, "text-anchor": "middle", fill: "#111" });
+            label.textContent = r;
+            node.append(circle, label);
+            node.addEventListener("click", () => selectRouter(r));
+            return node;
+        },
+        (node, r) => {
+            const { x, y } = positions[r];
+            setAttributes(node, { transform: `translate(${x.toFixed(1)},${y.toFixed(1)})` });
+            setAttributes(node.firstChild, nodeStyle(r));
+        }
+    );
+}
+
+
+// ======================================
+// Live Link State & Route Paths
+// ======================================
+
+// After a deploy the diagram follows the lab: link colours come from the
+// push stream /labs/{name}/links/stream (state, and routes carried as
+// load), and clicking two routers fetches only that path from /path.
 
-    container.innerHTML = svg;
+const LINK_STATE_COLORS = { down: "#d93025", suppressed: "#f29900" };
+const PATH_COLOR = "#0b8043";
+
+let liveLab = null;
+let liveSource = null;
+let liveVersion = null;
+let linkOverlay = new Map();
+let maxRoutes = 0;
+let pathSelection = [];
+let highlightedPath = null;
+
+
+function pairKey(a, b) {
+    return a < b ? a + "\n" + b : b + "\n" + a;
+}
+
+
+function watchLab(name) {
+
+    if (liveSource) liveSource.close();
+
+    liveLab = name;
+    liveVersion = null;
+    pathSelection = [];
+    highlightedPath = null;
+
+    liveSource = new EventSource(`${API_BASE}/labs/${encodeURIComponent(name)}/links/stream`);
+
+    liveSource.onmessage = (msg) => {
+        const data = JSON.parse(msg.data);
+
+        if (data.type === "lab_gone") {
+            liveSource.close();
+            liveLab = null;
+            linkOverlay = new Map();
+            highlightedPath = null;
+            showPathInfo("");
+            scheduleDiagramRender();
+            return;
+        }
+
+        // Parallel links between two routers are drawn as one line
+        const rank = { down: 0, suppressed: 1, up: 2 };
+        const overlay = new Map();
+        for (const l of data.links) {
+            const key = pairKey(l.a, l.b);
+            const seen = overlay.get(key);
+            overlay.set(key, seen ? {
+                state: rank[l.state] > rank[seen.state] ? l.state : seen.state,
+                routes: seen.routes + l.routes,
+            } : { state: l.state, routes: l.routes });
+        }
+        linkOverlay = overlay;
+        maxRoutes = Math.max(1, ...Array.from(overlay.values(), o => o.routes));
+
+        // Routes were recomputed: the highlighted path may have moved
+        if (data.version !== liveVersion) {
+            liveVersion = data.version;
+            if (pathSelection.length === 2) fetchPath();
+        }
+
+        scheduleDiagramRender();
+    };
+}
+
+
+function linkStyle(a, b) {
+
+    const key = pairKey(a, b);
+    const live = linkOverlay.get(key);
+    const onPath = highlightedPath !== null && highlightedPath.links.has(key);
+
+    const style = {
+        stroke: "#444",
+        "stroke-width": 2,
+        "stroke-dasharray": "none",
+        "stroke-opacity": highlightedPath !== null && !onPath ? 0.3 : 1,
+    };
+
+    if (onPath) {
+        return { ...style, stroke: PATH_COLOR, "stroke-width": 6 };
+    }
+    if (!live) {
+        return style;
+    }
+    if (live.state !== "up") {
+        return { ...style, stroke: LINK_STATE_COLORS[live.state], "stroke-dasharray": "6 4" };
+    }
+
+    // Load: blue when idle, through to red for the busiest link
+    const load = live.routes / maxRoutes;
+    return {
+        ...style,
+        stroke: `hsl(${(210 * (1 - load)).toFixed(0)}, 70%, 45%)`,
+        "stroke-width": (2 + 4 * load).toFixed(1),
+    };
+}
+
+
+function nodeStyle(r) {
+
+    const selected = pathSelection.includes(r);
+    const onPath = highlightedPath !== null && highlightedPath.nodes.has(r);
+
+    if (selected || onPath) {
+        return { fill: "#d2f3dc", stroke: PATH_COLOR };
+    }
+    return { fill: "#e8f0ff", stroke: "#2b5cff" };
+}
+
+
+function selectRouter(r) {
+
+    if (!liveLab) return;
+
+    pathSelection = pathSelection.length === 1 && pathSelection[0] !== r
+        ? [pathSelection[0], r]
+        : [r];
+    highlightedPath = null;
+
+    if (pathSelection.length === 2) {
+        fetchPath();
+    } else {
+        showPathInfo(`Path from ${r}: click the destination router.`);
+    }
+
+    scheduleDiagramRender();
+}
+
+
+async function fetchPath() {
+
+    const [src, dst] = pathSelection;
+    const params = new URLSearchParams({ src, dst, lab: liveLab });
+
+    let text;
+    try {
+        const response = await fetch(`${API_BASE}/path?${params}`);
+        const data = await response.json();
+
+        // Another pair was clicked meanwhile
+        if (pathSelection[0] !== src || pathSelection[1] !== dst) return;
+
+        if (response.ok) {
+            highlightedPath = {
+                nodes: new Set(data.path),
+                links: new Set(data.path.slice(1).map((r, i) => pairKey(data.path[i], r))),
+            };
+            text = `${data.path.join(" → ")} (cost ${data.cost})`;
+        } else {
+            highlightedPath = null;
+            text = data.detail || JSON.stringify(data);
+        }
+    } catch (error) {
+        text = "Backend error: " + error;
+    }
+
+    showPathInfo(text);
+    scheduleDiagramRender();
+}
+
+
+function showPathInfo(text) {
+    const box = document.getElementById("pathInfo");
+    box.textContent = text;
+    box.style.display = text ? "block" : "none";
 }
+
+
+startLayoutWorker();
@@ -0,0 +1,362 @@
+// ======================================
+// Force-Directed Layout (Web Worker)
+// ======================================
+//
+// Lays out the topology diagram off the main thread:
+//
+// - routers repel each other (Barnes–Hut quadtree, O(n log n) per tick)
+// - links pull their ends to LINK_LENGTH apart
+// - a weak pull toward the origin keeps components together
+//
+// Positions are streamed to the page every POST_INTERVAL_MS while the
+// layout settles, and kept between topology messages. After a small
+// edit only routers within LOCAL_HOPS of it move, so the rest of the
+// drawing stays put and the layout settles in a few frames.
+//
+// In:  { type: "topology", version, routers: ["r1", ...], links: [["r1", "r2"], ...] }
+// Out: { type: "positions", version, xy: Float32Array [x0, y0, x1, y1, ...], done }
+
+const LINK_LENGTH = 80;
+const REPULSION = 6000;
+const SPRING = 0.05;
+const GRAVITY = 0.01;
+const THETA = 0.9;
+const DAMPING = 0.6;
+const MAX_STEP = 30;
+const ALPHA_MIN = 0.005;
+const ALPHA_DECAY = 0.02;
+const LOCAL_ALPHA = 0.5;
+const LOCAL_HOPS = 2;
+const POST_INTERVAL_MS = 32;
+
+// router -> [x, y], kept across topology changes
+const cache = new Map();
+
+let state = null;
+let alpha = 0;
+let running = false;
+
+
+onmessage = (msg) => {
+    if (msg.data.type === "topology") {
+        setTopology(msg.data);
+    }
+};
+
+
+function linkKey(a, b) {
+    return a + "\n" + b;
+}
+
+
+// ======================================
+// Topology Changes
+// ======================================
+
+function setTopology({ version, routers, links }) {
+
+    const n = routers.length;
+    const index = new Map(routers.map((r, i) => [r, i]));
+    const adjacency = routers.map(() => []);
+    const edges = [];
+    const linkSet = new Set();
+
+    for (const [a, b] of links) {
+        const i = index.get(a);
+        const j = index.get(b);
+        if (i === undefined || j === undefined) continue;
+        edges.push(i, j);
+        adjacency[i].push(j);
+        adjacency[j].push(i);
+        linkSet.add(linkKey(a, b));
+    }
+
+    // Routers whose links were added or removed since the last layout
+    const changed = new Set();
+    const previous = state ? state.linkSet : new Set();
+
+    for (const [a, b] of links) {
+        if (!previous.has(linkKey(a, b))) changed.add(a).add(b);
+    }
+    for (const key of previous) {
+        if (!linkSet.has(key)) key.split("\n").forEach(r => changed.add(r));
+    }
+
+    for (const r of cache.keys()) {
+        if (!index.has(r)) cache.delete(r);
+    }
+
+    const x = new Float64Array(n);
+    const y = new Float64Array(n);
+    const placed = new Uint8Array(n);
+    const fresh = cache.size === 0;
+
+    routers.forEach((r, i) => {
+        const p = cache.get(r);
+        if (p) {
+            [x[i], y[i]] = p;
+            placed[i] = 1;
+        } else {
+            changed.add(r);
+        }
+    });
+
+    // New routers start next to their placed neighbours, else anywhere
+    const spread = Math.sqrt(n) * LINK_LENGTH / 2;
+
+    routers.forEach((r, i) => {
+        if (placed[i]) return;
+
+        const around = adjacency[i].filter(j => placed[j]);
+        if (around.length) {
+            x[i] = around.reduce((s, j) => s + x[j], 0) / around.length;
+            y[i] = around.reduce((s, j) => s + y[j], 0) / around.length;
+        } else {
+            x[i] = (Math.random() - 0.5) * 2 * spread;
+            y[i] = (Math.random() - 0.5) * 2 * spread;
+        }
+        x[i] += (Math.random() - 0.5) * LINK_LENGTH / 4;
+        y[i] += (Math.random() - 0.5) * LINK_LENGTH / 4;
+        placed[i] = 1;
+    });
+
+    const heat = new Float64Array(n);
+    // A whole-graph layout still settling keeps going for every router
+    const full = fresh || changed.size > n / 5 || (running && state.full);
+
+    if (n === 0) {
+        alpha = 0;
+    } else if (full) {
+        heat.fill(1);
+        alpha = Math.max(alpha, fresh ? 1 : LOCAL_ALPHA);
+    } else if (changed.size) {
+        relaxAround(changed, index, adjacency, heat);
+        alpha = Math.max(alpha, LOCAL_ALPHA);
+    }
+
+    state = {
+        version, routers, linkSet, edges, x, y, heat, full,
+        vx: new Float64Array(n), vy: new Float64Array(n),
+    };
+
+    if (!running) {
+        running = true;
+        setTimeout(run, 0);
+    }
+}
+
+
+// Free routers within LOCAL_HOPS of an edit, the nearest ones the most.
+function relaxAround(changed, index, adjacency, heat) {
+
+    let frontier = [];
+    for (const r of changed) {
+        const i = index.get(r);
+        if (i !== undefined) {
+            heat[i] = 1;
+            frontier.push(i);
+        }
+    }
+
+    for (let hop = 1; hop <= LOCAL_HOPS && frontier.length; hop++) {
+        const next = [];
+        for (const i of frontier) {
+            for (const j of adjacency[i]) {
+                if (heat[j] === 0) {
+                    heat[j] = 1 / (hop + 1);
+                    next.push(j);
+                }
+            }
+        }
+        frontier = next;
+    }
+}
+
+
+// ======================================
+// Simulation
+// ======================================
+
+function run() {
+
+    const started = performance.now();
+
+    while (alpha > ALPHA_MIN && performance.now() - started < POST_INTERVAL_MS) {
+        tick();
+        alpha *= 1 - ALPHA_DECAY;
+    }
+
+    const done = alpha <= ALPHA_MIN;
+    post(done);
+
+    if (done) {
+        running = false;
+    } else {
+        setTimeout(run, 0);
+    }
+}
+
+
+function tick() {
+
+    const { x, y, vx, vy, heat, edges } = state;
+    const n = x.length;
+    const fx = new Float64Array(n);
+    const fy = new Float64Array(n);
+
+    const tree = buildTree(x, y);
+
+    for (let i = 0; i < n; i++) {
+        if (heat[i] > 0) repulse(tree, i, x, y, fx, fy);
+    }
+
+    for (let k = 0; k < edges.length; k += 2) {
+        const i = edges[k];
+        const j = edges[k + 1];
+        const dx = x[j] - x[i];
+        const dy = y[j] - y[i];
+        const d = Math.sqrt(dx * dx + dy * dy) || 1e-6;
+        const f = SPRING * (d - LINK_LENGTH) / d;
+        fx[i] += dx * f;
+        fy[i] += dy * f;
+        fx[j] -= dx * f;
+        fy[j] -= dy * f;
+    }
+
+    for (let i = 0; i < n; i++) {
+        if (heat[i] === 0) continue;
+
+        vx[i] = (vx[i] + (fx[i] - x[i] * GRAVITY) * alpha) * DAMPING;
+        vy[i] = (vy[i] + (fy[i] - y[i] * GRAVITY) * alpha) * DAMPING;
+
+        const step = Math.sqrt(vx[i] * vx[i] + vy[i] * vy[i]);
+        const scale = step > MAX_STEP ? MAX_STEP / step : 1;
+
+        x[i] += vx[i] * scale * heat[i];
+        y[i] += vy[i] * scale * heat[i];
+    }
+}
+
+
+function post(done) {
+
+    const { version, routers, x, y } = state;
+    const xy = new Float32Array(2 * routers.length);
+
+    routers.forEach((r, i) => {
+        xy[2 * i] = x[i];
+        xy[2 * i + 1] = y[i];
+        cache.set(r, [x[i], y[i]]);
+    });
+
+    postMessage({ type: "positions", version, xy, done }, [xy.buffer]);
+}
+
+
+// ======================================
+// Barnes–Hut Quadtree
+// ======================================
+
+// Cells hold the mass (router count) and summed position of everything
+// inside them. A cell far enough away (size / distance < THETA) acts on
+// a router as one body at its centre of mass.
+
+const MAX_DEPTH = 32;
+
+
+function cell(x0, y0, size) {
+    return { x0, y0, size, mass: 0, sx: 0, sy: 0, body: -1, children: null };
+}
+
+
+function buildTree(x, y) {
+
+    let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+    for (let i = 0; i < x.length; i++) {
+        minX = Math.min(minX, x[i]);
+        minY = Math.min(minY, y[i]);
+        maxX = Math.max(maxX, x[i]);
+        maxY = Math.max(maxY, y[i]);
+    }
+
+    const root = cell(minX, minY, Math.max(maxX - minX, maxY - minY) + 1);
+    for (let i = 0; i < x.length; i++) {
+        insert(root, i, x, y, 0);
+    }
+    return root;
+}
+
+
+function insert(node, i, x, y, depth) {
+
+    node.mass += 1;
+    node.sx += x[i];
+    node.sy += y[i];
+
+    if (node.children === null) {
+        if (node.mass === 1) {
+            node.body = i;
+            return;
+        }
+        // Coincident routers share one leaf rather than splitting forever
+        if (depth >= MAX_DEPTH) return;
+
+        node.children = [null, null, null, null];
+        const previous = node.body;
+        node.body = -1;
+        insertChild(node, previous, x, y, depth);
+    }
+
+    insertChild(node, i, x, y, depth);
+}
+
+
+function insertChild(node, i, x, y, depth) {
+
+    const half = node.size / 2;
+    const right = x[i] >= node.x0 + half;
+    const below = y[i] >= node.y0 + half;
+    const q = (right ? 1 : 0) + (below ? 2 : 0);
+
+    if (node.children[q] === null) {
+        node.children[q] = cell(
+            node.x0 + (right ? half : 0), node.y0 + (below ? half : 0), half
+        );
+    }
+    insert(node.children[q], i, x, y, depth + 1);
+}
+
+
+function repulse(root, i, x, y, fx, fy) {
+
+    const stack = [root];
+
+    while (stack.length) {
+        const node = stack.pop();
+
+        if (node.body === i) continue;
+
+        let dx = x[i] - node.sx / node.mass;
+        let dy = y[i] - node.sy / node.mass;
+        let d2 = dx * dx + dy * dy;
+
+        if (node.children !== null && node.size * node.size >= THETA * THETA * d2) {
+            for (const child of node.children) {
+                if (child !== null) stack.push(child);
+            }
+            continue;
+        }
+
+        if (d2 < 1) {
+            // On top of each other: push apart in a random direction
+            dx = Math.random() - 0.5;
+            dy = Math.random() - 0.5;
+            d2 = 1;
+        }
+
+        const d = Math.sqrt(d2);
+        const f = REPULSION * node.mass / d2;
+        fx[i] += dx / d * f;
+        fy[i] += dy / d * f;
+    }
+}